@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Serve the dashboard through this app (e.g. ``uvicorn VmedulifeDashboard.asgi:application``)
+so the attendance Server-Sent Events stream can hold many idle connections on one process.
 """
 
 import os
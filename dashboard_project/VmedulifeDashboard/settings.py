@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -72,14 +73,51 @@ WSGI_APPLICATION = 'VmedulifeDashboard.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# https://docs.djangoproject.com/en/5.2/ref/databases/#sqlite-notes
+# The web process, scrape worker, refresh scheduler and batch runner all write at once. On
+# SQLite, WAL lets reads go on while one connection writes, and synchronous=NORMAL is still
+# crash-safe under WAL with far fewer fsyncs. IMMEDIATE transactions take the write lock when
+# they begin, so a second writer waits up to SQLITE_BUSY_TIMEOUT for it. Under the default
+# DEFERRED mode a transaction that read first fails at once with "database is locked" when it
+# tries to write. Compare the two with python -m scraper.bench_db_writers.
+#
+# Set POSTGRES_DB (and POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT) to use
+# PostgreSQL instead; that needs psycopg 3 installed, plus psycopg-pool for POSTGRES_POOL_SIZE.
+
+SQLITE_BUSY_TIMEOUT = 20 # Seconds a writer waits for the lock before failing
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': SQLITE_BUSY_TIMEOUT,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'       # Persistent in the file, re-asserted on every connection
+                'PRAGMA synchronous=NORMAL;'
+                f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT * 1000};'
+            ),
+        },
     }
 }
 
+if os.environ.get('POSTGRES_DB'):
+    POSTGRES_POOL_SIZE = int(os.environ.get('POSTGRES_POOL_SIZE', 10)) # Connections per process; 0 for no pool
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ['POSTGRES_DB'],
+        'USER': os.environ.get('POSTGRES_USER', ''),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', ''),
+        'PORT': os.environ.get('POSTGRES_PORT', ''),
+        # A pool hands connections back after each request; without one, keep each
+        # thread's connection open for 10 minutes instead of reconnecting per request
+        'CONN_MAX_AGE': 0 if POSTGRES_POOL_SIZE else 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'pool': {'min_size': 1, 'max_size': POSTGRES_POOL_SIZE, 'timeout': 10}} if POSTGRES_POOL_SIZE else {},
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -121,3 +159,60 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Scrape job queue (see attendance_dashboard/jobs.py and the run_scrape_worker command)
+
+SCRAPE_JOB_CONCURRENCY = 2     # Maximum scrapes running at once across all workers
+SCRAPE_JOB_MAX_ATTEMPTS = 3
+SCRAPE_JOB_RETRY_BACKOFF = 30  # Seconds before the first retry, doubled on each further attempt
+SCRAPE_JOB_STALE_AFTER = 600   # Seconds after which a running job is assumed to be orphaned
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# File-based so the scrape worker's invalidations reach the web process. A single-process
+# setup can use 'django.core.cache.backends.locmem.LocMemCache' instead.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'django_cache',
+    }
+}
+
+# Attendance update stream (Server-Sent Events, see attendance_dashboard/streams.py)
+
+ATTENDANCE_STREAM_POLL_INTERVAL = 2  # Seconds between checks for a newly saved scrape, per process
+ATTENDANCE_STREAM_KEEPALIVE = 20     # Seconds between keepalive comments on idle connections
+
+# Background refresh scheduler (see attendance_dashboard/scheduler.py and the run_refresh_scheduler command)
+
+REFRESH_CONCURRENCY = 2          # Maximum scrapes the scheduler runs at once
+REFRESH_JITTER = 0.1             # Random +/- fraction applied to every interval
+REFRESH_SLOW_SECONDS = 90        # Scrapes slower than this count as the portal being slow
+REFRESH_MAX_BACKOFF = 8.0        # Upper bound on the interval multiplier
+REFRESH_TIMEZONE = 'Asia/Kolkata' # The portal's timezone, which REFRESH_QUIET_HOURS is in
+REFRESH_QUIET_HOURS = (1, 6)     # Hours [start, end) in REFRESH_TIMEZONE with no refreshes; None to disable
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+# The scraper, job worker and refresh scheduler log through the root logger.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(asctime)s - %(levelname)s - %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'plain'},
+    },
+    'root': {'handlers': ['console'], 'level': 'INFO'},
+}
+
+
+# Metrics (Prometheus text format at /metrics, see attendance_dashboard/metrics.py)
+
+METRICS_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120) # Seconds, upper bounds of the histogram buckets
+METRICS_TRACE_RETENTION_DAYS = 14 # Traced runs older than this are deleted; the /metrics totals keep counting
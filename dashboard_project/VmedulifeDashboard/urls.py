@@ -16,8 +16,10 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from attendance_dashboard.views import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('dashboard/', include('attendance_dashboard.urls')),
+    path('metrics', metrics, name='metrics'), # Prometheus text format
 ]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AttendanceDashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'attendance_dashboard'
+
+    def ready(self):
+        from . import signals # noqa: F401 - connects the cache invalidation receivers
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+
+from .models import AttendanceData
+
+# Cached payloads for the latest-attendance API, one per dashboard user. A user's entry is
+# dropped whenever their attendance or profile is saved (see signals.py), so polls between
+# scrapes never touch the DB.
+LATEST_ATTENDANCE_KEY = 'attendance_dashboard:latest_attendance:{user_id}' # Django User pk
+LATEST_ATTENDANCE_VERSION_KEY = 'attendance_dashboard:latest_attendance_version:{user_id}' # Bumped when that entry is dropped
+LATEST_ATTENDANCE_TIMEOUT = 60 * 60 # Safety net in case an invalidation is missed
+
+
+def latest_attendance_for(user_id):
+    # The user's newest snapshot with its UserProfile, in one query on the (user, -timestamp) index
+    return (AttendanceData.objects.select_related('user')
+            .filter(user__user_id=user_id)
+            .order_by('-timestamp')
+            .first())
+
+
+def attendance_status_of(attendance, user_profile):
+    if attendance is None or user_profile is None:
+        return "N/A"
+    return "Above Target" if attendance.attendance_percentage >= user_profile.attendance_goal else "Below Target"
+
+
+def build_latest_attendance_data(user_id):
+    latest_attendance = latest_attendance_for(user_id)
+
+    if latest_attendance:
+        user_profile = latest_attendance.user
+        data = {
+            'total_classes_conducted': latest_attendance.total_classes_conducted,
+            'classes_attended': latest_attendance.classes_attended,
+            'attendance_percentage': float(latest_attendance.attendance_percentage), # Convert Decimal to float for JSON
+            'timestamp': latest_attendance.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            'attendance_goal': float(user_profile.attendance_goal),
+            'attendance_status': attendance_status_of(latest_attendance, user_profile),
+        }
+    else:
+        data = {'message': 'No attendance data available yet.'}
+    return data
+
+
+def get_latest_attendance_payload(user_id):
+    # Returns {'data', 'etag'} for one user, computing and caching it on a miss. The ETag is a
+    # hash of the body, so it changes with anything shown, the goal included; there is no
+    # Last-Modified, which no single timestamp tracks that precisely.
+    key = LATEST_ATTENDANCE_KEY.format(user_id=user_id)
+    payload = cache.get(key)
+    if payload is None:
+        data = build_latest_attendance_data(user_id)
+        body = json.dumps(data, sort_keys=True)
+        payload = {
+            'data': data,
+            'etag': hashlib.sha1(body.encode('utf-8')).hexdigest(),
+        }
+        cache.set(key, payload, LATEST_ATTENDANCE_TIMEOUT)
+    return payload
+
+
+def get_attendance_versions(user_ids):
+    # {user_id: version} in one cache round-trip; users whose entry was never dropped are left out
+    keys = {LATEST_ATTENDANCE_VERSION_KEY.format(user_id=user_id): user_id for user_id in user_ids}
+    return {keys[key]: version for key, version in cache.get_many(list(keys)).items()}
+
+
+def invalidate_attendance_cache(user_ids):
+    # user_ids are Django User pks; their version bumps wake those users' attendance streams in every process
+    cache.delete_many([LATEST_ATTENDANCE_KEY.format(user_id=user_id) for user_id in user_ids])
+    version = time.time_ns()
+    cache.set_many({LATEST_ATTENDANCE_VERSION_KEY.format(user_id=user_id): version for user_id in user_ids}, None)
@@ -0,0 +1,89 @@
+import csv
+
+from django.db.models import Case, F, FilteredRelation, OuterRef, Q, Subquery, Value, When
+
+from .models import AttendanceData, UserProfile
+
+# Latest attendance, goal and status of many users at once, for advisors looking at a whole
+# section. Every user is joined to their newest snapshot through a correlated subquery on the
+# (user, -timestamp) index, so a cohort is one query however long its history is. Large
+# cohorts are read in keyset batches of BATCH_SIZE profiles and streamed out, which keeps
+# memory flat and never holds a cursor open between batches.
+BATCH_SIZE = 1000
+MAX_PAGE_SIZE = 1000
+COHORT_FIELDS = ('username', 'date', 'timestamp', 'total_classes_conducted', 'classes_attended',
+                 'attendance_percentage', 'attendance_goal', 'attendance_status', 'can_skip', 'must_attend')
+
+
+def cohort_queryset(usernames=None, prefix=None):
+    # One row per UserProfile, ordered by its pk; users without a snapshot yet get NULLs and "N/A"
+    latest_pk = AttendanceData.objects.filter(user=OuterRef('pk')).order_by('-timestamp').values('pk')[:1]
+    profiles = UserProfile.objects.all()
+    if usernames:
+        profiles = profiles.filter(user__username__in=usernames)
+    if prefix:
+        profiles = profiles.filter(user__username__startswith=prefix) # ERP roll numbers start with the batch and branch
+    return (profiles
+            .annotate(latest=FilteredRelation('attendancedata', condition=Q(attendancedata__pk=Subquery(latest_pk))))
+            .annotate(attendance_status=Case(
+                When(latest__isnull=True, then=Value('N/A')),
+                When(latest__attendance_percentage__gte=F('attendance_goal'), then=Value('Above Target')),
+                default=Value('Below Target'),
+            ))
+            .order_by('pk')
+            .values('pk', 'user__username', 'attendance_goal', 'attendance_status',
+                    'latest__date', 'latest__timestamp', 'latest__total_classes_conducted',
+                    'latest__classes_attended', 'latest__attendance_percentage',
+                    'projection__can_skip', 'projection__must_attend'))
+
+
+def cohort_record(row):
+    percentage = row['latest__attendance_percentage']
+    return {
+        'username': row['user__username'],
+        'date': row['latest__date'].isoformat() if row['latest__date'] else None,
+        'timestamp': row['latest__timestamp'].strftime('%Y-%m-%d %H:%M:%S') if row['latest__timestamp'] else None,
+        'total_classes_conducted': row['latest__total_classes_conducted'],
+        'classes_attended': row['latest__classes_attended'],
+        'attendance_percentage': None if percentage is None else float(percentage),
+        'attendance_goal': float(row['attendance_goal']),
+        'attendance_status': row['attendance_status'],
+        'can_skip': row['projection__can_skip'],
+        'must_attend': row['projection__must_attend'],
+    }
+
+
+def cohort_page(queryset, page=1, page_size=100):
+    offset = (page - 1) * page_size
+    rows = list(queryset[offset:offset + page_size + 1]) # One row past the page tells whether there is a next one
+    return {
+        'page': page,
+        'page_size': page_size,
+        'has_next': len(rows) > page_size,
+        'results': [cohort_record(row) for row in rows[:page_size]],
+    }
+
+
+def iter_cohort(queryset, batch_size=BATCH_SIZE):
+    # Keyset batches on the profile pk: each batch is its own short query
+    last_pk = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        for row in rows:
+            yield cohort_record(row)
+        if len(rows) < batch_size:
+            return
+        last_pk = rows[-1]['pk']
+
+
+class Echo:
+    # File-like object for csv.writer that hands each line back instead of buffering it
+    def write(self, value):
+        return value
+
+
+def iter_cohort_csv(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow(COHORT_FIELDS)
+    for record in iter_cohort(queryset):
+        yield writer.writerow(['' if record[field] is None else record[field] for field in COHORT_FIELDS])
@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+from django.db.models import F, Value
+
+from .models import AttendanceData, AttendanceRollup
+from .projections import can_skip_expression, must_attend_expression
+
+# Attendance history as daily, weekly or monthly series. AttendanceData holds one cumulative
+# snapshot per user per day; a week or a month is represented by its last snapshot, which is
+# kept in AttendanceRollup as snapshots are saved. Every series is then one index range scan
+# (AttendanceData's (user, date) or AttendanceRollup's (user, period, period_start) unique
+# index) that stops after the requested page, with the projections computed in the query.
+PERIODS = ('daily', 'weekly', 'monthly')
+ROLLUP_PERIODS = ('weekly', 'monthly')
+MAX_PAGE_SIZE = 366
+SERIES_FIELDS = ('period_start', 'date', 'total_classes_conducted', 'classes_attended', 'attendance_percentage',
+                 'can_skip', 'must_attend')
+
+
+def period_start(period, day):
+    if period == 'weekly':
+        return day - timedelta(days=day.weekday())
+    if period == 'monthly':
+        return day.replace(day=1)
+    return day
+
+
+def next_period_start(period, day):
+    start = period_start(period, day)
+    if period == 'weekly':
+        return start + timedelta(days=7)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def rollup_rows(snapshots):
+    return [
+        AttendanceRollup(
+            user_id=snapshot.user_id,
+            period=period,
+            period_start=period_start(period, snapshot.date),
+            date=snapshot.date,
+            total_classes_conducted=snapshot.total_classes_conducted,
+            classes_attended=snapshot.classes_attended,
+            attendance_percentage=snapshot.attendance_percentage,
+        )
+        for snapshot in snapshots if snapshot.user_id is not None
+        for period in ROLLUP_PERIODS
+    ]
+
+
+def upsert_rollups(snapshots):
+    # For snapshots known to be the newest of their user (today's, from the scraper): they
+    # become the last snapshot of their week and month
+    AttendanceRollup.objects.bulk_create(
+        rollup_rows(snapshots),
+        update_conflicts=True,
+        unique_fields=['user', 'period', 'period_start'],
+        update_fields=['date', 'total_classes_conducted', 'classes_attended', 'attendance_percentage'],
+    )
+
+
+def rebuild_rollups(user_id, day):
+    # Re-derives the week and month containing `day` after any snapshot in them was saved or deleted
+    if user_id is None:
+        return
+    for period in ROLLUP_PERIODS:
+        start = period_start(period, day)
+        latest = (AttendanceData.objects
+                  .filter(user_id=user_id, date__gte=start, date__lt=next_period_start(period, day))
+                  .order_by('-date').first())
+        if latest is None:
+            AttendanceRollup.objects.filter(user_id=user_id, period=period, period_start=start).delete()
+        else:
+            AttendanceRollup.objects.update_or_create(
+                user_id=user_id, period=period, period_start=start,
+                defaults={
+                    'date': latest.date,
+                    'total_classes_conducted': latest.total_classes_conducted,
+                    'classes_attended': latest.classes_attended,
+                    'attendance_percentage': latest.attendance_percentage,
+                },
+            )
+
+
+def projection_annotations(goal):
+    # can_skip: classes that can be missed in a row while staying at or above the goal.
+    # must_attend: classes that have to be attended in a row to get back up to it.
+    goal = Value(float(goal))
+    return {
+        'can_skip': can_skip_expression('classes_attended', 'total_classes_conducted', goal),
+        'must_attend': must_attend_expression('classes_attended', 'total_classes_conducted', goal),
+    }
+
+
+def series_queryset(profile, period, since=None, until=None):
+    # Newest first
+    if period == 'daily':
+        rows = AttendanceData.objects.filter(user=profile).annotate(period_start=F('date'))
+        order = '-date'
+    else:
+        rows = AttendanceRollup.objects.filter(user=profile, period=period)
+        order = '-period_start'
+    if since:
+        rows = rows.filter(period_start__gte=period_start(period, since))
+    if until:
+        rows = rows.filter(period_start__lte=until)
+    return rows.annotate(**projection_annotations(profile.attendance_goal)).order_by(order).values(*SERIES_FIELDS)
+
+
+def attendance_series(profile, period='daily', page=1, page_size=30, since=None, until=None):
+    offset = (page - 1) * page_size
+    # One row past the page: it tells whether there is a next page and is the baseline for the
+    # last row's per-period counts
+    rows = list(series_queryset(profile, period, since, until)[offset:offset + page_size + 1])
+    results = []
+    for row, previous in zip(rows[:page_size], rows[1:page_size + 1] + [None]):
+        results.append({
+            'period_start': row['period_start'].isoformat(),
+            'date': row['date'].isoformat(),
+            'total_classes_conducted': row['total_classes_conducted'],
+            'classes_attended': row['classes_attended'],
+            'attendance_percentage': float(row['attendance_percentage']),
+            # Classes held and attended within the period
+            'classes_conducted_in_period': None if previous is None else row['total_classes_conducted'] - previous['total_classes_conducted'],
+            'classes_attended_in_period': None if previous is None else row['classes_attended'] - previous['classes_attended'],
+            'can_skip': None if row['can_skip'] is None else int(row['can_skip']),
+            'must_attend': None if row['must_attend'] is None else int(row['must_attend']),
+        })
+    return {
+        'username': profile.user.username,
+        'period': period,
+        'attendance_goal': float(profile.attendance_goal),
+        'page': page,
+        'page_size': page_size,
+        'has_next': len(rows) > page_size,
+        'results': results,
+    }
@@ -0,0 +1,158 @@
+import base64
+import logging
+import os
+import sys
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, F, Max
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from .models import ScrapeJob
+
+# Make the scraper package importable from the worker process
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+
+def credentials_digest(username, password):
+    # Lets the browser that submitted a job prove it sent the credentials the job ran with
+    return salted_hmac('attendance_dashboard.scrape_job', f"{username}\0{password}", algorithm='sha256').hexdigest()
+
+
+def _password_fernet():
+    # Keyed from SECRET_KEY, which is not in the database, so a copy of db.sqlite3 holds no passwords
+    from cryptography.fernet import Fernet
+    key = salted_hmac('attendance_dashboard.scrape_job.password', 'fernet', algorithm='sha256').digest()
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+def encrypt_password(password):
+    return _password_fernet().encrypt(password.encode()).decode()
+
+
+def decrypt_password(encrypted_password):
+    return _password_fernet().decrypt(encrypted_password.encode()).decode()
+
+
+def enqueue_scrape(username, password):
+    # Returns the user's already queued/running job instead of starting a second one. That job
+    # keeps the password it was queued with; the caller compares credentials_digest to tell
+    # whether this request sent the same credentials.
+    existing = ScrapeJob.objects.filter(username=username, status__in=ScrapeJob.ACTIVE_STATUSES).first()
+    if existing:
+        logging.info(f"Scrape already in flight for {username}: {existing}")
+        return existing, False
+
+    try:
+        with transaction.atomic():
+            job = ScrapeJob.objects.create(
+                username=username,
+                encrypted_password=encrypt_password(password),
+                credentials_digest=credentials_digest(username, password),
+                max_attempts=settings.SCRAPE_JOB_MAX_ATTEMPTS,
+            )
+    except IntegrityError:
+        # Lost a race with a concurrent request for the same user
+        return ScrapeJob.objects.get(username=username, status__in=ScrapeJob.ACTIVE_STATUSES), False
+    logging.info(f"Enqueued {job}")
+    return job, True
+
+
+def claim_next_job():
+    # Claims the oldest due job, respecting the global SCRAPE_JOB_CONCURRENCY limit
+    now = timezone.now()
+    with transaction.atomic():
+        if ScrapeJob.objects.filter(status=ScrapeJob.STATUS_RUNNING).count() >= settings.SCRAPE_JOB_CONCURRENCY:
+            return None
+        job = (ScrapeJob.objects.select_for_update()
+               .filter(status=ScrapeJob.STATUS_PENDING, run_after__lte=now)
+               .order_by('run_after', 'pk')
+               .first())
+        if job is None:
+            return None
+        claimed = ScrapeJob.objects.filter(pk=job.pk, status=ScrapeJob.STATUS_PENDING).update(
+            status=ScrapeJob.STATUS_RUNNING,
+            started_at=now,
+            attempts=job.attempts + 1,
+        )
+        if not claimed:
+            return None # Another worker got there first
+    job.refresh_from_db()
+    if job.queue_seconds is None:
+        job.queue_seconds = (now - job.created_at).total_seconds()
+        job.save(update_fields=['queue_seconds'])
+    return job
+
+
+def run_job(job):
+    import scraper # Imported lazily so the web process never loads Selenium
+
+    started = time.perf_counter()
+    try:
+        # Always into the database the dashboard reads, whatever config.json's "storage" says.
+        # A job's success signs its browser in (see views._sign_in_after_scrape), so it never
+        # rides on a saved session or cached client: the portal has to accept the job's password.
+        attendance = scraper.run_scrape(job.username, decrypt_password(job.encrypted_password),
+                                        storage=scraper.get_storage('orm'), fresh_login=True)
+        if attendance is None:
+            raise Exception("No attendance data could be extracted.")
+    except Exception as e:
+        _finish_failed(job, e, time.perf_counter() - started)
+    else:
+        job.status = ScrapeJob.STATUS_SUCCEEDED
+        job.attendance = attendance
+        job.encrypted_password = ''
+        job.error = ''
+        job.run_seconds = time.perf_counter() - started
+        job.finished_at = timezone.now()
+        job.save()
+        logging.info(f"{job} finished in {job.run_seconds:.1f}s")
+    return job
+
+
+def _finish_failed(job, error, run_seconds):
+    job.error = str(error)
+    job.run_seconds = run_seconds
+    if job.attempts < job.max_attempts:
+        # Exponential backoff: base, 2 * base, 4 * base, ...
+        delay = settings.SCRAPE_JOB_RETRY_BACKOFF * (2 ** (job.attempts - 1))
+        job.status = ScrapeJob.STATUS_PENDING
+        job.run_after = timezone.now() + timedelta(seconds=delay)
+        logging.warning(f"{job} attempt {job.attempts} failed: {error}. Retrying in {delay}s.")
+    else:
+        job.status = ScrapeJob.STATUS_FAILED
+        job.encrypted_password = ''
+        job.finished_at = timezone.now()
+        logging.error(f"{job} failed after {job.attempts} attempt(s): {error}")
+    job.save()
+
+
+def requeue_stale_jobs(stale_after):
+    # Jobs left running by a worker that died are handed back to the queue, or failed once
+    # they have used up their attempts. Returns (requeued, failed).
+    now = timezone.now()
+    stale = ScrapeJob.objects.filter(status=ScrapeJob.STATUS_RUNNING, started_at__lt=now - timedelta(seconds=stale_after))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=ScrapeJob.STATUS_FAILED,
+        encrypted_password='',
+        error=f"The worker running this job stopped responding for over {stale_after}s.",
+        finished_at=now,
+    )
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(status=ScrapeJob.STATUS_PENDING, run_after=now)
+    return requeued, failed
+
+
+def job_metrics():
+    counts = dict(ScrapeJob.objects.values_list('status').annotate(n=Count('pk')).order_by())
+    timings = ScrapeJob.objects.filter(status=ScrapeJob.STATUS_SUCCEEDED).aggregate(
+        avg_queue_seconds=Avg('queue_seconds'),
+        avg_run_seconds=Avg('run_seconds'),
+        max_run_seconds=Max('run_seconds'),
+    )
+    return {
+        'counts': {status: counts.get(status, 0) for status, _ in ScrapeJob.STATUS_CHOICES},
+        **timings,
+    }
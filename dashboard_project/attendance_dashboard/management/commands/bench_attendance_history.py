@@ -0,0 +1,94 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from attendance_dashboard.history import PERIODS, ROLLUP_PERIODS, period_start, series_queryset
+from attendance_dashboard.models import AttendanceData, AttendanceRollup, UserProfile
+
+
+class Command(BaseCommand):
+    help = ("Times the attendance history API against generated years of daily snapshots for many users. "
+            "Everything runs in a transaction that is rolled back, so the database is left as it was.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--days', type=int, default=730)
+        parser.add_argument('--requests', type=int, default=300, help="Requests per period.")
+
+    def generate(self, users, days):
+        rng = random.Random(0)
+        User.objects.bulk_create([User(username=f'history-bench-{i}') for i in range(users)])
+        profiles = list(UserProfile.objects.bulk_create(
+            [UserProfile(user=user) for user in User.objects.filter(username__startswith='history-bench-')]
+        ))
+        start = date.today() - timedelta(days=days - 1)
+        batch = []
+        rollups = {} # bulk_create skips the signal that maintains the rollups
+        for profile in profiles:
+            total = attended = 0
+            rate = rng.uniform(0.55, 0.95)
+            for day in range(days):
+                held = rng.randint(3, 7) if (start + timedelta(days=day)).weekday() < 5 else 0
+                total += held
+                attended += sum(rng.random() < rate for _ in range(held))
+                snapshot = AttendanceData(
+                    user=profile,
+                    date=start + timedelta(days=day),
+                    total_classes_conducted=total,
+                    classes_attended=attended,
+                    attendance_percentage=round(attended / total * 100, 2) if total else 0,
+                )
+                batch.append(snapshot)
+                for period in ROLLUP_PERIODS:
+                    rollups[(profile.pk, period, period_start(period, snapshot.date))] = snapshot
+                if len(batch) >= 5000:
+                    AttendanceData.objects.bulk_create(batch)
+                    batch = []
+        AttendanceData.objects.bulk_create(batch)
+        AttendanceRollup.objects.bulk_create([
+            AttendanceRollup(user=snapshot.user, period=period, period_start=first_day, date=snapshot.date,
+                             total_classes_conducted=snapshot.total_classes_conducted,
+                             classes_attended=snapshot.classes_attended,
+                             attendance_percentage=snapshot.attendance_percentage)
+            for (_, period, first_day), snapshot in rollups.items()
+        ], batch_size=5000)
+        return profiles
+
+    def handle(self, *args, **options):
+        client = Client(HTTP_HOST='localhost')
+        url = reverse('attendance_dashboard:attendance_history_api')
+        rng = random.Random(1)
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            profiles = self.generate(options['users'], options['days'])
+            self.stdout.write(f"Generated {options['users'] * options['days']} snapshots for {options['users']} users "
+                              f"in {time.perf_counter() - started:.1f}s.")
+
+            client.force_login(User.objects.create(username='history-bench-staff', is_staff=True)) # ?username= is staff-only
+
+            for period in ('daily', 'weekly'):
+                self.stdout.write(f"Query plan of the {period} series:")
+                self.stdout.write(series_queryset(profiles[0], period)[:31].explain())
+
+            for period in PERIODS:
+                timings = []
+                for _ in range(options['requests']):
+                    username = rng.choice(profiles).user.username
+                    page = rng.randint(1, 3)
+                    started = time.perf_counter()
+                    response = client.get(url, {'username': username, 'period': period, 'page': page})
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                self.stdout.write(f"{period:8s} p50 {statistics.median(timings):6.2f}ms  "
+                                  f"p95 {timings[int(len(timings) * 0.95) - 1]:6.2f}ms  "
+                                  f"(last status {response.status_code}, {len(response.json()['results'])} rows)")
+
+            transaction.set_rollback(True)
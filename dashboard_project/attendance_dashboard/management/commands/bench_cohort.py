@@ -0,0 +1,101 @@
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from attendance_dashboard.cache import attendance_status_of, latest_attendance_for
+from attendance_dashboard.cohort import cohort_queryset
+from attendance_dashboard.models import AttendanceData, UserProfile
+
+
+class Command(BaseCommand):
+    help = ("Times the cohort attendance API (JSON page, NDJSON and CSV streams) against the per-user "
+            "lookup loop it replaces, with query counts and peak Python memory. Runs in a transaction "
+            "that is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument('--days', type=int, default=90)
+
+    def generate(self, users, days):
+        rng = random.Random(0)
+        User.objects.bulk_create([User(username=f'cohort-bench-{i:05d}') for i in range(users)])
+        profiles = UserProfile.objects.bulk_create(
+            [UserProfile(user=user) for user in User.objects.filter(username__startswith='cohort-bench-')]
+        )
+        first_day = date.today() - timedelta(days=days - 1)
+        batch = []
+        for day in range(days):
+            for profile in profiles[:users - users // 20]: # Leave some users without a snapshot yet
+                total = (day + 1) * 5
+                attended = min(total, int(total * rng.uniform(0.55, 0.95)))
+                batch.append(AttendanceData(user=profile, date=first_day + timedelta(days=day),
+                                            total_classes_conducted=total, classes_attended=attended,
+                                            attendance_percentage=round(attended / total * 100, 2)))
+                if len(batch) >= 5000:
+                    AttendanceData.objects.bulk_create(batch)
+                    batch = []
+        AttendanceData.objects.bulk_create(batch)
+        return profiles
+
+    def measure(self, label, fetch):
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            count, size = fetch()
+            elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.stdout.write(f"{label:28s} {elapsed * 1000:9.1f}ms  {len(queries):6d} queries  "
+                          f"{count:6d} users  {size / 1024:8.0f} KiB out  peak {peak / 1024:7.0f} KiB")
+
+    def handle(self, *args, **options):
+        url = reverse('attendance_dashboard:cohort_attendance_api')
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            profiles = self.generate(options['users'], options['days'])
+            self.stdout.write(f"Generated {AttendanceData.objects.count()} snapshots for {len(profiles)} users "
+                              f"in {time.perf_counter() - started:.1f}s.")
+            client = Client(HTTP_HOST='localhost')
+            client.force_login(User.objects.create(username='cohort-bench-staff', is_staff=True))
+
+            self.stdout.write("Query plan of one cohort batch:")
+            self.stdout.write(cohort_queryset().filter(pk__gt=0)[:1000].explain())
+
+            def per_user_loop():
+                # What a cohort view costs built from the single-user lookup
+                rows = []
+                for profile in UserProfile.objects.select_related('user').filter(user__username__startswith='cohort-bench-'):
+                    latest = latest_attendance_for(profile.user_id)
+                    rows.append((profile.user.username, latest and latest.attendance_percentage,
+                                 attendance_status_of(latest, profile)))
+                return len(rows), 0
+
+            def json_page():
+                response = client.get(url, {'prefix': 'cohort-bench-', 'page_size': 1000})
+                return len(response.json()['results']), len(response.content)
+
+            def stream(output):
+                def fetch():
+                    response = client.get(url, {'prefix': 'cohort-bench-', 'format': output})
+                    count = size = 0
+                    for chunk in response.streaming_content:
+                        count += chunk.count(b'\n')
+                        size += len(chunk)
+                    return count - (output == 'csv'), size # Minus the CSV header line
+                return fetch
+
+            self.measure("per-user lookups", per_user_loop)
+            self.measure("cohort JSON page of 1000", json_page)
+            self.measure("cohort NDJSON stream", stream('ndjson'))
+            self.measure("cohort CSV stream", stream('csv'))
+
+            transaction.set_rollback(True)
@@ -0,0 +1,87 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from attendance_dashboard.cache import invalidate_attendance_cache
+from attendance_dashboard.models import AttendanceData, UserProfile
+
+
+class Command(BaseCommand):
+    help = ("Shows that per-user dashboard latency stays flat as AttendanceData grows: generates daily "
+            "snapshots for many users in steps and times the dashboard and the uncached latest-attendance "
+            "API for a sample of them after each step. Runs in a transaction that is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--steps', type=int, default=4, help="Measure after this many equal batches of days.")
+        parser.add_argument('--sample', type=int, default=100, help="Users timed after each step.")
+
+    def add_days(self, profiles, first_day, days, rng):
+        batch = []
+        for day in range(days): # Day by day across all users, so timestamps grow with the date
+            for profile in profiles:
+                total = profile.bench_total = profile.bench_total + rng.randint(3, 7)
+                attended = profile.bench_attended = profile.bench_attended + rng.randint(2, 5)
+                batch.append(AttendanceData(
+                    user=profile,
+                    date=first_day + timedelta(days=day),
+                    total_classes_conducted=total,
+                    classes_attended=min(attended, total),
+                    attendance_percentage=round(min(attended, total) / total * 100, 2),
+                ))
+                if len(batch) >= 5000:
+                    AttendanceData.objects.bulk_create(batch)
+                    batch = []
+        AttendanceData.objects.bulk_create(batch)
+
+    def time_requests(self, clients, url):
+        timings = []
+        for user, client in clients:
+            invalidate_attendance_cache([user.pk])
+            started = time.perf_counter()
+            client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return timings[len(timings) // 2], timings[int(len(timings) * 0.95) - 1]
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        days_per_step = max(1, options['days'] // options['steps'])
+        index_url = reverse('attendance_dashboard:index')
+        api_url = reverse('attendance_dashboard:latest_attendance_api')
+
+        with transaction.atomic():
+            User.objects.bulk_create([User(username=f'dashboard-bench-{i}') for i in range(options['users'])])
+            users = list(User.objects.filter(username__startswith='dashboard-bench-'))
+            profiles = UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+            for profile in profiles:
+                profile.bench_total = profile.bench_attended = 0
+            clients = []
+            for user in rng.sample(users, min(options['sample'], len(users))):
+                client = Client(HTTP_HOST='localhost')
+                client.force_login(user)
+                clients.append((user, client))
+
+            self.stdout.write("Query plan of the per-user lookup (cache.latest_attendance_for):")
+            self.stdout.write(AttendanceData.objects.select_related('user').filter(user__user_id=users[0].pk)
+                              .order_by('-timestamp')[:1].explain())
+
+            first_day = date.today() - timedelta(days=days_per_step * options['steps'])
+            for step in range(options['steps']):
+                started = time.perf_counter()
+                self.add_days(profiles, first_day + timedelta(days=step * days_per_step), days_per_step, rng)
+                rows = AttendanceData.objects.count()
+                index_p50, index_p95 = self.time_requests(clients, index_url)
+                api_p50, api_p95 = self.time_requests(clients, api_url)
+                self.stdout.write(f"{rows:>9} rows (+{time.perf_counter() - started:5.1f}s)  "
+                                  f"dashboard p50 {index_p50:6.2f}ms p95 {index_p95:6.2f}ms  "
+                                  f"latest API p50 {api_p50:6.2f}ms p95 {api_p95:6.2f}ms")
+
+            transaction.set_rollback(True)
@@ -0,0 +1,55 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from attendance_dashboard.cache import invalidate_attendance_cache
+from attendance_dashboard.models import AttendanceData
+
+
+class Command(BaseCommand):
+    help = "Load-tests the latest-attendance API: uncached, cached, and conditional (304) requests per second."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--username', help="Dashboard user to poll as; defaults to whoever was scraped last.")
+
+    def handle(self, *args, **options):
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+        else:
+            latest = AttendanceData.objects.select_related('user__user').order_by('-timestamp').first()
+            user = latest.user.user if latest and latest.user else None
+        if user is None:
+            raise CommandError("No user to poll as. Scrape an account first or pass --username.")
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        url = reverse('attendance_dashboard:latest_attendance_api')
+        count = options['requests']
+
+        def uncached():
+            invalidate_attendance_cache([user.pk]) # Forces the DB query every poll used to make
+            return client.get(url)
+
+        def cached():
+            return client.get(url)
+
+        etag = client.get(url)['ETag']
+        def conditional():
+            return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        results = {}
+        for name, request in (('uncached', uncached), ('cached', cached), ('conditional', conditional)):
+            request() # Warm up
+            started = time.perf_counter()
+            for _ in range(count):
+                response = request()
+            elapsed = time.perf_counter() - started
+            results[name] = count / elapsed
+            self.stdout.write(f"{name:12s} {results[name]:9.1f} req/s  (last status {response.status_code})")
+
+        self.stdout.write(f"Cached is {results['cached'] / results['uncached']:.1f}x and conditional is "
+                          f"{results['conditional'] / results['uncached']:.1f}x the uncached rate.")
+        invalidate_attendance_cache([user.pk])
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from attendance_dashboard.metrics import prune_traces
+
+
+class Command(BaseCommand):
+    help = ("Deletes traced scrape runs and their spans older than METRICS_TRACE_RETENTION_DAYS. Saving a trace "
+            "already does this; the /metrics totals are kept either way.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=settings.METRICS_TRACE_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        runs, spans = prune_traces(options['days'])
+        self.stdout.write(f"Deleted {runs} run(s) and {spans} span(s) older than {options['days']:g} day(s).")
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from attendance_dashboard.projections import refresh_projections
+
+
+class Command(BaseCommand):
+    help = ("Recomputes the stored attendance projections of every user (or the given usernames), "
+            "e.g. after deploying or changing the formulas. Scrapes and goal changes keep them current otherwise.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*')
+
+    def handle(self, *args, **options):
+        profile_ids = None
+        if options['usernames']:
+            from attendance_dashboard.models import UserProfile
+
+            profile_ids = list(UserProfile.objects.filter(user__username__in=options['usernames']).values_list('pk', flat=True))
+        started = time.perf_counter()
+        projections = refresh_projections(profile_ids)
+        self.stdout.write(f"Refreshed {len(projections)} projection(s) in {time.perf_counter() - started:.2f}s.")
@@ -0,0 +1,73 @@
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance_dashboard.scheduler import (
+    claim_due_schedules, ensure_schedules, in_quiet_hours, record_result, refresh_user,
+)
+
+
+def parse_quiet_hours(value):
+    if value.lower() == 'none':
+        return ()
+    try:
+        start, end = (int(part) for part in value.split('-'))
+    except ValueError:
+        raise CommandError("--quiet-hours must look like 1-6 or 'none'.")
+    return (start, end)
+
+
+class Command(BaseCommand):
+    help = "Refreshes every scheduled user's attendance on its own adaptive interval."
+
+    def add_arguments(self, parser):
+        parser.add_argument('credentials_file', help="JSON list of {\"username\", \"password\"} objects.")
+        parser.add_argument('--concurrency', type=int, default=settings.REFRESH_CONCURRENCY)
+        parser.add_argument('--poll-interval', type=float, default=15.0, help="Seconds between checks for due users.")
+        parser.add_argument('--quiet-hours', type=parse_quiet_hours, default=None,
+                            help="Hours in REFRESH_TIMEZONE with no refreshes, e.g. 1-6, or 'none'. Defaults to REFRESH_QUIET_HOURS.")
+        parser.add_argument('--once', action='store_true', help="Run the users that are due now and exit.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['credentials_file'], 'r') as f:
+                passwords = {account['username']: account['password'] for account in json.load(f)}
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Could not read credentials: {e}")
+
+        created = ensure_schedules(passwords)
+        if created:
+            logging.info(f"Created {created} refresh schedule(s).")
+
+        concurrency = options['concurrency']
+        running = {} # future -> schedule
+        self.stdout.write(f"Refresh scheduler started for {len(passwords)} user(s), concurrency {concurrency}.")
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            try:
+                while True:
+                    if not in_quiet_hours(quiet_hours=options['quiet_hours']):
+                        due = claim_due_schedules(passwords, concurrency - len(running),
+                                                  exclude=[schedule.pk for schedule in running.values()])
+                        for schedule in due:
+                            username = schedule.user.user.username
+                            logging.info(f"Refreshing {username}...")
+                            running[executor.submit(refresh_user, username, passwords[username])] = schedule
+
+                    if options['once'] and not running:
+                        break
+                    if running:
+                        done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                        for future in done:
+                            duration, error = future.result()
+                            schedule = record_result(running.pop(future), duration, error)
+                            logging.info(f"{schedule.user.user.username} refreshed in {duration:.1f}s; "
+                                         f"next run at {schedule.next_run_at:%Y-%m-%d %H:%M} (backoff x{schedule.backoff:g})")
+                    else:
+                        time.sleep(options['poll_interval'])
+            except KeyboardInterrupt:
+                pass
+        self.stdout.write("Refresh scheduler stopped.")
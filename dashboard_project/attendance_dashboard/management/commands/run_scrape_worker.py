@@ -0,0 +1,42 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from attendance_dashboard.jobs import claim_next_job, job_metrics, requeue_stale_jobs, run_job
+
+REQUEUE_CHECK_INTERVAL = 60 # Seconds between checks for jobs orphaned by another worker
+
+
+class Command(BaseCommand):
+    help = "Runs queued ERP scrape jobs. Start several workers to scrape in parallel; SCRAPE_JOB_CONCURRENCY caps the total."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to sleep when no job is due.")
+        parser.add_argument('--stale-after', type=int, default=settings.SCRAPE_JOB_STALE_AFTER,
+                            help="Requeue jobs running for longer than this many seconds, or fail them once out of attempts.")
+        parser.add_argument('--once', action='store_true', help="Process due jobs and exit when the queue is empty.")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Scrape worker started.")
+        next_requeue_check = 0.0
+        try:
+            while True:
+                if time.monotonic() >= next_requeue_check:
+                    # Other workers can die while this one keeps running, so this is repeated
+                    requeued, failed = requeue_stale_jobs(options['stale_after'])
+                    if requeued or failed:
+                        logging.warning(f"Requeued {requeued} and failed {failed} stale scrape job(s).")
+                    next_requeue_check = time.monotonic() + REQUEUE_CHECK_INTERVAL
+                job = claim_next_job()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                run_job(job)
+                logging.info(f"Scrape job metrics: {job_metrics()}")
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write("Scrape worker stopped.")
@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .jobs import job_metrics
+from .models import ScrapeRun, ScrapeSpan, ScrapeTotal
+
+# Prometheus text exposition (format 0.0.4) of the traced scrape runs stored by the scraper.
+# Every saved trace is added to running totals in ScrapeTotal, one row per run status and per
+# span name, so /metrics reads a handful of rows however many runs there have been, and every
+# web process reports the same numbers no matter which process ran the scrape. The ScrapeRun
+# and ScrapeSpan rows themselves are kept for METRICS_TRACE_RETENTION_DAYS for debugging.
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _observe(total, duration, buckets):
+    total.count += 1
+    total.duration_sum += duration
+    for bound in buckets:
+        if duration <= bound:
+            total.buckets[f'{bound:g}'] = total.buckets.get(f'{bound:g}', 0) + 1
+
+
+def add_trace_totals(status, duration, spans):
+    # Adds one run and its spans (ScrapeSpan instances) to the totals. The rows are locked for
+    # the update, so concurrent workers don't lose each other's counts.
+    buckets = settings.METRICS_LATENCY_BUCKETS
+    keys = {(ScrapeTotal.SERIES_RUN, status)} | {(ScrapeTotal.SERIES_STAGE, span.name) for span in spans}
+    matching = Q()
+    for series, name in keys:
+        matching |= Q(series=series, name=name)
+    with transaction.atomic():
+        ScrapeTotal.objects.bulk_create([ScrapeTotal(series=series, name=name) for series, name in keys],
+                                        ignore_conflicts=True)
+        totals = {(total.series, total.name): total for total in ScrapeTotal.objects.select_for_update().filter(matching)}
+        _observe(totals[(ScrapeTotal.SERIES_RUN, status)], duration, buckets)
+        for span in spans:
+            total = totals[(ScrapeTotal.SERIES_STAGE, span.name)]
+            _observe(total, span.duration_seconds, buckets)
+            total.errors += span.status == 'error'
+            total.timeouts += span.timeouts
+            total.retries += span.retries
+        ScrapeTotal.objects.bulk_update(totals.values(), ['count', 'duration_sum', 'buckets', 'errors', 'timeouts', 'retries'])
+
+
+def prune_traces(days=None):
+    # Deletes the runs (and their spans) older than METRICS_TRACE_RETENTION_DAYS; the totals stay
+    days = settings.METRICS_TRACE_RETENTION_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    spans, _ = ScrapeSpan.objects.filter(run__started_at__lt=cutoff).delete()
+    runs, _ = ScrapeRun.objects.filter(started_at__lt=cutoff).delete()
+    return runs, spans
+
+
+def _combined(totals):
+    # One histogram row out of several totals, e.g. every run status
+    row = {'count': 0, 'duration_sum': 0.0, 'buckets': {}}
+    for total in totals:
+        row['count'] += total.count
+        row['duration_sum'] += total.duration_sum
+        for bound, count in total.buckets.items():
+            row['buckets'][bound] = row['buckets'].get(bound, 0) + count
+    return row
+
+
+def _histogram_lines(name, row, buckets, labels=None):
+    labels = labels or {}
+    lines = []
+    for bound in buckets:
+        lines.append(f'{name}_bucket{_labels({**labels, "le": f"{bound:g}"})} {row["buckets"].get(f"{bound:g}", 0)}')
+    lines.append(f'{name}_bucket{_labels({**labels, "le": "+Inf"})} {row["count"]}')
+    lines.append(f'{name}_sum{_labels(labels)} {row["duration_sum"]}')
+    lines.append(f'{name}_count{_labels(labels)} {row["count"]}')
+    return lines
+
+
+def render_metrics():
+    buckets = settings.METRICS_LATENCY_BUCKETS
+    lines = []
+
+    totals = list(ScrapeTotal.objects.order_by('series', 'name'))
+    runs = {total.name: total for total in totals if total.series == ScrapeTotal.SERIES_RUN}
+    stages = [total for total in totals if total.series == ScrapeTotal.SERIES_STAGE]
+
+    lines.append('# HELP scraper_runs_total Traced scrape runs by outcome.')
+    lines.append('# TYPE scraper_runs_total counter')
+    for status, _ in ScrapeRun.STATUS_CHOICES:
+        lines.append(f'scraper_runs_total{_labels({"status": status})} {runs[status].count if status in runs else 0}')
+
+    lines.append('# HELP scraper_run_duration_seconds Duration of whole scrape runs.')
+    lines.append('# TYPE scraper_run_duration_seconds histogram')
+    lines.extend(_histogram_lines('scraper_run_duration_seconds', _combined(runs.values()), buckets))
+
+    lines.append('# HELP scraper_stage_duration_seconds Duration of each scrape stage or subject card span.')
+    lines.append('# TYPE scraper_stage_duration_seconds histogram')
+    for stage in stages:
+        lines.extend(_histogram_lines('scraper_stage_duration_seconds', _combined([stage]), buckets, {'stage': stage.name}))
+
+    for metric, key, help_text in (
+        ('scraper_stage_errors_total', 'errors', 'Spans that ended with an exception.'),
+        ('scraper_stage_timeouts_total', 'timeouts', 'Waits that timed out inside a span.'),
+        ('scraper_stage_retries_total', 'retries', 'Retried requests or logins inside a span.'),
+    ):
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} counter')
+        for stage in stages:
+            lines.append(f'{metric}{_labels({"stage": stage.name})} {getattr(stage, key)}')
+
+    lines.append('# HELP scrape_jobs Scrape jobs in the queue by status.')
+    lines.append('# TYPE scrape_jobs gauge')
+    for status, count in job_metrics()['counts'].items():
+        lines.append(f'scrape_jobs{_labels({"status": status})} {count}')
+
+    return '\n'.join(lines) + '\n'
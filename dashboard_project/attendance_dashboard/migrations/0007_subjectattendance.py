@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:32
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_dashboard', '0006_scrapejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=200)),
+                ('date', models.DateField(default=datetime.date.today)),
+                ('attended', models.IntegerField(default=0)),
+                ('total', models.IntegerField(default=0)),
+                ('attendance_percentage', models.DecimalField(decimal_places=2, default=0.0, max_digits=5)),
+                ('multiplier', models.PositiveSmallIntegerField(default=1)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_attendance', to='attendance_dashboard.userprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'date'], name='attendance__user_id_3bd6c4_idx'), models.Index(fields=['user', 'subject'], name='attendance__user_id_4fcdce_idx')],
+                'unique_together': {('user', 'subject', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_dashboard', '0007_subjectattendance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=200)),
+                ('digest', models.CharField(max_length=40)),
+                ('date', models.DateField()),
+                ('attended', models.IntegerField(default=0)),
+                ('total', models.IntegerField(default=0)),
+                ('attendance_percentage', models.DecimalField(decimal_places=2, default=0.0, max_digits=5)),
+                ('multiplier', models.PositiveSmallIntegerField(default=1)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_fingerprints', to='attendance_dashboard.userprofile')),
+            ],
+            options={
+                'unique_together': {('user', 'subject')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_dashboard', '0008_subjectfingerprint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendancedata',
+            name='timestamp',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_dashboard', '0009_attendancedata_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RefreshSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enabled', models.BooleanField(default=True)),
+                ('interval_minutes', models.PositiveIntegerField(default=180)),
+                ('backoff', models.FloatField(default=1.0)),
+                ('next_run_at', models.DateTimeField(db_index=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_duration_seconds', models.FloatField(blank=True, null=True)),
+                ('consecutive_failures', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='refresh_schedule', to='attendance_dashboard.userprofile')),
+            ],
+        ),
+    ]
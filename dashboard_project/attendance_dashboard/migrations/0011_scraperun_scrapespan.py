@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_dashboard', '0010_refreshschedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapeRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(db_index=True, max_length=100)),
+                ('backend', models.CharField(max_length=20)),
+                ('status', models.CharField(choices=[('succeeded', 'Succeeded'), ('empty', 'Empty'), ('failed', 'Failed')], max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(db_index=True)),
+                ('duration_seconds', models.FloatField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScrapeSpan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('parent', models.CharField(blank=True, max_length=50)),
+                ('subject', models.CharField(blank=True, max_length=200)),
+                ('offset_seconds', models.FloatField()),
+                ('duration_seconds', models.FloatField()),
+                ('status', models.CharField(default='ok', max_length=10)),
+                ('timeouts', models.PositiveIntegerField(default=0)),
+                ('retries', models.PositiveIntegerField(default=0)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spans', to='attendance_dashboard.scraperun')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name', 'duration_seconds'], name='attendance__name_539564_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:55
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    # One pass over the existing snapshots, oldest first, keeping the last one of each period
+    AttendanceData = apps.get_model('attendance_dashboard', 'AttendanceData')
+    AttendanceRollup = apps.get_model('attendance_dashboard', 'AttendanceRollup')
+    latest = {}
+    snapshots = (AttendanceData.objects.filter(user__isnull=False).order_by('user', 'date')
+                 .values_list('user_id', 'date', 'total_classes_conducted', 'classes_attended', 'attendance_percentage'))
+    for user_id, day, total, attended, percentage in snapshots.iterator(chunk_size=5000):
+        for period, start in (('weekly', day - timedelta(days=day.weekday())), ('monthly', day.replace(day=1))):
+            latest[(user_id, period, start)] = (day, total, attended, percentage)
+    AttendanceRollup.objects.bulk_create([
+        AttendanceRollup(user_id=user_id, period=period, period_start=start, date=day,
+                         total_classes_conducted=total, classes_attended=attended, attendance_percentage=percentage)
+        for (user_id, period, start), (day, total, attended, percentage) in latest.items()
+    ], batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_dashboard', '0011_scraperun_scrapespan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('weekly', 'Weekly'), ('monthly', 'Monthly')], max_length=7)),
+                ('period_start', models.DateField()),
+                ('date', models.DateField()),
+                ('total_classes_conducted', models.IntegerField(default=0)),
+                ('classes_attended', models.IntegerField(default=0)),
+                ('attendance_percentage', models.DecimalField(decimal_places=2, default=0.0, max_digits=5)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='attendance_dashboard.userprofile')),
+            ],
+            options={
+                'unique_together': {('user', 'period', 'period_start')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
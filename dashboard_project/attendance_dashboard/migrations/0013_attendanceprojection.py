@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_dashboard', '0012_attendancerollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceProjection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('attendance_goal', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('classes_attended', models.IntegerField(default=0)),
+                ('total_classes_conducted', models.IntegerField(default=0)),
+                ('attendance_percentage', models.DecimalField(decimal_places=2, default=0.0, max_digits=5)),
+                ('can_skip', models.IntegerField(blank=True, null=True)),
+                ('must_attend', models.IntegerField(blank=True, null=True)),
+                ('subjects', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='projection', to='attendance_dashboard.userprofile')),
+            ],
+        ),
+    ]
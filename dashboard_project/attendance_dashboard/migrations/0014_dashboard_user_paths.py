@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_dashboard', '0013_attendanceprojection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapejob',
+            name='credentials_digest',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='attendancedata',
+            index=models.Index(fields=['user', '-timestamp'], name='attendance_user_latest_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:24
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_totals(apps, schema_editor):
+    # Starts the totals from the runs and spans traced so far, aggregated in the database
+    ScrapeRun = apps.get_model('attendance_dashboard', 'ScrapeRun')
+    ScrapeSpan = apps.get_model('attendance_dashboard', 'ScrapeSpan')
+    ScrapeTotal = apps.get_model('attendance_dashboard', 'ScrapeTotal')
+    buckets = settings.METRICS_LATENCY_BUCKETS
+    aggregates = {f'le_{i}': Count('pk', filter=Q(duration_seconds__lte=bound)) for i, bound in enumerate(buckets)}
+    aggregates.update(n=Count('pk'), duration=Sum('duration_seconds'))
+
+    def total(series, row, **counters):
+        return ScrapeTotal(series=series, count=row['n'], duration_sum=row['duration'] or 0.0,
+                           buckets={f'{bound:g}': row[f'le_{i}'] for i, bound in enumerate(buckets)}, **counters)
+
+    totals = [total('run', row, name=row['status'])
+              for row in ScrapeRun.objects.values('status').annotate(**aggregates).order_by()]
+    totals += [total('stage', row, name=row['name'], errors=row['errors'], timeouts=row['timeouts_sum'] or 0,
+                     retries=row['retries_sum'] or 0)
+               for row in ScrapeSpan.objects.values('name').annotate(
+                   **aggregates, errors=Count('pk', filter=Q(status='error')),
+                   timeouts_sum=Sum('timeouts'), retries_sum=Sum('retries')).order_by()]
+    ScrapeTotal.objects.bulk_create(totals)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_dashboard', '0014_dashboard_user_paths'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapeTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series', models.CharField(choices=[('run', 'Run'), ('stage', 'Stage')], max_length=5)),
+                ('name', models.CharField(max_length=50)),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('duration_sum', models.FloatField(default=0.0)),
+                ('buckets', models.JSONField(default=dict)),
+                ('errors', models.PositiveBigIntegerField(default=0)),
+                ('timeouts', models.PositiveBigIntegerField(default=0)),
+                ('retries', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('series', 'name')},
+            },
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:05
+
+from django.db import migrations, models
+
+
+def encrypt_passwords(apps, schema_editor):
+    # Jobs still waiting to run keep their credentials, now encrypted
+    from attendance_dashboard.jobs import encrypt_password
+
+    ScrapeJob = apps.get_model('attendance_dashboard', 'ScrapeJob')
+    jobs = list(ScrapeJob.objects.exclude(password=''))
+    for job in jobs:
+        job.encrypted_password = encrypt_password(job.password)
+    ScrapeJob.objects.bulk_update(jobs, ['encrypted_password'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_dashboard', '0015_scrapetotal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapejob',
+            name='encrypted_password',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(encrypt_passwords, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='scrapejob',
+            name='password',
+        ),
+    ]
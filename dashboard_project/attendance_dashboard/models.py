@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from datetime import date
 
 # Create your models here.
@@ -16,11 +17,215 @@ class AttendanceData(models.Model):
     total_classes_conducted = models.IntegerField(default=0)
     classes_attended = models.IntegerField(default=0)
     attendance_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
     date = models.DateField(default=date.today)  # Add a date field to track daily attendance
 
     class Meta:
         unique_together = ('user', 'date')  # Ensure only one attendance record per user per day
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='attendance_user_latest_idx'), # Each dashboard's latest row
+        ]
 
     def __str__(self):
         return f"Attendance for {self.user.user.username if self.user else 'Unknown User'} on {self.date}"
+
+class AttendanceRollup(models.Model):
+    # Last AttendanceData snapshot of each week and month per user, kept current by history.py
+    PERIOD_CHOICES = [
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+    ]
+
+    user = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='attendance_rollups')
+    period = models.CharField(max_length=7, choices=PERIOD_CHOICES)
+    period_start = models.DateField() # Monday of the week, or the first of the month
+    date = models.DateField() # Day of the snapshot
+    total_classes_conducted = models.IntegerField(default=0)
+    classes_attended = models.IntegerField(default=0)
+    attendance_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
+
+    class Meta:
+        unique_together = ('user', 'period', 'period_start') # Also the index the series are read through
+
+    def __str__(self):
+        return f"{self.get_period_display()} attendance for {self.user.user.username} from {self.period_start}"
+
+class SubjectAttendance(models.Model):
+    user = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='subject_attendance')
+    subject = models.CharField(max_length=200)
+    date = models.DateField(default=date.today)
+    attended = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+    attendance_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
+    multiplier = models.PositiveSmallIntegerField(default=1) # Weight of the subject in AttendanceData totals
+
+    class Meta:
+        unique_together = ('user', 'subject', 'date')  # One row per subject per user per day
+        indexes = [
+            models.Index(fields=['user', 'date']),
+            models.Index(fields=['user', 'subject']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} attendance for {self.user.user.username} on {self.date}"
+
+class SubjectFingerprint(models.Model):
+    # Last seen state of each subject card, used to skip re-parsing and re-writing unchanged subjects
+    user = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='subject_fingerprints')
+    subject = models.CharField(max_length=200)
+    digest = models.CharField(max_length=40) # SHA-1 of the card's raw attendance snippet
+    date = models.DateField() # Day the matching SubjectAttendance row was last written
+    attended = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+    attendance_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
+    multiplier = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        unique_together = ('user', 'subject')
+
+    def __str__(self):
+        return f"Fingerprint of {self.subject} for {self.user.user.username}"
+
+class AttendanceProjection(models.Model):
+    # Classes a user can miss or must attend to meet their goal, from their latest subject
+    # numbers; recomputed by projections.py when a scrape lands or the goal changes
+    user = models.OneToOneField(UserProfile, on_delete=models.CASCADE, related_name='projection')
+    date = models.DateField() # Day of the scrape the projection is based on
+    attendance_goal = models.DecimalField(max_digits=5, decimal_places=2)
+    classes_attended = models.IntegerField(default=0) # Weighted by the lab multipliers, as in AttendanceData
+    total_classes_conducted = models.IntegerField(default=0)
+    attendance_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
+    can_skip = models.IntegerField(null=True, blank=True) # None when the goal is 0%
+    must_attend = models.IntegerField(null=True, blank=True) # None when the goal is 100%
+    subjects = models.JSONField(default=list) # Per-subject projections, see projections.build_projections()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Attendance projection for {self.user.user.username} on {self.date}"
+
+class RefreshSchedule(models.Model):
+    user = models.OneToOneField(UserProfile, on_delete=models.CASCADE, related_name='refresh_schedule')
+    enabled = models.BooleanField(default=True)
+    interval_minutes = models.PositiveIntegerField(default=180)
+    backoff = models.FloatField(default=1.0) # Multiplier on interval_minutes, raised while the portal is slow or failing
+    next_run_at = models.DateTimeField(db_index=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_duration_seconds = models.FloatField(null=True, blank=True)
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"Refresh schedule for {self.user.user.username} (next {self.next_run_at})"
+
+class ScrapeJob(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
+    username = models.CharField(max_length=100)
+    encrypted_password = models.TextField(blank=True) # See jobs.encrypt_password; cleared as soon as the job can no longer be retried
+    credentials_digest = models.CharField(max_length=64, blank=True) # HMAC of the credentials, kept after the password is cleared
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    error = models.TextField(blank=True)
+    attendance = models.ForeignKey(AttendanceData, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    run_after = models.DateTimeField(default=timezone.now) # Pushed back when a failed attempt is retried
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    queue_seconds = models.FloatField(null=True, blank=True) # Time from enqueue to the first attempt starting
+    run_seconds = models.FloatField(null=True, blank=True)   # Duration of the last attempt
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+        constraints = [
+            # At most one queued or running job per ERP user
+            models.UniqueConstraint(
+                fields=['username'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='unique_active_scrape_job_per_user',
+            ),
+        ]
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    def __str__(self):
+        return f"Scrape job {self.pk} for {self.username} ({self.status})"
+
+class ScrapeRun(models.Model):
+    # One traced scrape (see scraper/tracing.py); its stages and subject cards are ScrapeSpans
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_EMPTY = 'empty'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_EMPTY, 'Empty'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    username = models.CharField(max_length=100, db_index=True)
+    backend = models.CharField(max_length=20)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(db_index=True)
+    duration_seconds = models.FloatField()
+
+    def __str__(self):
+        return f"Scrape run {self.pk} for {self.username} ({self.status}, {self.duration_seconds:.1f}s)"
+
+class ScrapeSpan(models.Model):
+    run = models.ForeignKey(ScrapeRun, on_delete=models.CASCADE, related_name='spans')
+    name = models.CharField(max_length=50) # Stage, e.g. "login", "navigate" or "subject_card"
+    parent = models.CharField(max_length=50, blank=True)
+    subject = models.CharField(max_length=200, blank=True)
+    offset_seconds = models.FloatField() # From the start of the run
+    duration_seconds = models.FloatField()
+    status = models.CharField(max_length=10, default='ok')
+    timeouts = models.PositiveIntegerField(default=0) # Waits that timed out inside this span
+    retries = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name', 'duration_seconds']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} span of run {self.run_id} ({self.duration_seconds:.2f}s)"
+
+class ScrapeTotal(models.Model):
+    # Running totals behind /metrics, added to as each trace is saved (see metrics.add_trace_totals),
+    # so they keep counting after old ScrapeRuns and ScrapeSpans are pruned
+    SERIES_RUN = 'run'
+    SERIES_STAGE = 'stage'
+    SERIES_CHOICES = [
+        (SERIES_RUN, 'Run'),
+        (SERIES_STAGE, 'Stage'),
+    ]
+
+    series = models.CharField(max_length=5, choices=SERIES_CHOICES)
+    name = models.CharField(max_length=50) # Run status, or span name
+    count = models.PositiveBigIntegerField(default=0)
+    duration_sum = models.FloatField(default=0.0)
+    buckets = models.JSONField(default=dict) # {"<bound>": observations at most that long} for METRICS_LATENCY_BUCKETS
+    errors = models.PositiveBigIntegerField(default=0)
+    timeouts = models.PositiveBigIntegerField(default=0)
+    retries = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('series', 'name')
+
+    def __str__(self):
+        return f"{self.get_series_display()} totals for {self.name} ({self.count})"
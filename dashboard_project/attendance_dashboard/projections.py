@@ -0,0 +1,127 @@
+import logging
+
+from django.db.models import Case, F, FloatField, Sum, Value, When, Window
+from django.db.models.functions import Cast, Ceil, Floor, Greatest
+from django.db.models.lookups import GreaterThan, LessThan
+
+from .models import AttendanceProjection, SubjectFingerprint
+
+# How many classes in a row a student can miss, or has to attend, to stay at or get back to
+# UserProfile.attendance_goal. The inputs are each user's latest per-subject numbers
+# (SubjectFingerprint) and the lab multipliers the scraper applies: a class of a subject with
+# multiplier m adds m to the weighted totals behind the overall percentage.
+#
+# refresh_projections() evaluates every formula in one query over all subjects of all the
+# given users and stores the results in AttendanceProjection, one row per user. It runs when
+# a scrape saves new numbers or a goal changes; the API only reads the stored rows.
+EPSILON = 1e-9 # Keeps float rounding from pushing an exact boundary over to the next whole class
+
+
+def can_skip_expression(attended, total, goal, weight=1):
+    # Classes of `weight` each that can be missed in a row while attended/total stays >= goal%.
+    # NULL for a 0% goal, where there is no limit.
+    attended, total = Cast(attended, FloatField()), Cast(total, FloatField())
+    goal, weight = Cast(goal, FloatField()), Cast(weight, FloatField())
+    return Case(
+        When(GreaterThan(goal, 0), then=Greatest(
+            Floor((attended * Value(100.0) / goal - total) / weight + Value(EPSILON)), Value(0.0))),
+        default=Value(None, output_field=FloatField()),
+    )
+
+
+def must_attend_expression(attended, total, goal, weight=1):
+    # Classes of `weight` each that have to be attended in a row to reach goal%. NULL for a
+    # 100% goal, which no amount of attending recovers from once a class is missed.
+    attended, total = Cast(attended, FloatField()), Cast(total, FloatField())
+    goal, weight = Cast(goal, FloatField()), Cast(weight, FloatField())
+    return Case(
+        When(LessThan(goal, 100), then=Greatest(
+            Ceil((total * goal - attended * Value(100.0)) / ((Value(100.0) - goal) * weight) - Value(EPSILON)), Value(0.0))),
+        default=Value(None, output_field=FloatField()),
+    )
+
+
+def _int(value):
+    return None if value is None else int(value)
+
+
+def projection_rows(profile_ids=None):
+    # One row per subject, carrying its user's weighted totals and every projection
+    rows = SubjectFingerprint.objects.all()
+    if profile_ids is not None:
+        rows = rows.filter(user_id__in=profile_ids)
+    per_user = {'partition_by': [F('user_id')]}
+    return (rows
+            .annotate(
+                goal=F('user__attendance_goal'),
+                weighted_attended=Window(Sum(F('attended') * F('multiplier')), **per_user),
+                weighted_total=Window(Sum(F('total') * F('multiplier')), **per_user),
+            )
+            .annotate(
+                can_skip=can_skip_expression('attended', 'total', 'goal'),
+                must_attend=must_attend_expression('attended', 'total', 'goal'),
+                overall_can_skip=can_skip_expression('weighted_attended', 'weighted_total', 'goal', 'multiplier'),
+                overall_must_attend=must_attend_expression('weighted_attended', 'weighted_total', 'goal', 'multiplier'),
+                user_can_skip=can_skip_expression('weighted_attended', 'weighted_total', 'goal'),
+                user_must_attend=must_attend_expression('weighted_attended', 'weighted_total', 'goal'),
+            )
+            .order_by('user_id', 'subject')
+            .values('user_id', 'subject', 'date', 'attended', 'total', 'attendance_percentage', 'multiplier', 'goal',
+                    'weighted_attended', 'weighted_total', 'can_skip', 'must_attend', 'overall_can_skip',
+                    'overall_must_attend', 'user_can_skip', 'user_must_attend'))
+
+
+def build_projections(profile_ids=None):
+    projections = {}
+    for row in projection_rows(profile_ids):
+        projection = projections.get(row['user_id'])
+        if projection is None:
+            total = row['weighted_total']
+            projection = projections[row['user_id']] = AttendanceProjection(
+                user_id=row['user_id'],
+                date=row['date'],
+                attendance_goal=row['goal'],
+                classes_attended=row['weighted_attended'],
+                total_classes_conducted=total,
+                attendance_percentage=round(row['weighted_attended'] / total * 100, 2) if total else 0,
+                can_skip=_int(row['user_can_skip']),
+                must_attend=_int(row['user_must_attend']),
+                subjects=[],
+            )
+        projection.date = max(projection.date, row['date']) # Day of the user's latest scrape
+        projection.subjects.append({
+            'subject': row['subject'],
+            'attended': row['attended'],
+            'total': row['total'],
+            'attendance_percentage': float(row['attendance_percentage']),
+            'multiplier': row['multiplier'],
+            'can_skip': _int(row['can_skip']),       # Keeping the subject's own percentage at the goal
+            'must_attend': _int(row['must_attend']),
+            'overall_can_skip': _int(row['overall_can_skip']),       # Keeping the overall percentage at the goal,
+            'overall_must_attend': _int(row['overall_must_attend']), # counting this subject's multiplier
+        })
+    return projections
+
+
+def refresh_projections(profile_ids=None):
+    # Recomputes and stores the projections of the given UserProfile ids (all users if None)
+    projections = build_projections(profile_ids)
+    if projections:
+        AttendanceProjection.objects.bulk_create(
+            projections.values(),
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['date', 'attendance_goal', 'classes_attended', 'total_classes_conducted',
+                           'attendance_percentage', 'can_skip', 'must_attend', 'subjects', 'computed_at'],
+            batch_size=500,
+        )
+    logging.info(f"Refreshed attendance projections for {len(projections)} user(s).")
+    return projections
+
+
+def get_projection(profile):
+    # The stored projection, computed on the spot for users scraped before projections existed
+    projection = AttendanceProjection.objects.filter(user=profile).first()
+    if projection is None:
+        projection = refresh_projections([profile.pk]).get(profile.pk)
+    return projection
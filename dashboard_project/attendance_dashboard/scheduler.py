@@ -0,0 +1,107 @@
+import logging
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import RefreshSchedule, UserProfile
+
+# Make the scraper package importable from the scheduler process
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+
+def jittered(seconds):
+    jitter = settings.REFRESH_JITTER
+    return seconds * random.uniform(1 - jitter, 1 + jitter)
+
+
+def in_quiet_hours(now=None, quiet_hours=None):
+    quiet_hours = settings.REFRESH_QUIET_HOURS if quiet_hours is None else quiet_hours
+    if not quiet_hours:
+        return False
+    start, end = quiet_hours
+    hour = timezone.localtime(now or timezone.now(), ZoneInfo(settings.REFRESH_TIMEZONE)).hour # The portal's day, not the server's
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end # Window wraps past midnight
+
+
+def ensure_schedules(usernames):
+    # New schedules start at a random point in their first interval so a fresh
+    # deployment doesn't refresh everyone at once
+    profiles = UserProfile.objects.filter(user__username__in=usernames, refresh_schedule__isnull=True)
+    now = timezone.now()
+    created = []
+    for profile in profiles:
+        schedule = RefreshSchedule(user=profile)
+        schedule.next_run_at = now + timedelta(minutes=random.uniform(0, schedule.interval_minutes))
+        created.append(schedule)
+    RefreshSchedule.objects.bulk_create(created, ignore_conflicts=True) # Another scheduler may be creating them too
+    return len(created)
+
+
+def claim_due_schedules(usernames, limit, exclude=()):
+    # Pushes each claimed schedule's next_run_at a full interval ahead before running it,
+    # so a restart mid-scrape doesn't immediately run it again. The push only applies if
+    # next_run_at is still what was read, so of two schedulers reading the same due row
+    # only one claims it.
+    if limit <= 0:
+        return []
+    now = timezone.now()
+    due = list(RefreshSchedule.objects
+               .filter(enabled=True, next_run_at__lte=now, user__user__username__in=usernames)
+               .exclude(pk__in=exclude)
+               .select_related('user__user')
+               .order_by('next_run_at')[:limit])
+    claimed = []
+    for schedule in due:
+        next_run_at = now + timedelta(minutes=schedule.interval_minutes * schedule.backoff)
+        if RefreshSchedule.objects.filter(pk=schedule.pk, next_run_at=schedule.next_run_at).update(next_run_at=next_run_at):
+            schedule.next_run_at = next_run_at
+            claimed.append(schedule)
+    return claimed
+
+
+def record_result(schedule, duration, error=None):
+    # Adaptive interval: double the backoff on failure or a slow portal, halve it back
+    # towards 1 on a healthy run
+    if error is not None:
+        schedule.consecutive_failures += 1
+        schedule.backoff = min(schedule.backoff * 2, settings.REFRESH_MAX_BACKOFF)
+        schedule.last_error = str(error)
+    else:
+        schedule.consecutive_failures = 0
+        schedule.last_error = ''
+        if duration > settings.REFRESH_SLOW_SECONDS:
+            schedule.backoff = min(schedule.backoff * 2, settings.REFRESH_MAX_BACKOFF)
+        else:
+            schedule.backoff = max(schedule.backoff / 2, 1.0)
+
+    now = timezone.now()
+    schedule.last_run_at = now
+    schedule.last_duration_seconds = duration
+    schedule.next_run_at = now + timedelta(seconds=jittered(schedule.interval_minutes * 60 * schedule.backoff))
+    schedule.save()
+    return schedule
+
+
+def refresh_user(username, password):
+    # Runs on a scheduler thread; returns (duration, error)
+    import scraper # Imported lazily so the web process never loads Selenium
+
+    started = time.perf_counter()
+    try:
+        if scraper.run_scrape(username, password, storage=scraper.get_storage('orm')) is None:
+            raise Exception("No attendance data could be extracted.")
+        return time.perf_counter() - started, None
+    except Exception as e:
+        logging.warning(f"Scheduled refresh for {username} failed: {e}")
+        return time.perf_counter() - started, e
+    finally:
+        connection.close() # Each scheduler thread has its own DB connection
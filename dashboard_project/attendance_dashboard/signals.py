@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_attendance_cache
+from .history import rebuild_rollups
+from .projections import refresh_projections
+from .models import AttendanceData, UserProfile
+
+
+@receiver([post_save, post_delete], sender=AttendanceData)
+def attendance_changed(sender, instance, **kwargs):
+    user_id = UserProfile.objects.filter(pk=instance.user_id).values_list('user_id', flat=True).first()
+    invalidate_attendance_cache([user_id] if user_id else [])
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def profile_changed(sender, instance, **kwargs):
+    invalidate_attendance_cache([instance.user_id])
+
+
+@receiver([post_save, post_delete], sender=AttendanceData)
+def attendance_snapshot_changed(sender, instance, **kwargs):
+    rebuild_rollups(instance.user_id, instance.date) # bulk_save_attendance() upserts its rollups itself
+
+
+@receiver(post_save, sender=UserProfile)
+def attendance_goal_changed(sender, instance, created, **kwargs):
+    if not created: # A new profile has no subjects to project yet
+        refresh_projections([instance.pk])
@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .cache import get_attendance_versions, get_latest_attendance_payload
+
+# Server-Sent Events for attendance updates. One watcher task per process polls the cache
+# versions of the users with an open stream (bumped by every scrape that saves their
+# attendance, in any process) in one round-trip. For each user whose version moved it reads
+# the payload once and hands it to that user's streams only, so a scrape never wakes anyone
+# else's connection and an idle connection costs one parked coroutine and a queue.
+
+
+def format_event(payload):
+    return f"id: {payload['etag']}\nevent: attendance\ndata: {json.dumps(payload['data'])}\n\n"
+
+
+def get_latest_attendance_payloads(user_ids):
+    return {user_id: get_latest_attendance_payload(user_id) for user_id in user_ids}
+
+
+class AttendanceBroadcaster:
+    def __init__(self, poll_interval):
+        self.poll_interval = poll_interval
+        self._subscribers = {} # Django User pk -> set of queues, one per open stream
+        self._task = None
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=1)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        queues = self._subscribers.get(user_id, set())
+        queues.discard(queue)
+        if not queues:
+            self._subscribers.pop(user_id, None)
+
+    def publish(self, user_id, message):
+        for queue in self._subscribers.get(user_id, ()):
+            if queue.full():
+                queue.get_nowait() # Slow clients only need the newest payload
+            queue.put_nowait(message)
+
+    async def _watch(self):
+        versions = await sync_to_async(get_attendance_versions)(list(self._subscribers))
+        while self._subscribers:
+            await asyncio.sleep(self.poll_interval)
+            current = await sync_to_async(get_attendance_versions)(list(self._subscribers))
+            # A user who subscribed since the last poll may see one wake for a version they already read
+            changed = [user_id for user_id, version in current.items() if version != versions.get(user_id)]
+            versions = current
+            if changed:
+                payloads = await sync_to_async(get_latest_attendance_payloads)(changed)
+                for user_id, payload in payloads.items():
+                    self.publish(user_id, payload)
+
+
+broadcaster = AttendanceBroadcaster(settings.ATTENDANCE_STREAM_POLL_INTERVAL)
+
+
+async def attendance_events(user_id, last_event_id=None):
+    queue = broadcaster.subscribe(user_id)
+    try:
+        etag = last_event_id
+        payload = await sync_to_async(get_latest_attendance_payload)(user_id)
+        while True:
+            if payload['etag'] != etag:
+                etag = payload['etag']
+                yield format_event(payload) # Current state first, unless the client already has it
+            try:
+                payload = await asyncio.wait_for(queue.get(), timeout=settings.ATTENDANCE_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+    finally:
+        broadcaster.unsubscribe(user_id, queue)
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Make the scraper package importable, as jobs.py and scheduler.py do for the worker processes
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+
+# Tests that save attendance or read the latest-attendance API keep their cache in memory,
+# away from the dashboard's django_cache directory
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from scraper.api_client import PortalApiClient, PortalApiError, PortalSessionExpired
+from scraper.fake_portal import DEFAULT_FIXTURE_DIR, FIXTURE_TOKEN, start_fake_portal
+
+LOGIN_PATH = "/api/auth/login"
+SUBJECTS_PATH = "/api/student/attendance/subjects"
+
+
+class PortalApiClientTests(SimpleTestCase):
+    def start(self, fixture_dir=DEFAULT_FIXTURE_DIR):
+        server, base_url = start_fake_portal(fixture_dir)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        client = PortalApiClient({"base_url": base_url, "login_path": LOGIN_PATH})
+        self.addCleanup(client.close)
+        return client, server.RequestHandlerClass.hits
+
+    def failing_fixtures(self, status):
+        # The recorded API with the login and the subject list both answering `status`
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        shutil.copytree(DEFAULT_FIXTURE_DIR, directory, dirs_exist_ok=True)
+        with open(os.path.join(directory, "manifest.json")) as f:
+            manifest = json.load(f)
+        for route in (f"POST {LOGIN_PATH}", f"GET {SUBJECTS_PATH}"):
+            manifest[route]["status"] = status
+        with open(os.path.join(directory, "manifest.json"), "w") as f:
+            json.dump(manifest, f)
+        return directory
+
+    def test_login_and_fetch_attendance(self):
+        client, hits = self.start()
+        client.login("21b81a0501", "secret")
+        self.assertEqual(client.token, FIXTURE_TOKEN)
+        self.assertEqual(client.fetch_attendance(), [
+            {"name": "Design and Analysis of Algorithms", "attended": 10, "total": 15, "percentage": 66.67},
+            {"name": "Computer Networks Lab", "attended": 4, "total": 5, "percentage": 80.0},
+            {"name": "CT Lab", "attended": 3, "total": 3, "percentage": 100.0},
+        ])
+        self.assertEqual(hits[f"GET {SUBJECTS_PATH}"], 1)
+
+    def test_missing_token_is_a_session_expiry(self):
+        client, _ = self.start()
+        with self.assertRaises(PortalSessionExpired):
+            client.fetch_subjects()
+
+    def test_login_post_is_never_retried(self):
+        client, hits = self.start(self.failing_fixtures(503))
+        with self.assertRaises(PortalApiError):
+            client.login("21b81a0501", "secret")
+        self.assertEqual(hits[f"POST {LOGIN_PATH}"], 1)
+
+    def test_idempotent_get_is_retried(self):
+        client, hits = self.start(self.failing_fixtures(503))
+        client.set_token(FIXTURE_TOKEN)
+        with self.assertRaises(PortalApiError):
+            client.fetch_subjects()
+        self.assertEqual(hits[f"GET {SUBJECTS_PATH}"], 3) # The first try and two retries
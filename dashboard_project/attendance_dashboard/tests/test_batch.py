@@ -0,0 +1,15 @@
+import os
+import subprocess
+import sys
+
+from django.test import SimpleTestCase
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+
+class BatchImportTests(SimpleTestCase):
+    def test_importing_batch_does_not_load_selenium(self):
+        # In a fresh interpreter, since this test process may have imported Selenium already
+        code = "import sys, scraper.batch; print(any(name.split('.')[0] == 'selenium' for name in sys.modules))"
+        output = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), 'False')
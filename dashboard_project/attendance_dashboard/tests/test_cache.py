@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from attendance_dashboard.cache import get_latest_attendance_payload
+from attendance_dashboard.models import AttendanceData, UserProfile
+
+from scraper.parser import make_record
+from scraper.persistence import save_attendance_record
+
+from . import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LatestAttendanceCacheTests(TestCase):
+    def setUp(self):
+        save_attendance_record('alice', [make_record('MATHEMATICS', 18, 20, 90.0, 'a1')])
+        self.user = User.objects.get(username='alice')
+        self.client.force_login(self.user)
+        self.url = reverse('attendance_dashboard:latest_attendance_api')
+
+    def test_matching_etag_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_new_numbers_change_the_etag_and_timestamp(self):
+        earlier = timezone.now() - timedelta(hours=3)
+        AttendanceData.objects.update(timestamp=earlier) # As if saved this morning
+        etag = self.client.get(self.url)['ETag']
+
+        save_attendance_record('alice', [make_record('MATHEMATICS', 19, 21, 90.48, 'a2')]) # Same day, new numbers
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['classes_attended'], 19)
+        self.assertGreater(AttendanceData.objects.get().timestamp, earlier)
+
+    def test_goal_change_invalidates_the_cached_payload(self):
+        etag = self.client.get(self.url)['ETag']
+        profile = UserProfile.objects.get(user=self.user)
+        profile.attendance_goal = 95
+        profile.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['attendance_status'], 'Below Target')
+
+    def test_cached_payload_needs_no_queries(self):
+        get_latest_attendance_payload(self.user.pk)
+        with self.assertNumQueries(0):
+            get_latest_attendance_payload(self.user.pk)
@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from attendance_dashboard.cohort import COHORT_FIELDS, cohort_page, cohort_queryset, iter_cohort
+from attendance_dashboard.models import AttendanceData, UserProfile
+
+from scraper.parser import make_record
+from scraper.persistence import save_attendance_record
+
+from . import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CohortTests(TestCase):
+    def setUp(self):
+        save_attendance_record('21b81a0501', [make_record('MATHEMATICS', 18, 20, 90.0, 'a1')])
+        save_attendance_record('21b81a0502', [make_record('MATHEMATICS', 10, 20, 50.0, 'b1')])
+        UserProfile.objects.create(user=User.objects.create(username='22b81a0501')) # Never scraped
+        # An older, lower snapshot that must not be reported as the latest
+        older = AttendanceData.objects.create(user=UserProfile.objects.get(user__username='21b81a0501'),
+                                              date=date.today() - timedelta(days=1), total_classes_conducted=18,
+                                              classes_attended=15, attendance_percentage=83.33)
+        AttendanceData.objects.filter(pk=older.pk).update(timestamp=timezone.now() - timedelta(days=1))
+
+        self.client.force_login(User.objects.create(username='advisor', is_staff=True))
+        self.url = reverse('attendance_dashboard:cohort_attendance_api')
+
+    def test_json_pages_latest_snapshot_and_status(self):
+        first = self.client.get(self.url, {'page_size': 2}).json()
+        self.assertTrue(first['has_next'])
+        self.assertEqual([(r['username'], r['classes_attended'], r['attendance_status']) for r in first['results']],
+                         [('21b81a0501', 18, 'Above Target'), ('21b81a0502', 10, 'Below Target')])
+        second = self.client.get(self.url, {'page_size': 2, 'page': 2}).json()
+        self.assertFalse(second['has_next'])
+        self.assertEqual(second['results'][0]['username'], '22b81a0501')
+        self.assertEqual((second['results'][0]['attendance_percentage'], second['results'][0]['attendance_status']),
+                         (None, 'N/A'))
+
+    def test_usernames_and_prefix_select_the_cohort(self):
+        by_prefix = self.client.get(self.url, {'prefix': '21b81a'}).json()['results']
+        self.assertEqual([r['username'] for r in by_prefix], ['21b81a0501', '21b81a0502'])
+        by_name = self.client.get(self.url, {'usernames': '22b81a0501, 21b81a0502'}).json()['results']
+        self.assertEqual([r['username'] for r in by_name], ['21b81a0502', '22b81a0501'])
+
+    def test_ndjson_streams_the_same_records(self):
+        response = self.client.get(self.url, {'format': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(records, self.client.get(self.url).json()['results'])
+
+    def test_csv_streams_a_header_and_one_row_per_user(self):
+        response = self.client.get(self.url, {'format': 'csv'})
+        self.assertIn('attachment', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], list(COHORT_FIELDS))
+        self.assertEqual([row[0] for row in rows[1:]], ['21b81a0501', '21b81a0502', '22b81a0501'])
+        self.assertEqual(rows[3][COHORT_FIELDS.index('attendance_percentage')], '') # No snapshot yet
+
+    def test_a_page_is_one_query_and_streams_one_per_batch(self):
+        with self.assertNumQueries(1):
+            cohort_page(cohort_queryset(), page_size=100)
+        with self.assertNumQueries(2):
+            self.assertEqual(len(list(iter_cohort(cohort_queryset(), batch_size=2))), 3)
+
+    def test_staff_only_and_known_formats(self):
+        self.assertEqual(self.client.get(self.url, {'format': 'xml'}).status_code, 400)
+        self.client.force_login(User.objects.get(username='21b81a0501'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
@@ -0,0 +1,91 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from scraper.driver_pool import DriverPool, DriverPoolError
+
+
+class FakeDriver:
+    def __init__(self, name):
+        self.name = name
+        self.healthy = True
+        self.url = "about:blank"
+        self.cdp_commands = []
+        self.quit_called = threading.Event()
+
+    @property
+    def current_url(self):
+        if not self.healthy:
+            raise Exception("session deleted")
+        return self.url
+
+    def execute_script(self, script):
+        pass
+
+    def delete_all_cookies(self):
+        pass
+
+    def get(self, url):
+        self.url = url
+
+    def execute_cdp_cmd(self, command, params):
+        self.cdp_commands.append((command, params.get("origin")))
+
+    def quit(self):
+        self.quit_called.set()
+
+
+class DriverPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.created = []
+
+        def factory():
+            driver = FakeDriver(len(self.created))
+            self.created.append(driver)
+            return driver
+
+        self.pool = DriverPool(factory, max_size=2, idle_timeout=60, checkout_timeout=0.05,
+                               reset_origins=("https://portal.example.edu/public/auth/",))
+        self.addCleanup(self.pool.close)
+
+    def test_released_driver_is_checked_out_again(self):
+        driver = self.pool.acquire()
+        self.pool.release(driver)
+        self.assertIs(self.pool.acquire(), driver)
+        stats = self.pool.stats()
+        self.assertEqual((stats["cold_starts"], stats["warm_checkouts"], stats["in_use"]), (1, 1, 1))
+
+    def test_checkout_times_out_when_the_pool_is_full(self):
+        self.pool.acquire()
+        self.pool.acquire()
+        with self.assertRaises(DriverPoolError):
+            self.pool.acquire()
+        self.assertEqual(len(self.created), 2)
+
+    def test_idle_driver_is_evicted(self):
+        driver = self.pool.acquire()
+        self.pool.release(driver)
+        self.pool._idle[0].last_used -= 61
+        replacement = self.pool.acquire()
+        self.assertIsNot(replacement, driver)
+        self.assertTrue(driver.quit_called.wait(1))
+        self.assertEqual(self.pool.stats()["evicted_idle"], 1)
+
+    def test_unhealthy_driver_is_discarded(self):
+        driver = self.pool.acquire()
+        self.pool.release(driver)
+        driver.healthy = False
+        self.assertIsNot(self.pool.acquire(), driver)
+        self.assertTrue(driver.quit_called.is_set())
+        self.assertEqual(self.pool.stats()["discarded_unhealthy"], 1)
+
+    def test_release_clears_every_origin(self):
+        driver = self.pool.acquire()
+        driver.url = "https://sso.example.edu/callback?code=1"
+        self.pool.release(driver)
+        self.assertEqual(driver.cdp_commands, [
+            ("Network.clearBrowserCookies", None),
+            ("Storage.clearDataForOrigin", "https://portal.example.edu"),
+            ("Storage.clearDataForOrigin", "https://sso.example.edu"),
+        ])
+        self.assertEqual(driver.url, "about:blank")
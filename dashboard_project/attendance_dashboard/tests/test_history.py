@@ -0,0 +1,87 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from attendance_dashboard.history import attendance_series, upsert_rollups
+from attendance_dashboard.models import AttendanceData, AttendanceRollup, UserProfile
+
+from . import LOCMEM_CACHES
+
+# Cumulative snapshots: (day, conducted, attended). 2026-03-02 is a Monday.
+SNAPSHOTS = [
+    (date(2026, 2, 26), 40, 36),
+    (date(2026, 3, 2), 44, 39),
+    (date(2026, 3, 4), 48, 42),
+    (date(2026, 3, 9), 52, 44),
+]
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AttendanceHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='21b81a0501')
+        self.profile = UserProfile.objects.create(user=self.user)
+        for day, conducted, attended in SNAPSHOTS:
+            AttendanceData.objects.create(user=self.profile, date=day, total_classes_conducted=conducted,
+                                          classes_attended=attended, attendance_percentage=round(attended * 100 / conducted, 2))
+
+    def series(self, period, **kwargs):
+        results = attendance_series(self.profile, period, **kwargs)['results']
+        return [(r['period_start'], r['date'], r['classes_conducted_in_period'], r['classes_attended_in_period'])
+                for r in results]
+
+    def test_weekly_and_monthly_rollups_keep_each_periods_last_snapshot(self):
+        self.assertEqual(self.series('weekly'), [
+            ('2026-03-09', '2026-03-09', 4, 2),
+            ('2026-03-02', '2026-03-04', 8, 6),
+            ('2026-02-23', '2026-02-26', None, None),
+        ])
+        self.assertEqual(self.series('monthly'), [
+            ('2026-03-01', '2026-03-09', 12, 8),
+            ('2026-02-01', '2026-02-26', None, None),
+        ])
+
+    def test_deleting_a_snapshot_rebuilds_its_week(self):
+        AttendanceData.objects.get(date=date(2026, 3, 4)).delete()
+        self.assertEqual(self.series('weekly')[1], ('2026-03-02', '2026-03-02', 4, 3))
+        AttendanceData.objects.get(date=date(2026, 3, 2)).delete()
+        self.assertFalse(AttendanceRollup.objects.filter(period='weekly', period_start=date(2026, 3, 2)).exists())
+
+    def test_bulk_upserted_snapshot_replaces_its_rollups(self):
+        row = AttendanceData(user=self.profile, date=date(2026, 3, 10), total_classes_conducted=56, classes_attended=48)
+        upsert_rollups([row])
+        self.assertEqual(self.series('weekly')[0], ('2026-03-09', '2026-03-10', 8, 6))
+
+    def test_pages_use_the_next_row_as_the_baseline(self):
+        with self.assertNumQueries(1):
+            first = attendance_series(self.profile, 'daily', page_size=2)
+        self.assertTrue(first['has_next'])
+        self.assertEqual([(r['date'], r['classes_conducted_in_period']) for r in first['results']],
+                         [('2026-03-09', 4), ('2026-03-04', 4)])
+        second = attendance_series(self.profile, 'daily', page=2, page_size=2)
+        self.assertFalse(second['has_next'])
+        self.assertEqual([(r['date'], r['classes_conducted_in_period']) for r in second['results']],
+                         [('2026-03-02', 4), ('2026-02-26', None)])
+
+    def test_since_and_until_cover_whole_periods(self):
+        self.assertEqual([row[0] for row in self.series('weekly', since=date(2026, 3, 4))], ['2026-03-09', '2026-03-02'])
+        self.assertEqual([row[1] for row in self.series('daily', until=date(2026, 3, 3))], ['2026-03-02', '2026-02-26'])
+
+    def test_projections_against_the_goal(self):
+        latest = attendance_series(self.profile, 'daily', page_size=1)['results'][0]
+        self.assertEqual((latest['can_skip'], latest['must_attend']), (6, 0)) # 44/58 is still above 75%
+
+    def test_endpoint(self):
+        url = reverse('attendance_dashboard:attendance_history_api')
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url, {'period': 'yearly'}).status_code, 400)
+        data = self.client.get(url, {'period': 'monthly', 'page_size': 1}).json()
+        self.assertEqual((data['username'], data['has_next'], len(data['results'])), ('21b81a0501', True, 1))
+
+        other = UserProfile.objects.create(user=User.objects.create(username='21b81a0502'))
+        self.assertEqual(self.client.get(url, {'username': '21b81a0502'}).json()['username'], '21b81a0501')
+        self.client.force_login(User.objects.create(username='advisor', is_staff=True))
+        data = self.client.get(url, {'username': other.user.username}).json()
+        self.assertEqual((data['username'], data['results']), ('21b81a0502', []))
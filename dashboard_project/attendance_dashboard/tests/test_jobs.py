@@ -0,0 +1,80 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from attendance_dashboard.jobs import _finish_failed, decrypt_password, enqueue_scrape, requeue_stale_jobs
+from attendance_dashboard.models import ScrapeJob
+
+
+@override_settings(SCRAPE_JOB_MAX_ATTEMPTS=2, SCRAPE_JOB_RETRY_BACKOFF=30)
+class ScrapeJobTests(TestCase):
+    def test_enqueue_returns_the_job_in_flight(self):
+        job, created = enqueue_scrape("21b81a0501", "secret")
+        self.assertTrue(created)
+        self.assertNotIn("secret", job.encrypted_password)
+        self.assertEqual(decrypt_password(job.encrypted_password), "secret")
+
+        again, created = enqueue_scrape("21b81a0501", "other")
+        self.assertFalse(created)
+        self.assertEqual(again.pk, job.pk)
+        again.refresh_from_db()
+        self.assertEqual(decrypt_password(again.encrypted_password), "secret") # Never replaced
+
+    def test_failed_attempt_is_retried_with_backoff(self):
+        job, _ = enqueue_scrape("21b81a0501", "secret")
+        job.status, job.attempts = ScrapeJob.STATUS_RUNNING, 1
+        before = timezone.now()
+        _finish_failed(job, Exception("portal down"), 1.5)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ScrapeJob.STATUS_PENDING)
+        self.assertEqual(job.error, "portal down")
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=30))
+        self.assertEqual(decrypt_password(job.encrypted_password), "secret")
+
+    def test_last_failed_attempt_clears_the_password(self):
+        job, _ = enqueue_scrape("21b81a0501", "secret")
+        job.status, job.attempts = ScrapeJob.STATUS_RUNNING, 2
+        _finish_failed(job, Exception("portal down"), 1.5)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ScrapeJob.STATUS_FAILED)
+        self.assertEqual(job.encrypted_password, "")
+        self.assertIsNotNone(job.finished_at)
+
+        # The user is free to queue a new job once the old one has failed for good
+        retry, created = enqueue_scrape("21b81a0501", "secret")
+        self.assertTrue(created)
+        self.assertNotEqual(retry.pk, job.pk)
+
+    def test_stale_running_job_is_requeued(self):
+        job, _ = enqueue_scrape("21b81a0501", "secret")
+        ScrapeJob.objects.filter(pk=job.pk).update(
+            status=ScrapeJob.STATUS_RUNNING, attempts=1, started_at=timezone.now() - timedelta(seconds=700))
+        self.assertEqual(requeue_stale_jobs(600), (1, 0))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ScrapeJob.STATUS_PENDING)
+
+    def test_stale_job_out_of_attempts_fails(self):
+        job, _ = enqueue_scrape("21b81a0501", "secret")
+        ScrapeJob.objects.filter(pk=job.pk).update(
+            status=ScrapeJob.STATUS_RUNNING, attempts=2, started_at=timezone.now() - timedelta(seconds=700))
+        self.assertEqual(requeue_stale_jobs(600), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ScrapeJob.STATUS_FAILED)
+        self.assertEqual(job.encrypted_password, "")
+        self.assertIsNotNone(job.finished_at)
+
+    def test_recent_running_job_is_left_alone(self):
+        job, _ = enqueue_scrape("21b81a0501", "secret")
+        ScrapeJob.objects.filter(pk=job.pk).update(status=ScrapeJob.STATUS_RUNNING, attempts=1, started_at=timezone.now())
+        self.assertEqual(requeue_stale_jobs(600), (0, 0))
+
+    def test_worker_loop_reclaims_stale_jobs(self):
+        job, _ = enqueue_scrape("21b81a0501", "secret")
+        ScrapeJob.objects.filter(pk=job.pk).update(
+            status=ScrapeJob.STATUS_RUNNING, attempts=2, started_at=timezone.now() - timedelta(seconds=700))
+        call_command("run_scrape_worker", once=True, stale_after=600, stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ScrapeJob.STATUS_FAILED)
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from attendance_dashboard.metrics import _labels, prune_traces, render_metrics
+from attendance_dashboard.models import ScrapeRun, ScrapeSpan, ScrapeTotal
+
+from scraper.persistence import save_trace
+from scraper.tracing import Span, Trace
+
+
+def make_trace(status, duration, spans):
+    trace = Trace('21b81a0501', 'api', status=status, duration=duration)
+    trace.spans = spans
+    return trace
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        save_trace(make_trace('succeeded', 0.3, [
+            Span('login', 0.0, duration=0.2, retries=1),
+            Span('subject_card', 0.2, parent='extract', subject='MATHEMATICS', duration=0.05, status='error', timeouts=1),
+        ]))
+        save_trace(make_trace('failed', 3.0, [Span('login', 0.0, duration=2.8)]))
+
+    def test_totals_add_up_across_runs(self):
+        login = ScrapeTotal.objects.get(series=ScrapeTotal.SERIES_STAGE, name='login')
+        self.assertEqual((login.count, login.retries, login.errors), (2, 1, 0))
+        self.assertAlmostEqual(login.duration_sum, 3.0)
+        self.assertEqual((login.buckets['0.25'], login.buckets['5'], login.buckets.get('2.5', 0)), (1, 2, 1))
+        card = ScrapeTotal.objects.get(series=ScrapeTotal.SERIES_STAGE, name='subject_card')
+        self.assertEqual((card.count, card.errors, card.timeouts), (1, 1, 1))
+        runs = ScrapeTotal.objects.filter(series=ScrapeTotal.SERIES_RUN).order_by('name')
+        self.assertEqual([(total.name, total.count) for total in runs], [('failed', 1), ('succeeded', 1)])
+
+    def test_exposition_output(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        lines = response.content.decode().splitlines()
+        for line in (
+            '# TYPE scraper_runs_total counter',
+            'scraper_runs_total{status="succeeded"} 1',
+            'scraper_runs_total{status="empty"} 0',
+            'scraper_runs_total{status="failed"} 1',
+            '# TYPE scraper_run_duration_seconds histogram',
+            'scraper_run_duration_seconds_bucket{le="0.5"} 1',
+            'scraper_run_duration_seconds_bucket{le="2.5"} 1',
+            'scraper_run_duration_seconds_bucket{le="5"} 2',
+            'scraper_run_duration_seconds_bucket{le="+Inf"} 2',
+            'scraper_run_duration_seconds_sum 3.3',
+            'scraper_run_duration_seconds_count 2',
+            'scraper_stage_duration_seconds_bucket{stage="login",le="+Inf"} 2',
+            'scraper_stage_duration_seconds_count{stage="subject_card"} 1',
+            'scraper_stage_errors_total{stage="subject_card"} 1',
+            'scraper_stage_timeouts_total{stage="subject_card"} 1',
+            'scraper_stage_retries_total{stage="login"} 1',
+            'scrape_jobs{status="pending"} 0',
+        ):
+            self.assertIn(line, lines)
+        samples = [line for line in lines if not line.startswith('#')]
+        self.assertTrue(all(len(line.rsplit(' ', 1)) == 2 for line in samples))
+
+    def test_pruning_old_traces_keeps_the_totals(self):
+        ScrapeRun.objects.update(started_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(prune_traces(days=14), (2, 3))
+        self.assertFalse(ScrapeSpan.objects.exists())
+        self.assertIn('scraper_runs_total{status="failed"} 1', render_metrics().splitlines())
+
+    def test_label_values_are_escaped(self):
+        self.assertEqual(_labels({'stage': 'a"b\\c\nd'}), '{stage="a\\"b\\\\c\\nd"}')
@@ -0,0 +1,57 @@
+from django.test import SimpleTestCase
+
+from scraper.parser import parse_attendance_html, parse_attendance_text, subject_multiplier
+
+SUBJECTS_HTML = """
+<html><body>
+<div class="subject-card"><h4>MATHEMATICS</h4>
+    <p>Present session 18 out of 20 | Percentage 90.00%</p></div>
+<div class="subject-card"><h4>  NETWORKS   LAB </h4><br>
+    <p>Present session 8 out of 10 | Percentage 80.00%</p></div>
+<div class="subject-card"><h4>CT LAB</h4><img src="icon.png">
+    <p>Present session 5 out of 10 | Percentage 50.00%</p></div>
+<div class="subject-card"><h4>PHYSICS</h4><p>Loading...</p></div>
+</body></html>
+"""
+
+
+class ParserTests(SimpleTestCase):
+    def test_subject_multiplier(self):
+        self.assertEqual(subject_multiplier("Mathematics"), 1)
+        self.assertEqual(subject_multiplier("Networks Lab"), 3)
+        self.assertEqual(subject_multiplier("CT LAB"), 2)
+
+    def test_parse_attendance_html(self):
+        records = parse_attendance_html(SUBJECTS_HTML)
+        # PHYSICS has no summary yet and is left out
+        self.assertEqual(
+            [(r.name, r.attended, r.total, r.percentage, r.multiplier) for r in records],
+            [("MATHEMATICS", 18, 20, 90.0, 1), ("NETWORKS LAB", 8, 10, 80.0, 3), ("CT LAB", 5, 10, 50.0, 2)],
+        )
+        self.assertTrue(all(record.fingerprint for record in records))
+
+    def test_known_records_are_reused_when_the_card_is_unchanged(self):
+        first = parse_attendance_html(SUBJECTS_HTML)
+        known = {record.name: record for record in first}
+        changed = SUBJECTS_HTML.replace("18 out of 20 | Percentage 90.00", "19 out of 21 | Percentage 90.48")
+        second = parse_attendance_html(changed, known)
+        self.assertEqual(second[0].attended, 19)
+        self.assertIs(second[1], known["NETWORKS LAB"])
+        self.assertIs(second[2], known["CT LAB"])
+
+
+class FakeCardElement:
+    def __init__(self, html):
+        self.html = html
+
+    def get_attribute(self, name):
+        return self.html if name == 'outerHTML' else None
+
+
+class CardFingerprintTests(SimpleTestCase):
+    def test_per_card_and_single_pass_fingerprints_match(self):
+        from scraper.browser import read_subject_card
+
+        card_html = '<div class="subject-card"><h4>MATHEMATICS</h4>\n    <p>Present session 18 out of 20 | Percentage 90.00%</p></div>'
+        record = parse_attendance_text(*read_subject_card(FakeCardElement(card_html)))
+        self.assertEqual(record, parse_attendance_html(SUBJECTS_HTML)[0])
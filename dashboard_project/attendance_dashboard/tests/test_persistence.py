@@ -0,0 +1,60 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from attendance_dashboard.models import AttendanceData, AttendanceRollup, UserProfile
+
+from scraper import persistence
+from scraper.parser import make_record
+from scraper.persistence import bulk_save_attendance, profiles_for, save_attendance_record
+
+from . import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConcurrentUpsertTests(TestCase):
+    # Each test lets a competing save commit between this save's read and its write, which is
+    # the window two scrapes of the same account race in
+    def compete_before(self, target, competitor):
+        original = getattr(persistence, target)
+
+        def wrapper(*args, **kwargs):
+            competitor()
+            return original(*args, **kwargs)
+        return mock.patch.object(persistence, target, wrapper)
+
+    def other_scrape(self, attended):
+        profile = profiles_for(['21b81a0501'])['21b81a0501']
+        return lambda: AttendanceData.objects.create(user=profile, date=date.today(), total_classes_conducted=20,
+                                                     classes_attended=attended, attendance_percentage=attended * 5)
+
+    def test_save_that_lost_the_race_updates_the_winners_row(self):
+        with self.compete_before('upsert_attendance_rows', self.other_scrape(10)):
+            saved = save_attendance_record('21b81a0501', [make_record('MATHEMATICS', 18, 20, 90.0, 'a1')])
+
+        row = AttendanceData.objects.get(user__user__username='21b81a0501')
+        self.assertEqual((row.pk, row.classes_attended), (saved.pk, 18)) # Last writer wins, in one row
+        rollup = AttendanceRollup.objects.get(user=row.user, period='weekly')
+        self.assertEqual(rollup.classes_attended, 18)
+
+    def test_bulk_save_that_lost_the_race_updates_the_winners_row(self):
+        with self.compete_before('upsert_attendance_rows', self.other_scrape(10)):
+            written = bulk_save_attendance({'21b81a0501': [make_record('MATHEMATICS', 18, 20, 90.0, 'a1')],
+                                            '21b81a0502': [make_record('MATHEMATICS', 5, 20, 25.0, 'b1')]})
+
+        self.assertEqual(written, 2)
+        self.assertEqual(dict(AttendanceData.objects.values_list('user__user__username', 'classes_attended')),
+                         {'21b81a0501': 18, '21b81a0502': 5})
+
+    def test_account_created_meanwhile_is_read_back(self):
+        original = User.objects.bulk_create
+
+        def bulk_create(*args, **kwargs):
+            UserProfile.objects.create(user=User.objects.create(username='21b81a0501')) # The other scrape's account
+            return original(*args, **kwargs)
+
+        with mock.patch.object(User.objects, 'bulk_create', bulk_create):
+            profile = profiles_for(['21b81a0501'])['21b81a0501']
+        self.assertEqual(profile, UserProfile.objects.get(user__username='21b81a0501'))
@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.db.models import Value
+from django.test import TestCase, override_settings
+
+from attendance_dashboard.models import AttendanceProjection, SubjectFingerprint, UserProfile
+from attendance_dashboard.projections import can_skip_expression, get_projection, must_attend_expression
+
+from scraper.parser import make_record
+from scraper.persistence import bulk_save_attendance, save_attendance_record
+
+from . import LOCMEM_CACHES
+
+
+class ProjectionExpressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="projection")
+
+    def evaluate(self, expression, attended, total, goal, weight=1):
+        value = (User.objects.filter(pk=self.user.pk)
+                 .annotate(result=expression(Value(attended), Value(total), Value(goal), Value(weight)))
+                 .values_list("result", flat=True).get())
+        return None if value is None else int(value)
+
+    def test_zero_goal(self):
+        self.assertIsNone(self.evaluate(can_skip_expression, 5, 10, 0)) # No limit
+        self.assertEqual(self.evaluate(must_attend_expression, 5, 10, 0), 0)
+
+    def test_full_goal(self):
+        self.assertEqual(self.evaluate(can_skip_expression, 10, 10, 100), 0)
+        self.assertEqual(self.evaluate(can_skip_expression, 9, 10, 100), 0)
+        self.assertIsNone(self.evaluate(must_attend_expression, 9, 10, 100)) # Unreachable
+
+    def test_exact_boundary(self):
+        # 30/40 and 12/16 are exactly 75%
+        self.assertEqual(self.evaluate(can_skip_expression, 30, 30, 75), 10)
+        self.assertEqual(self.evaluate(can_skip_expression, 75, 100, 75), 0)
+        self.assertEqual(self.evaluate(must_attend_expression, 6, 10, 75), 6)
+        self.assertEqual(self.evaluate(must_attend_expression, 75, 100, 75), 0)
+
+    def test_weighted_classes(self):
+        # A lab class adds 3 to the weighted totals: two of them take 6/10 to 12/16
+        self.assertEqual(self.evaluate(must_attend_expression, 6, 10, 75, 3), 2)
+        self.assertEqual(self.evaluate(can_skip_expression, 30, 30, 75, 3), 3)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RefreshProjectionTests(TestCase):
+    def test_subjects_gone_from_the_portal_leave_the_projection(self):
+        save_attendance_record("21b81a0501", [make_record("MATHEMATICS", 15, 20, 75.0, "m1"),
+                                              make_record("ELECTIVE I", 2, 10, 20.0, "e1")])
+        profile = UserProfile.objects.get(user__username="21b81a0501")
+        self.assertEqual(len(get_projection(profile).subjects), 2)
+
+        # The elective is no longer on the portal
+        save_attendance_record("21b81a0501", [make_record("MATHEMATICS", 16, 21, 76.19, "m2")])
+        projection = get_projection(profile)
+        self.assertEqual([subject["subject"] for subject in projection.subjects], ["MATHEMATICS"])
+        self.assertEqual((projection.classes_attended, projection.total_classes_conducted), (16, 21))
+        self.assertFalse(SubjectFingerprint.objects.filter(user=profile, subject="ELECTIVE I").exists())
+
+    def test_bulk_save_drops_removed_subjects(self):
+        bulk_save_attendance({"a": [make_record("MATHEMATICS", 15, 20, 75.0, "m1"),
+                                    make_record("ELECTIVE I", 2, 10, 20.0, "e1")],
+                              "b": [make_record("ELECTIVE I", 5, 10, 50.0, "e2")]})
+        bulk_save_attendance({"a": [make_record("MATHEMATICS", 15, 20, 75.0, "m1")],
+                              "b": [make_record("ELECTIVE I", 6, 11, 54.55, "e3")]})
+        self.assertEqual(sorted(SubjectFingerprint.objects.values_list("user__user__username", "subject")),
+                         [("a", "MATHEMATICS"), ("b", "ELECTIVE I")])
+        projection = AttendanceProjection.objects.get(user__user__username="a")
+        self.assertEqual([subject["subject"] for subject in projection.subjects], ["MATHEMATICS"])
@@ -0,0 +1,69 @@
+import builtins
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from attendance_dashboard import scheduler
+from attendance_dashboard.models import RefreshSchedule, UserProfile
+from attendance_dashboard.scheduler import claim_due_schedules, in_quiet_hours, record_result
+
+
+def utc(hour, minute=0):
+    return datetime(2026, 3, 2, hour, minute, tzinfo=dt_timezone.utc)
+
+
+@override_settings(REFRESH_TIMEZONE='Asia/Kolkata', REFRESH_QUIET_HOURS=(1, 6))
+class QuietHoursTests(SimpleTestCase):
+    def test_hours_are_read_in_the_portals_timezone(self):
+        self.assertTrue(in_quiet_hours(utc(20)))      # 01:30 IST
+        self.assertTrue(in_quiet_hours(utc(0)))       # 05:30 IST
+        self.assertFalse(in_quiet_hours(utc(19)))     # 00:30 IST
+        self.assertFalse(in_quiet_hours(utc(0, 30)))  # 06:00 IST, the end is exclusive
+
+    def test_window_wrapping_past_midnight(self):
+        self.assertTrue(in_quiet_hours(utc(17), quiet_hours=(22, 2)))  # 22:30 IST
+        self.assertTrue(in_quiet_hours(utc(20), quiet_hours=(22, 2)))  # 01:30 IST
+        self.assertFalse(in_quiet_hours(utc(21), quiet_hours=(22, 2))) # 02:30 IST
+
+    def test_disabled(self):
+        self.assertFalse(in_quiet_hours(utc(20), quiet_hours=()))
+
+
+@override_settings(REFRESH_JITTER=0, REFRESH_SLOW_SECONDS=90, REFRESH_MAX_BACKOFF=8.0)
+class ScheduleTests(TestCase):
+    def setUp(self):
+        profile = UserProfile.objects.create(user=User.objects.create(username='21b81a0501'))
+        self.schedule = RefreshSchedule.objects.create(user=profile, interval_minutes=60,
+                                                       next_run_at=timezone.now() - timedelta(minutes=1))
+
+    def test_failures_double_the_backoff_up_to_the_limit(self):
+        for expected in (2, 4, 8, 8):
+            record_result(self.schedule, 5.0, error=Exception("portal down"))
+            self.assertEqual(self.schedule.backoff, expected)
+        self.schedule.refresh_from_db()
+        self.assertEqual((self.schedule.consecutive_failures, self.schedule.last_error), (4, "portal down"))
+        self.assertAlmostEqual((self.schedule.next_run_at - self.schedule.last_run_at).total_seconds(), 8 * 3600, delta=1)
+
+    def test_slow_run_backs_off_and_healthy_runs_recover(self):
+        record_result(self.schedule, 120.0)
+        self.assertEqual(self.schedule.backoff, 2)
+        record_result(self.schedule, 10.0)
+        record_result(self.schedule, 10.0)
+        self.assertEqual((self.schedule.backoff, self.schedule.consecutive_failures), (1, 0))
+
+    def test_due_schedule_is_claimed_once(self):
+        [claimed] = claim_due_schedules(['21b81a0501'], 2)
+        self.assertGreater(claimed.next_run_at, timezone.now())
+        self.assertEqual(claim_due_schedules(['21b81a0501'], 2), [])
+
+    def test_schedule_claimed_by_another_scheduler_meanwhile_is_skipped(self):
+        def read_then_lose_the_race(rows):
+            rows = builtins.list(rows)
+            RefreshSchedule.objects.update(next_run_at=timezone.now() + timedelta(hours=1)) # The other scheduler's claim
+            return rows
+
+        with mock.patch.object(scheduler, 'list', read_then_lose_the_race, create=True):
+            self.assertEqual(claim_due_schedules(['21b81a0501'], 2), [])
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import time
+from unittest import mock
+
+from cryptography.fernet import Fernet
+from django.test import SimpleTestCase
+
+from scraper import sessions
+from scraper.sessions import SessionStore
+
+
+class SessionStoreTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.key = Fernet.generate_key()
+        self.store = SessionStore(self.key, directory=self.directory, max_age=60)
+        self.digest = self.store.credentials_digest("21b81a0501", "right")
+
+    def test_round_trip_is_encrypted_on_disk(self):
+        cookies = [{"name": "PHPSESSID", "value": "abc123"}]
+        self.store.save("21b81a0501", self.digest, cookies=cookies, token="secret-token", login_seconds=4.5)
+        session = self.store.load("21b81a0501", self.digest)
+        self.assertEqual((session["cookies"], session["token"], session["login_seconds"]), (cookies, "secret-token", 4.5))
+
+        [name] = os.listdir(self.directory)
+        with open(os.path.join(self.directory, name), "rb") as f:
+            raw = f.read()
+        self.assertNotIn(b"secret-token", raw)
+        self.assertNotIn(b"21b81a0501", raw + name.encode())
+
+    def test_other_credentials_do_not_restore_the_session(self):
+        self.store.save("21b81a0501", self.digest, token="secret-token")
+        wrong = self.store.credentials_digest("21b81a0501", "wrong")
+        self.assertIsNone(self.store.load("21b81a0501", wrong))
+        self.assertIsNotNone(self.store.load("21b81a0501", self.digest)) # Kept for the right password
+
+    def test_digest_depends_on_the_key(self):
+        other = SessionStore(Fernet.generate_key(), directory=self.directory)
+        self.assertNotEqual(other.credentials_digest("21b81a0501", "right"), self.digest)
+
+    def test_session_encrypted_with_another_key_is_discarded(self):
+        SessionStore(Fernet.generate_key(), directory=self.directory).save("21b81a0501", self.digest, token="t")
+        self.assertIsNone(self.store.load("21b81a0501", self.digest))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_expired_session_is_discarded(self):
+        self.store.save("21b81a0501", self.digest, token="t")
+        with mock.patch("scraper.sessions.time.time", return_value=time.time() + 61):
+            self.assertIsNone(self.store.load("21b81a0501", self.digest))
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+class GetSessionStoreTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        for name in ("_store", "_store_disabled"):
+            self.addCleanup(setattr, sessions, name, getattr(sessions, name))
+        sessions._store, sessions._store_disabled = None, False
+
+    def store_with(self, config, environ=None):
+        with mock.patch("scraper.sessions.get_config", return_value={"session_dir": self.directory, **config}), \
+                mock.patch.dict(os.environ, environ or {}, clear=True):
+            return sessions.get_session_store()
+
+    def test_malformed_key_disables_the_store(self):
+        with self.assertLogs(level="WARNING") as logs:
+            self.assertIsNone(self.store_with({"session_key": "not-a-fernet-key"}))
+        self.assertIn("Saved sessions are disabled", logs.output[0])
+        self.assertIsNone(self.store_with({"session_key": Fernet.generate_key().decode()})) # Reported once, stays off
+
+    def test_missing_key_disables_the_store(self):
+        with self.assertLogs(level="WARNING"):
+            self.assertIsNone(self.store_with({}))
+
+    def test_key_from_the_environment(self):
+        store = self.store_with({}, {sessions.SESSION_KEY_ENV: Fernet.generate_key().decode()})
+        self.assertIsInstance(store, SessionStore)
+        self.assertEqual(os.listdir(self.directory), []) # No key file written next to the sessions
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import threading
+from datetime import date
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from attendance_dashboard.models import AttendanceData
+
+from scraper.parser import make_record
+from scraper.storage import JsonlStorage, NullStorage, OrmStorage, close_storages, get_storage
+
+from . import LOCMEM_CACHES
+
+RECORDS = [make_record('MATHEMATICS', 18, 20, 90.0, 'a1'), make_record('NETWORKS LAB', 8, 10, 80.0, 'b1')]
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class OrmStorageTests(TestCase):
+    def test_save_and_load_known(self):
+        storage = OrmStorage()
+        attendance = storage.save('21b81a0501', RECORDS)
+        self.assertEqual((attendance.classes_attended, attendance.total_classes_conducted), (42, 50))
+        known = storage.load_known('21b81a0501')
+        self.assertEqual(known['NETWORKS LAB'].fingerprint, 'b1')
+        self.assertEqual(storage.load_known('21b81a0502'), {})
+
+    def test_save_many_writes_only_changed_accounts(self):
+        storage = OrmStorage()
+        self.assertEqual(storage.save_many({'21b81a0501': RECORDS, '21b81a0502': RECORDS[:1]}), 2)
+        self.assertEqual(storage.save_many({'21b81a0501': RECORDS, '21b81a0502': RECORDS}), 1)
+        self.assertEqual(AttendanceData.objects.get(user__user__username='21b81a0502', date=date.today()).classes_attended, 42)
+
+
+class JsonlStorageTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'attendance.jsonl')
+        self.storage = JsonlStorage(self.path)
+        self.addCleanup(self.storage.close)
+
+    def lines(self):
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_save_and_save_many_append_one_line_per_account(self):
+        entry = self.storage.save('21b81a0501', RECORDS)
+        self.assertEqual((entry['classes_attended'], entry['attendance_percentage']), (42, 84.0))
+        self.assertEqual(self.storage.save_many({'21b81a0502': RECORDS[:1], '21b81a0503': RECORDS}), 2)
+        self.storage.close()
+        self.storage.save('21b81a0501', RECORDS[:1]) # Reopens after close
+        lines = self.lines()
+        self.assertEqual([line['username'] for line in lines], ['21b81a0501', '21b81a0502', '21b81a0503', '21b81a0501'])
+        self.assertEqual(lines[0]['subjects'][1], {'subject': 'NETWORKS LAB', 'attended': 8, 'total': 10,
+                                                   'attendance_percentage': 80.0, 'multiplier': 3})
+        self.assertIsNone(self.storage.load_known('21b81a0501'))
+
+    def test_concurrent_writers_never_interleave_lines(self):
+        threads = [threading.Thread(target=lambda: [self.storage.save('21b81a0501', RECORDS) for _ in range(50)])
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.lines()), 200)
+
+
+class NullStorageTests(SimpleTestCase):
+    def test_counts_and_drops_entries(self):
+        storage = NullStorage()
+        self.assertEqual(storage.save('21b81a0501', RECORDS)['total_classes_conducted'], 50)
+        self.assertEqual(storage.save_many({'21b81a0502': RECORDS, '21b81a0503': RECORDS}), 2)
+        self.assertEqual(storage.saved, 3)
+        self.assertIsNone(storage.load_known('21b81a0501'))
+
+
+class GetStorageTests(SimpleTestCase):
+    def test_one_backend_per_name_and_unknown_names_rejected(self):
+        self.addCleanup(close_storages)
+        self.assertIs(get_storage('null'), get_storage('null'))
+        self.assertIsInstance(get_storage('orm'), OrmStorage)
+        with self.assertRaises(ValueError):
+            get_storage('s3')
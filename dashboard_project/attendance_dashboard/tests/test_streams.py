@@ -0,0 +1,52 @@
+import asyncio
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from attendance_dashboard import streams
+from attendance_dashboard.cache import get_attendance_versions, invalidate_attendance_cache
+
+from . import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AttendanceVersionTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear() # Other tests share the in-memory cache and bump versions too
+
+    def test_invalidation_only_moves_those_users_versions(self):
+        invalidate_attendance_cache([1, 2])
+        before = get_attendance_versions([1, 2, 3])
+        self.assertEqual(set(before), {1, 2})
+        invalidate_attendance_cache([2])
+        after = get_attendance_versions([1, 2, 3])
+        self.assertEqual(after[1], before[1])
+        self.assertNotEqual(after[2], before[2])
+
+
+class AttendanceBroadcasterTests(SimpleTestCase):
+    async def test_a_scrape_wakes_only_its_users_streams(self):
+        versions = {1: 'v1', 2: 'v1'}
+        payloads_read = []
+
+        def read_payloads(user_ids):
+            payloads_read.append(sorted(user_ids))
+            return {user_id: {'etag': versions[user_id], 'data': {}} for user_id in user_ids}
+
+        broadcaster = streams.AttendanceBroadcaster(poll_interval=0.01)
+        with mock.patch.object(streams, 'get_attendance_versions', lambda user_ids: {u: versions[u] for u in user_ids}), \
+                mock.patch.object(streams, 'get_latest_attendance_payloads', read_payloads):
+            alice_tabs = [broadcaster.subscribe(1), broadcaster.subscribe(1)]
+            bob = broadcaster.subscribe(2)
+            await asyncio.sleep(0.05)
+            versions[1] = 'v2' # A scrape saved alice's attendance
+            payloads = await asyncio.wait_for(asyncio.gather(*(queue.get() for queue in alice_tabs)), timeout=1)
+
+            self.assertEqual([payload['etag'] for payload in payloads], ['v2', 'v2'])
+            self.assertTrue(bob.empty())
+            self.assertEqual(payloads_read, [[1]]) # Read once for both of alice's tabs
+            for queue in alice_tabs:
+                broadcaster.unsubscribe(1, queue)
+            broadcaster.unsubscribe(2, bob)
+            await asyncio.wait_for(broadcaster._task, timeout=1) # The watcher stops with its last subscriber
@@ -0,0 +1,99 @@
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from attendance_dashboard.jobs import credentials_digest
+from attendance_dashboard.models import ScrapeJob
+from attendance_dashboard.views import SCRAPE_JOB_SESSION_KEY
+
+from scraper.parser import make_record
+from scraper.persistence import save_attendance_record
+
+from . import LOCMEM_CACHES
+
+
+def job_urls(job):
+    return (reverse('attendance_dashboard:scrape_job_status', args=[job.pk]),
+            reverse('attendance_dashboard:scrape_job_api', args=[job.pk]))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SignInAfterScrapeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='21b81a0501')
+        response = self.client.post(reverse('attendance_dashboard:erp_login'),
+                                     {'username': '21b81a0501', 'password': 'right'})
+        self.job = ScrapeJob.objects.get()
+        self.assertRedirects(response, job_urls(self.job)[0], fetch_redirect_response=False)
+
+    def finish(self, status):
+        ScrapeJob.objects.filter(pk=self.job.pk).update(status=status)
+
+    def test_succeeded_job_signs_the_submitting_browser_in(self):
+        self.finish(ScrapeJob.STATUS_SUCCEEDED)
+        response = self.client.get(job_urls(self.job)[1])
+        self.assertEqual(response.json()['status'], 'succeeded')
+        self.assertEqual(self.client.session[SESSION_KEY], str(self.user.pk))
+        self.assertEqual(self.client.get(job_urls(self.job)[1]).status_code, 200) # Still pollable after sign-in
+        self.assertEqual(self.client.get(reverse('attendance_dashboard:index')).status_code, 200)
+
+    def test_pending_or_failed_job_does_not_sign_in(self):
+        self.client.get(job_urls(self.job)[1])
+        self.assertNotIn(SESSION_KEY, self.client.session)
+        self.finish(ScrapeJob.STATUS_FAILED)
+        self.client.get(job_urls(self.job)[0])
+        self.assertNotIn(SESSION_KEY, self.client.session)
+        self.assertRedirects(self.client.get(reverse('attendance_dashboard:index')),
+                             reverse('attendance_dashboard:erp_login') + '?next=' + reverse('attendance_dashboard:index'))
+
+    def test_digest_mismatch_does_not_sign_in(self):
+        session = self.client.session
+        session[SCRAPE_JOB_SESSION_KEY] = {'job': self.job.pk, 'digest': credentials_digest('21b81a0501', 'wrong')}
+        session.save()
+        self.finish(ScrapeJob.STATUS_SUCCEEDED)
+        self.assertEqual(self.client.get(job_urls(self.job)[1]).status_code, 200)
+        self.assertNotIn(SESSION_KEY, self.client.session)
+
+    def test_job_of_another_browser_is_not_found(self):
+        self.finish(ScrapeJob.STATUS_SUCCEEDED)
+        for url in job_urls(self.job):
+            self.assertEqual(self.client_class().get(url).status_code, 404)
+
+    def test_other_credentials_are_not_attached_to_the_job_in_flight(self):
+        other = self.client_class()
+        response = other.post(reverse('attendance_dashboard:erp_login'), {'username': '21b81a0501', 'password': 'wrong'})
+        self.assertContains(response, 'already in progress')
+        self.assertNotIn(SCRAPE_JOB_SESSION_KEY, other.session)
+        self.finish(ScrapeJob.STATUS_SUCCEEDED)
+        self.assertEqual(other.get(job_urls(self.job)[1]).status_code, 404)
+        self.assertNotIn(SESSION_KEY, other.session)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PerUserDataTests(TestCase):
+    def setUp(self):
+        save_attendance_record('alice', [make_record('MATHEMATICS', 18, 20, 90.0, 'a1')])
+        save_attendance_record('bob', [make_record('PHYSICS', 5, 10, 50.0, 'b1'),
+                                       make_record('CHEMISTRY', 7, 10, 70.0, 'b2')])
+        self.client.force_login(User.objects.get(username='alice'))
+
+    def test_latest_attendance_is_the_signed_in_users(self):
+        data = self.client.get(reverse('attendance_dashboard:latest_attendance_api')).json()
+        self.assertEqual((data['classes_attended'], data['total_classes_conducted']), (18, 20))
+
+    def test_subject_endpoints_only_return_the_signed_in_users_subjects(self):
+        subjects = self.client.get(reverse('attendance_dashboard:subject_attendance_api')).json()['subjects']
+        self.assertEqual([subject['subject'] for subject in subjects], ['MATHEMATICS'])
+        projection = self.client.get(reverse('attendance_dashboard:attendance_projection_api'),
+                                     {'username': 'bob'}).json() # ?username= is for staff only
+        self.assertEqual([subject['subject'] for subject in projection['subjects']], ['MATHEMATICS'])
+
+    def test_index_shows_the_signed_in_users_numbers(self):
+        response = self.client.get(reverse('attendance_dashboard:index'))
+        self.assertEqual(response.context['attendance'].user.user.username, 'alice')
+
+    def test_anonymous_api_requests_are_refused(self):
+        self.client.logout()
+        for name in ('latest_attendance_api', 'subject_attendance_api', 'attendance_projection_api'):
+            self.assertEqual(self.client.get(reverse(f'attendance_dashboard:{name}')).status_code, 401)
@@ -6,5 +6,14 @@ app_name = 'attendance_dashboard'
 urlpatterns = [
     path('', views.index, name='index'),
     path('api/latest_attendance/', views.get_latest_attendance_data, name='latest_attendance_api'),
+    path('api/attendance_stream/', views.attendance_stream, name='attendance_stream'),
+    path('api/subject_attendance/', views.get_subject_attendance_data, name='subject_attendance_api'),
+    path('api/attendance_history/', views.get_attendance_history_data, name='attendance_history_api'),
+    path('api/attendance_projection/', views.get_attendance_projection_data, name='attendance_projection_api'),
+    path('api/cohort_attendance/', views.get_cohort_attendance_data, name='cohort_attendance_api'),
     path('login/', views.erp_login, name='erp_login'), # New login URL
+    path('logout/', views.erp_logout, name='erp_logout'),
+    path('jobs/<int:job_id>/', views.scrape_job_status, name='scrape_job_status'),
+    path('api/jobs/<int:job_id>/', views.get_scrape_job_data, name='scrape_job_api'),
+    path('api/jobs/metrics/', views.get_scrape_job_metrics, name='scrape_job_metrics_api'),
 ] 
\ No newline at end of file
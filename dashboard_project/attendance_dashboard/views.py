@@ -1,24 +1,36 @@
-from django.shortcuts import render, redirect
-from django.http import JsonResponse
-from .models import AttendanceData, UserProfile
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from .models import UserProfile, ScrapeJob, SubjectAttendance
 from .forms import UserProfileForm, LoginForm # Import LoginForm
-from django.contrib.auth.models import User 
-import logging # Import logging
-
-# Scraper related imports
-import sys
-import os
-# Adjust the path to import scraper.py
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from scraper import setup_driver, login, navigate_to_attendance_page, scrape_attendance, teardown_driver, driver, wait # Import scraper functions and global driver/wait
-
-# Configure scraper logging to output to console as well
-scraper_logger = logging.getLogger('scraper')
-scraper_logger.setLevel(logging.INFO)
-handler = logging.StreamHandler(sys.stdout)
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-handler.setFormatter(formatter)
-scraper_logger.addHandler(handler)
+from .jobs import credentials_digest, enqueue_scrape, job_metrics
+from .cache import attendance_status_of, get_latest_attendance_payload, latest_attendance_for
+from .history import MAX_PAGE_SIZE, PERIODS, attendance_series
+from .cohort import MAX_PAGE_SIZE as COHORT_MAX_PAGE_SIZE, cohort_page, cohort_queryset, iter_cohort, iter_cohort_csv
+from .projections import get_projection
+from .metrics import render_metrics
+from .streams import attendance_events
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from django.contrib.auth import login, logout
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_POST
+from datetime import date, timedelta
+from functools import wraps
+import json
+
+SCRAPE_JOB_SESSION_KEY = 'attendance_dashboard_scrape_job' # The job this browser submitted from erp_login
+
+def api_login_required(view):
+    # JSON endpoints answer 401 instead of redirecting to the login page
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'message': 'Log in with your ERP credentials first.'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
 
 def erp_login(request):
     if request.method == 'POST':
@@ -26,36 +38,80 @@ def erp_login(request):
         if form.is_valid():
             username = form.cleaned_data['username']
             password = form.cleaned_data['password']
-            
-            try:
-                logging.info("Attempting to run scraper from Django...")
-                # Call scraper functions
-                global driver # Declare driver as global to modify it
-                global wait   # Declare wait as global to modify it
-                driver, wait = setup_driver() # Setup the driver
-                login(username, password) # Use provided credentials
-                navigate_to_attendance_page()
-                scrape_attendance()
-                teardown_driver()
-                logging.info("Scraper run successfully. Redirecting to dashboard.")
-                return redirect('attendance_dashboard:index')
-            except Exception as e:
-                logging.error(f"Scraper run failed: {e}")
-                form.add_error(None, f"Scraping failed: {e}")
-                teardown_driver()
+
+            # The scrape itself runs in a run_scrape_worker process; just queue it and return
+            job, created = enqueue_scrape(username, password)
+            digest = credentials_digest(username, password)
+            if created or constant_time_compare(digest, job.credentials_digest):
+                request.session[SCRAPE_JOB_SESSION_KEY] = {'job': job.pk, 'digest': digest}
+                return redirect('attendance_dashboard:scrape_job_status', job_id=job.pk)
+            # Another browser's job with other credentials is in flight; it is not this one's to watch
+            form.add_error(None, "A refresh for this account is already in progress. Try again once it finishes.")
     else:
         form = LoginForm()
     return render(request, 'attendance_dashboard/erp_login.html', {'form': form})
 
-def index(request):
-    # Get or create the first superuser as the dashboard user
-    # In a real application, you would use request.user for authenticated users
-    user, created = User.objects.get_or_create(username='dashboard_user', defaults={'is_superuser': True, 'is_staff': True, 'email': 'dashboard@example.com'})
-    if created:
-        user.set_password('defaultpassword') # Set a default password for the superuser
-        user.save()
+@require_POST
+def erp_logout(request):
+    logout(request)
+    return redirect('attendance_dashboard:erp_login')
+
+def _submitted_scrape_job(request, job_id):
+    # A job is only shown to the browser that submitted it from erp_login; to everyone else
+    # its sequential id does not exist
+    submitted = request.session.get(SCRAPE_JOB_SESSION_KEY)
+    if not submitted or submitted['job'] != job_id:
+        raise Http404("No such scrape job.")
+    return get_object_or_404(ScrapeJob, pk=job_id)
+
+def _sign_in_after_scrape(request, job):
+    # The portal accepting the credentials this browser submitted is what signs it in to the
+    # dashboard as that ERP user; run_job always logs in with them (fresh_login), so a
+    # succeeded job means the portal checked the password
+    submitted = request.session[SCRAPE_JOB_SESSION_KEY]
+    if (job.status != ScrapeJob.STATUS_SUCCEEDED or request.user.get_username() == job.username
+            or not constant_time_compare(submitted['digest'], job.credentials_digest)):
+        return
+    user = User.objects.filter(username=job.username).first()
+    if user is not None:
+        login(request, user, backend='django.contrib.auth.backends.ModelBackend') # Keeps the session's job, so the page can still poll it
+
+def scrape_job_status(request, job_id):
+    job = _submitted_scrape_job(request, job_id)
+    _sign_in_after_scrape(request, job)
+    return render(request, 'attendance_dashboard/job_status.html', {'job': job})
+
+def get_scrape_job_data(request, job_id):
+    job = _submitted_scrape_job(request, job_id)
+    _sign_in_after_scrape(request, job) # Done before the page's poll sees 'succeeded' and opens the dashboard
+    data = {
+        'id': job.pk,
+        'username': job.username,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'error': job.error,
+        'queue_seconds': job.queue_seconds,
+        'run_seconds': job.run_seconds,
+    }
+    return JsonResponse(data)
+
+def get_scrape_job_metrics(request):
+    return JsonResponse(job_metrics())
 
-    user_profile, created = UserProfile.objects.get_or_create(user=user)
+def metrics(request):
+    # Prometheus scrape target
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@login_required(login_url='attendance_dashboard:erp_login')
+def index(request):
+    # The user's latest snapshot and their profile come from one query; only a user with no
+    # snapshot yet needs a second one for the profile
+    latest_attendance = latest_attendance_for(request.user.pk)
+    if latest_attendance is not None:
+        user_profile = latest_attendance.user
+    else:
+        user_profile, created = UserProfile.objects.get_or_create(user=request.user)
 
     if request.method == 'POST':
         form = UserProfileForm(request.POST, instance=user_profile)
@@ -65,44 +121,180 @@ def index(request):
     else:
         form = UserProfileForm(instance=user_profile)
 
-    latest_attendance = AttendanceData.objects.order_by('-timestamp').first()
-
-    attendance_status = "N/A"
-    if latest_attendance and user_profile:
-        if latest_attendance.attendance_percentage >= user_profile.attendance_goal:
-            attendance_status = "Above Target"
-        else:
-            attendance_status = "Below Target"
-
     context = {
         'attendance': latest_attendance,
         'form': form, # Pass the UserProfileForm to the template
-        'attendance_status': attendance_status,
+        'user_profile': user_profile,
+        'attendance_status': attendance_status_of(latest_attendance, user_profile),
         'attendance_goal': user_profile.attendance_goal
     }
     return render(request, 'attendance_dashboard/index.html', context)
 
+def _latest_attendance_payload(request):
+    # Memoised on the request so the ETag and body share one cache read
+    if not hasattr(request, '_latest_attendance_payload'):
+        request._latest_attendance_payload = get_latest_attendance_payload(request.user.pk)
+    return request._latest_attendance_payload
+
+@api_login_required
+@condition(etag_func=lambda request: _latest_attendance_payload(request)['etag'])
 def get_latest_attendance_data(request):
-    latest_attendance = AttendanceData.objects.order_by('-timestamp').first()
-    # Assume a single user for simplicity; in a real app, use request.user
-    user_profile = UserProfile.objects.first() 
-
-    data = {}
-    if latest_attendance and user_profile:
-        attendance_status = "N/A"
-        if latest_attendance.attendance_percentage >= user_profile.attendance_goal:
-            attendance_status = "Above Target"
-        else:
-            attendance_status = "Below Target"
-
-        data = {
-            'total_classes_conducted': latest_attendance.total_classes_conducted,
-            'classes_attended': latest_attendance.classes_attended,
-            'attendance_percentage': float(latest_attendance.attendance_percentage), # Convert Decimal to float for JSON
-            'timestamp': latest_attendance.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            'attendance_goal': float(user_profile.attendance_goal),
-            'attendance_status': attendance_status
-        }
-    else:
-        data = {'message': 'No attendance data available yet.'}
+    response = JsonResponse(_latest_attendance_payload(request)['data'])
+    patch_cache_control(response, no_cache=True) # Browsers revalidate with If-None-Match on every poll
+    return response
+
+async def attendance_stream(request):
+    # Server-Sent Events; serve through the ASGI app (VmedulifeDashboard.asgi) so idle
+    # connections don't each hold a worker thread
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI the stream would pin a worker thread for good; 204 tells EventSource not
+        # to reconnect, and the page falls back to polling
+        return HttpResponse(status=204)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'message': 'Log in with your ERP credentials first.'}, status=401)
+    response = StreamingHttpResponse(
+        attendance_events(user.pk, request.headers.get('Last-Event-ID')),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no' # Stop reverse proxies from buffering the stream
+    return response
+
+@api_login_required
+def get_subject_attendance_data(request):
+    # Per-subject numbers for the latest snapshot plus each subject's recent history
+    latest_attendance = latest_attendance_for(request.user.pk)
+    if latest_attendance is None or latest_attendance.user is None:
+        return JsonResponse({'message': 'No attendance data available yet.'})
+
+    try:
+        days = max(1, min(int(request.GET.get('days', 30)), 365))
+    except ValueError:
+        days = 30
+    since = latest_attendance.date - timedelta(days=days - 1)
+
+    rows = (SubjectAttendance.objects
+            .filter(user=latest_attendance.user, date__gte=since)
+            .order_by('subject', 'date')
+            .values('subject', 'date', 'attended', 'total', 'attendance_percentage', 'multiplier'))
+
+    subjects = {}
+    for row in rows:
+        subject = subjects.setdefault(row['subject'], {'subject': row['subject'], 'history': []})
+        subject.update({
+            'attended': row['attended'],
+            'total': row['total'],
+            'attendance_percentage': float(row['attendance_percentage']),
+            'multiplier': row['multiplier'],
+            'date': row['date'].isoformat(),
+        })
+        subject['history'].append({
+            'date': row['date'].isoformat(),
+            'attended': row['attended'],
+            'total': row['total'],
+            'attendance_percentage': float(row['attendance_percentage']),
+        })
+
+    data = {
+        'date': latest_attendance.date.isoformat(),
+        'days': days,
+        'subjects': list(subjects.values()),
+    }
+    return JsonResponse(data)
+
+def _int_param(request, name, default, low, high):
+    try:
+        return max(low, min(int(request.GET.get(name, default)), high))
+    except ValueError:
+        return default
+
+def _date_param(request, name):
+    try:
+        return date.fromisoformat(request.GET[name]) if request.GET.get(name) else None
+    except ValueError:
+        return None
+
+def _requested_profile(request):
+    # The signed-in user's profile; staff may look at anyone's with ?username=
+    profiles = UserProfile.objects.select_related('user')
+    username = request.GET.get('username')
+    if username and request.user.is_staff:
+        return profiles.filter(user__username=username).first()
+    return profiles.filter(user=request.user).first()
+
+@api_login_required
+def get_attendance_history_data(request):
+    # Daily, weekly or monthly attendance series with skip/attend projections, newest first.
+    # ?period=daily|weekly|monthly&page=1&page_size=30&since=YYYY-MM-DD&until=YYYY-MM-DD (&username= for staff)
+    period = request.GET.get('period', 'daily')
+    if period not in PERIODS:
+        return JsonResponse({'message': f"Unknown period '{period}'. Use one of: {', '.join(PERIODS)}."}, status=400)
+
+    user_profile = _requested_profile(request)
+    if user_profile is None:
+        return JsonResponse({'message': 'No attendance data available yet.'})
+
+    data = attendance_series(
+        user_profile,
+        period=period,
+        page=_int_param(request, 'page', 1, 1, 100000),
+        page_size=_int_param(request, 'page_size', 30, 1, MAX_PAGE_SIZE),
+        since=_date_param(request, 'since'),
+        until=_date_param(request, 'until'),
+    )
+    return JsonResponse(data)
+
+@api_login_required
+def get_attendance_projection_data(request):
+    # Classes that can be missed or must be attended to meet the goal, overall and per subject.
+    # Precomputed when a scrape lands (see projections.py), so this is a single row read.
+    user_profile = _requested_profile(request)
+    projection = get_projection(user_profile) if user_profile else None
+    if projection is None:
+        return JsonResponse({'message': 'No attendance data available yet.'})
+
+    data = {
+        'username': user_profile.user.username,
+        'date': projection.date.isoformat(),
+        'attendance_goal': float(projection.attendance_goal),
+        'total_classes_conducted': projection.total_classes_conducted,
+        'classes_attended': projection.classes_attended,
+        'attendance_percentage': float(projection.attendance_percentage),
+        'can_skip': projection.can_skip,
+        'must_attend': projection.must_attend,
+        'subjects': projection.subjects,
+        'computed_at': projection.computed_at.strftime('%Y-%m-%d %H:%M:%S'),
+    }
     return JsonResponse(data)
+
+COHORT_FORMATS = ('json', 'ndjson', 'csv')
+
+@api_login_required
+def get_cohort_attendance_data(request):
+    # Latest attendance, goal and status of many users in one response, for advisors (staff only).
+    # ?usernames=a,b,c and/or ?prefix=<roll number prefix> select the cohort (everyone if neither);
+    # ?format=json pages with &page=&page_size=, while ndjson and csv stream the whole cohort.
+    if not request.user.is_staff:
+        return JsonResponse({'message': 'Only staff can view cohort attendance.'}, status=403)
+    output = request.GET.get('format', 'json')
+    if output not in COHORT_FORMATS:
+        return JsonResponse({'message': f"Unknown format '{output}'. Use one of: {', '.join(COHORT_FORMATS)}."}, status=400)
+
+    usernames = [name.strip() for name in request.GET.get('usernames', '').split(',') if name.strip()]
+    queryset = cohort_queryset(usernames=usernames, prefix=request.GET.get('prefix'))
+
+    if output == 'json':
+        return JsonResponse(cohort_page(
+            queryset,
+            page=_int_param(request, 'page', 1, 1, 100000),
+            page_size=_int_param(request, 'page_size', 100, 1, COHORT_MAX_PAGE_SIZE),
+        ))
+    if output == 'ndjson':
+        response = StreamingHttpResponse((json.dumps(record) + '\n' for record in iter_cohort(queryset)),
+                                         content_type='application/x-ndjson')
+    else:
+        response = StreamingHttpResponse(iter_cohort_csv(queryset), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="cohort_attendance.csv"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,82 @@
+// Stand-in for the portal's Angular app: the same page flow and element ids the scraper
+// relies on, driven by the recorded XHR responses served next to it.
+function token() {
+    return window.localStorage.getItem('token');
+}
+
+function api(path) {
+    return fetch(path, {headers: {'Authorization': 'Bearer ' + token()}}).then((response) => {
+        if (response.status === 401) {
+            window.localStorage.removeItem('token');
+            window.location.href = '/public/auth/#/login/Cvr-Telangana';
+            throw new Error('unauthorized');
+        }
+        return response.json();
+    });
+}
+
+function portalLogin() {
+    fetch('/api/auth/login', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({
+            username: document.getElementById('username').value,
+            password: document.getElementById('password').value,
+        }),
+    }).then((response) => response.json()).then((data) => {
+        window.localStorage.setItem('token', data.token);
+        window.location.href = '/dashboard/';
+    }).catch(() => {
+        document.getElementById('login-error').textContent = 'Login failed';
+    });
+}
+
+function loadDashboard() {
+    if (!token()) {
+        window.location.href = '/public/auth/#/login/Cvr-Telangana';
+        return;
+    }
+    api('/api/student/attendance/groups').then(() => {
+        const loaded = document.createElement('div');
+        loaded.id = 'dashboard-loaded';
+        loaded.textContent = 'Welcome';
+        document.body.insertBefore(loaded, document.body.firstChild);
+        route();
+    });
+    window.addEventListener('hashchange', route);
+}
+
+function openModulesMenu() {
+    document.getElementById('modules-menu').innerHTML =
+        '<a id="attendance-link" href="#/attendance">Academic Planning</a>';
+}
+
+function route() {
+    if (window.location.hash !== '#/attendance') return;
+    api('/api/student/attendance/groups').then((data) => {
+        document.getElementById('view').innerHTML = data.groups.map((group, index) =>
+            '<div class="group-card"><h3>' + group.name + '</h3>' +
+            '<button class="btn" onclick="openGroup(' + index + ')">View Subjects</button></div>'
+        ).join('');
+    });
+}
+
+function openGroup(index) {
+    Promise.all([api('/api/student/attendance/groups'), api('/api/student/attendance/subjects')]).then(([groups, subjects]) => {
+        const ids = groups.groups[index].subjects;
+        const cards = subjects.subjects.filter((subject) => ids.includes(subject.id)).map((subject) =>
+            '<div class="subject-card"><h4>' + subject.name + '</h4>' +
+            '<div id="viewSession_' + subject.id + '"><img src="/assets/Ring-Preloader.gif" width="20"></div></div>'
+        ).join('');
+        const old = document.getElementById('group-subjects-modal');
+        if (old) old.remove();
+        const modal = document.createElement('div');
+        modal.id = 'group-subjects-modal';
+        modal.innerHTML = '<div id="group-subject-list">' + cards + '</div>';
+        document.body.appendChild(modal);
+        ids.forEach((id) => api('/api/student/attendance/subjects/' + id).then((data) => {
+            document.getElementById('viewSession_' + id).innerHTML =
+                'Present session ' + data.present + ' out of ' + data.total + ' | Percentage ' + data.percentage + '%';
+        }));
+    });
+}
@@ -0,0 +1,45 @@
+import importlib
+
+# ERP attendance scraper. Importing the package is cheap: config.json and selectors.json
+# are read on first use, Django is set up by scraper.persistence and Selenium is loaded by
+# scraper.browser, and neither module is imported until one of its functions is needed.
+#
+#   python -m scraper                  scrape the account in config.json
+#   python -m scraper.batch            scrape many accounts in parallel
+#   python -m scraper.bench_startup    measure cold import time of the CLI and web app
+
+_EXPORTS = {
+    'run_scrape': 'core',
+    'fetch_attendance_records': 'core',
+    'scrape_attendance': 'core',
+    'main': 'core',
+    'setup_driver': 'browser',
+    'teardown_driver': 'browser',
+    'get_driver_pool': 'browser',
+    'login': 'browser',
+    'navigate_to_attendance_page': 'browser',
+    'extract_attendance': 'browser',
+    'save_attendance_record': 'persistence',
+    'bulk_save_attendance': 'persistence',
+    'load_known_records': 'persistence',
+    'get_storage': 'storage',
+    'read_json_file': 'conf',
+    'get_config': 'conf',
+    'get_selectors': 'conf',
+    'update_config': 'conf',
+    'update_selectors': 'conf',
+}
+
+
+def __getattr__(name):
+    # Resolves scraper.<name> by importing the submodule that defines it on first access
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
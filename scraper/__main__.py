@@ -0,0 +1,5 @@
+from .conf import configure_logging
+from .core import main
+
+configure_logging()
+main()
@@ -0,0 +1,126 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .tracing import in_current_context, record_retry, span
+
+# Defaults for the "api" section of config.json. The paths and field names mirror the
+# XHR calls the portal's Angular app makes; override them if the portal changes.
+DEFAULT_API_CONFIG = {
+    "base_url": "https://portal.vmedulife.com",
+    "login_path": None,                  # Set to log in over HTTP; otherwise the token is captured from Selenium
+    "subjects_path": "/api/student/attendance/subjects",
+    "subject_attendance_path": "/api/student/attendance/subjects/{id}",
+    "token_storage_key": "token",        # localStorage key holding the session token in the browser
+    "token_field": "token",              # Key holding the token in the login response
+    "token_header": "Authorization",
+    "token_prefix": "Bearer ",
+    "subject_list_key": "subjects",      # None if the subjects endpoint returns a bare list
+    "subject_id_field": "id",
+    "subject_name_field": "name",
+    "attended_field": "present",
+    "total_field": "total",
+    "percentage_field": "percentage",
+    "timeout": 10,
+    "max_workers": 8,                    # Parallel per-subject requests (also the connection pool size)
+}
+
+
+class PortalApiError(Exception):
+    pass
+
+
+class PortalSessionExpired(PortalApiError):
+    pass
+
+
+class PortalApiClient:
+    def __init__(self, api_config=None, token=None, cookies=None):
+        self.config = {**DEFAULT_API_CONFIG, **(api_config or {})}
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.config["max_workers"],
+            # Only idempotent methods (urllib3's default set) are retried, so a login POST is never replayed
+            max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504)),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        for cookie in cookies or []:
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+        self.token = None
+        self.restored_from = None # Saved session this client was built from, until its first fetch succeeds
+        if token:
+            self.set_token(token)
+
+    @classmethod
+    def from_driver(cls, driver, api_config=None):
+        # Reuse the session of a browser that has already logged in
+        client = cls(api_config, cookies=driver.get_cookies())
+        token = driver.execute_script("return window.localStorage.getItem(arguments[0]);", client.config["token_storage_key"])
+        if not token:
+            raise PortalApiError(f"No session token found in localStorage key '{client.config['token_storage_key']}'.")
+        client.set_token(token.strip('"'))
+        return client
+
+    def set_token(self, token):
+        self.token = token
+        self.session.headers[self.config["token_header"]] = f"{self.config['token_prefix']}{token}"
+
+    def login(self, username, password):
+        if not self.config["login_path"]:
+            raise PortalApiError("No api.login_path configured; log in through the browser instead.")
+        data = self._request("POST", self.config["login_path"], json={"username": username, "password": password})
+        token = data.get(self.config["token_field"]) if isinstance(data, dict) else None
+        if not token:
+            raise PortalApiError("Login response did not contain a session token.")
+        self.set_token(token)
+        logging.info("Logged in to the portal API.")
+
+    def fetch_subjects(self):
+        data = self._request("GET", self.config["subjects_path"])
+        if self.config["subject_list_key"]:
+            data = data.get(self.config["subject_list_key"], [])
+        return data
+
+    def fetch_subject_attendance(self, subject):
+        path = self.config["subject_attendance_path"].format(id=subject[self.config["subject_id_field"]])
+        with span("api_subject", subject=str(subject.get(self.config["subject_name_field"], ""))):
+            data = self._request("GET", path)
+        return {
+            "name": subject[self.config["subject_name_field"]],
+            "attended": int(data[self.config["attended_field"]]),
+            "total": int(data[self.config["total_field"]]),
+            "percentage": float(data.get(self.config["percentage_field"]) or 0),
+        }
+
+    def fetch_attendance(self):
+        # One request for the subject list, then every subject concurrently over the pooled session
+        subjects = self.fetch_subjects()
+        if not subjects:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.config["max_workers"], len(subjects))) as executor:
+            return list(executor.map(in_current_context(self.fetch_subject_attendance), subjects))
+
+    def close(self):
+        self.session.close()
+
+    def _request(self, method, path, **kwargs):
+        url = self.config["base_url"].rstrip("/") + path
+        try:
+            response = self.session.request(method, url, timeout=self.config["timeout"], **kwargs)
+        except requests.RequestException as e:
+            raise PortalApiError(f"{method} {path} failed: {e}") from e
+        if response.raw is not None and response.raw.retries is not None:
+            record_retry(len(response.raw.retries.history)) # Retries urllib3 made for this request
+        if response.status_code in (401, 403):
+            raise PortalSessionExpired(f"{method} {path} was rejected with {response.status_code}; the session has expired.")
+        if not response.ok:
+            raise PortalApiError(f"{method} {path} returned {response.status_code}.")
+        try:
+            return response.json()
+        except ValueError as e:
+            raise PortalApiError(f"{method} {path} did not return JSON.") from e
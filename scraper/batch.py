@@ -0,0 +1,145 @@
+import argparse
+import logging
+import multiprocessing.util
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from .conf import configure_logging, get_config, get_selectors, read_json_file, setup_django, update_config
+from .core import fetch_attendance_records, traced
+from .sessions import session_stats
+from .storage import STORAGE_BACKENDS, close_storages, get_storage
+
+# Scrapes many ERP accounts in parallel. Each worker owns its own browser (threads borrow
+# separate drivers from the pool, processes each get a pool of one) and failures are isolated
+# per account. Results are written to the configured storage (see scraper/storage.py) in bulk
+# every SAVE_EVERY accounts as they finish, so a run over thousands of accounts only ever
+# holds one chunk of records.
+#
+# The credentials file is a JSON list: [{"username": "...", "password": "..."}, ...]
+SAVE_EVERY = 100
+
+
+@dataclass
+class AccountResult:
+    username: str
+    status: str # "ok", "empty" or "failed"
+    seconds: float
+    records: list = field(default_factory=list)
+    error: str = ""
+
+
+def scrape_account(username, password):
+    started = time.perf_counter()
+    try:
+        with traced(username) as trace:
+            records = fetch_attendance_records(username, password)
+            if not records:
+                trace.status = "empty"
+    except Exception as e:
+        return AccountResult(username, "failed", time.perf_counter() - started, error=str(e))
+    status = "ok" if records else "empty"
+    return AccountResult(username, status, time.perf_counter() - started, records=records)
+
+
+def close_driver_pool():
+    # Selenium is only imported for the "selenium" backend, so API batches never load it
+    if (get_config() or {}).get("backend", "selenium") == "selenium":
+        from .browser import get_driver_pool
+        get_driver_pool().close()
+
+
+def _init_process_worker():
+    # One browser per worker process, quit when the process exits
+    update_config(driver_pool_size=1)
+    multiprocessing.util.Finalize(None, close_driver_pool, exitpriority=10)
+
+
+def run_batch(credentials, workers=4, mode="threads", storage=None, save_every=SAVE_EVERY):
+    storage = storage or get_storage()
+    if mode == "processes":
+        setup_django()
+        from django.db import connections
+        connections.close_all() # Don't hand open DB connections to forked workers
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_process_worker)
+    else:
+        update_config(driver_pool_size=workers)
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+    results = []
+    pending = {} # username -> records not saved yet
+    with executor:
+        futures = {executor.submit(scrape_account, account["username"], account["password"]): account["username"]
+                   for account in credentials}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e: # e.g. a worker process crashed
+                result = AccountResult(futures[future], "failed", 0.0, error=str(e))
+            logging.info(f"{result.username}: {result.status} in {result.seconds:.1f}s {result.error}".rstrip())
+            if result.status == "ok":
+                pending[result.username] = result.records
+                result.records = [] # Only the summary is kept once the records are handed to storage
+            results.append(result)
+            if len(pending) >= save_every:
+                save_results(storage, pending)
+                pending = {}
+    save_results(storage, pending)
+    return results
+
+
+def save_results(storage, records_by_username):
+    if not records_by_username:
+        return 0
+    return storage.save_many(records_by_username)
+
+
+def print_summary(results, elapsed, sessions=None):
+    counts = {status: sum(1 for result in results if result.status == status) for status in ("ok", "empty", "failed")}
+    print(f"{'Account':30s} {'Status':8s} {'Seconds':>8s}  Error")
+    for result in sorted(results, key=lambda result: result.username):
+        print(f"{result.username:30s} {result.status:8s} {result.seconds:8.1f}  {result.error}")
+    rate = len(results) / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"\n{len(results)} account(s) in {elapsed:.1f}s ({rate:.1f} accounts/minute): "
+          f"{counts['ok']} ok, {counts['empty']} empty, {counts['failed']} failed")
+    if sessions and sessions["restored"] + sessions["full_logins"]:
+        print(f"Logins skipped: {sessions['restored']} of {sessions['restored'] + sessions['full_logins']} "
+              f"({sessions['login_skip_rate']:.0%}), ~{sessions['seconds_saved']:.1f}s saved; "
+              f"{sessions['expired']} saved session(s) had expired")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape attendance for many ERP accounts in parallel.")
+    parser.add_argument("credentials_file", help="JSON list of {\"username\", \"password\"} objects.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--mode", choices=("threads", "processes"), default="threads")
+    parser.add_argument("--storage", choices=STORAGE_BACKENDS, help="Overrides config.json \"storage\" (default orm).")
+    parser.add_argument("--storage-path", help="File the jsonl storage appends to.")
+    parser.add_argument("--save-every", type=int, default=SAVE_EVERY, help="Accounts per bulk write.")
+    args = parser.parse_args()
+
+    configure_logging()
+    if args.storage:
+        update_config(storage=args.storage)
+    if args.storage_path:
+        update_config(storage_path=args.storage_path)
+    credentials = read_json_file(args.credentials_file)
+    if not credentials:
+        logging.error("No credentials to scrape. Exiting.")
+        return
+    if get_selectors() is None and (get_config() or {}).get("backend", "selenium") == "selenium":
+        logging.error("Selectors file could not be loaded. Exiting.")
+        return
+
+    started = time.perf_counter()
+    try:
+        results = run_batch(credentials, workers=args.workers, mode=args.mode, save_every=args.save_every)
+    finally:
+        close_driver_pool()
+        close_storages()
+    # Process workers keep their own session stats, so they are only reported for threads
+    print_summary(results, time.perf_counter() - started, session_stats() if args.mode == "threads" else None)
+
+
+if __name__ == "__main__":
+    main()
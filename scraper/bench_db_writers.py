@@ -0,0 +1,152 @@
+import argparse
+import logging
+import multiprocessing
+import random
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+from .bench_pipeline import summarize
+from .conf import setup_django
+
+# Stress test for concurrent writers on SQLite. Separate processes act as the dashboard's
+# writers all at once against a scratch database:
+#   worker - save_attendance_record() for one account at a time, like the scrape worker and
+#            the refresh scheduler
+#   batch  - bulk_save_attendance() for a group of accounts, like scraper.batch
+#   web    - latest-attendance reads with the occasional goal change, like dashboard requests
+# Reports operations, latency and errors per role for the tuned settings (WAL, IMMEDIATE
+# transactions, busy_timeout; see DATABASES in settings.py) and Django's plain SQLite defaults.
+#
+#   python -m scraper.bench_db_writers --workers 4 --batch-runners 2 --web 4 --duration 20
+#
+# Nothing touches the dashboard's own database or cache.
+MODES = ("tuned", "default")
+SUBJECTS = ("MATHEMATICS", "PHYSICS", "CHEMISTRY", "ENGLISH", "PROGRAMMING LAB")
+
+
+def use_scratch_database(db_path, cache_dir, mode):
+    # Points this process's Django at the scratch database before its first connection
+    setup_django()
+    from django.conf import settings
+    database = settings.DATABASES["default"]
+    database["NAME"] = db_path
+    if mode == "default":
+        database["OPTIONS"] = {} # Rollback journal, DEFERRED transactions, 5s timeout
+    settings.CACHES["default"]["LOCATION"] = cache_dir
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def make_records(rng):
+    from .parser import make_record
+    records = []
+    for name in SUBJECTS:
+        total = rng.randint(40, 60)
+        attended = rng.randint(total // 2, total)
+        records.append(make_record(name, attended, total, attended / total * 100, f"{name}-{attended}-{total}"))
+    return records
+
+
+def run_role(role, index, db_path, cache_dir, mode, usernames, duration, batch_size):
+    use_scratch_database(db_path, cache_dir, mode)
+    from django.db import OperationalError, close_old_connections
+
+    from attendance_dashboard.cache import get_latest_attendance_payload, invalidate_attendance_cache
+    from attendance_dashboard.models import UserProfile
+    from .persistence import bulk_save_attendance, save_attendance_record
+
+    rng = random.Random(f"{role}-{index}")
+    profiles = list(UserProfile.objects.filter(user__username__in=usernames).values_list("pk", "user_id"))
+    timings = []
+    errors = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            if role == "worker":
+                save_attendance_record(rng.choice(usernames), make_records(rng))
+            elif role == "batch":
+                bulk_save_attendance({username: make_records(rng) for username in rng.sample(usernames, batch_size)})
+            elif rng.random() < 0.1:
+                profile = UserProfile.objects.get(pk=rng.choice(profiles)[0])
+                profile.attendance_goal = rng.choice((65, 75, 85))
+                profile.save()
+            else:
+                user_id = rng.choice(profiles)[1]
+                invalidate_attendance_cache([user_id]) # Every read goes to the database
+                get_latest_attendance_payload(user_id)
+        except OperationalError as e:
+            errors[str(e)] += 1
+        except Exception as e:
+            errors[type(e).__name__] += 1
+        else:
+            timings.append(time.perf_counter() - started)
+    close_old_connections()
+    return role, timings, errors
+
+
+def prepare(db_path, cache_dir, mode, usernames):
+    use_scratch_database(db_path, cache_dir, mode)
+    from django.core.management import call_command
+    from django.db import connections
+    from .persistence import bulk_save_attendance
+    call_command("migrate", verbosity=0)
+    bulk_save_attendance({username: make_records(random.Random(username)) for username in usernames})
+    connections.close_all()
+
+
+def run_mode(mode, args):
+    # Django is only ever set up in the spawned processes, each pointed at this mode's scratch files
+    scratch = tempfile.mkdtemp(prefix="bench_db_writers-")
+    db_path, cache_dir = f"{scratch}/db.sqlite3", f"{scratch}/cache"
+    usernames = [f"writer-bench-{i}" for i in range(args.accounts)]
+    roles = ["worker"] * args.workers + ["batch"] * args.batch_runners + ["web"] * args.web
+    tasks = [(role, index, db_path, cache_dir, mode, usernames, args.duration, args.batch_size)
+             for index, role in enumerate(roles)]
+    try:
+        with multiprocessing.get_context("spawn").Pool(len(tasks)) as pool:
+            pool.apply(prepare, (db_path, cache_dir, mode, usernames))
+            results = pool.starmap(run_role, tasks)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    print(f"\n{mode} SQLite settings, {len(tasks)} processes for {args.duration}s:")
+    total_errors = 0
+    for role in ("worker", "batch", "web"):
+        timings = [t for name, role_timings, _ in results if name == role for t in role_timings]
+        errors = Counter()
+        for name, _, role_errors in results:
+            if name == role:
+                errors.update(role_errors)
+        total_errors += sum(errors.values())
+        if not timings and not errors:
+            continue
+        line = f"  {role:6s} {len(timings):6d} ops {len(timings) / args.duration:7.1f}/s"
+        if timings:
+            stats = summarize(timings)
+            line += f"  p50 {stats['p50'] * 1000:7.1f}ms  p95 {stats['p95'] * 1000:7.1f}ms  max {stats['max'] * 1000:7.1f}ms"
+        print(line + f"  {sum(errors.values())} error(s)")
+        for message, count in errors.most_common():
+            print(f"         {count:6d} x {message}")
+    return total_errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stress concurrent SQLite writers with the dashboard's save paths.")
+    parser.add_argument("--workers", type=int, default=4, help="Processes saving one account at a time.")
+    parser.add_argument("--batch-runners", type=int, default=2, help="Processes bulk-saving groups of accounts.")
+    parser.add_argument("--web", type=int, default=4, help="Processes reading and changing goals.")
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per mode.")
+    parser.add_argument("--mode", choices=MODES + ("both",), default="both")
+    args = parser.parse_args(argv)
+
+    modes = MODES if args.mode == "both" else (args.mode,)
+    errors = {mode: run_mode(mode, args) for mode in modes}
+    return 1 if errors.get("tuned") else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
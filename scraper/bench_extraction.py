@@ -0,0 +1,92 @@
+import argparse
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from . import browser
+from .conf import configure_logging, update_selectors
+
+# Compares the per-card and single-pass extraction modes of scrape_attendance on a
+# generated copy of the subject list, where each card's preloader is swapped for its
+# attendance summary after a random delay (as the portal's per-subject XHRs do).
+BENCH_SELECTORS = {"subject_attendance_info": "[id^='viewSession_']"}
+
+CARD_TEMPLATE = """
+<div class="subject-card">
+    <h4>Subject {i}{lab}</h4>
+    <div id="viewSession_{i}"><img src="assets/Ring-Preloader.gif" width="20"></div>
+</div>"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><body>
+<div id="group-subjects-modal"><div id="group-subject-list">{cards}
+</div></div>
+<script>
+const loads = {loads};
+loads.forEach(([i, delay, attended, total]) => setTimeout(() => {{
+    const percentage = (attended / total * 100).toFixed(2);
+    document.getElementById('viewSession_' + i).innerHTML =
+        'Present session <b>' + attended + ' out of ' + total + ' | Percentage <b>' + percentage + '%</b></b>';
+}}, delay));
+</script>
+</body></html>"""
+
+
+def write_fixture(path, subjects, max_delay_ms, seed=0):
+    rng = random.Random(seed)
+    cards = []
+    loads = []
+    for i in range(subjects):
+        cards.append(CARD_TEMPLATE.format(i=i, lab=" Lab" if i % 4 == 3 else ""))
+        total = rng.randint(10, 60)
+        loads.append([i, rng.randint(0, max_delay_ms), rng.randint(0, total), total])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(PAGE_TEMPLATE.format(cards="".join(cards), loads=loads))
+
+
+def time_mode(driver, extract, url, runs):
+    timings = []
+    for _ in range(runs):
+        driver.get(url)
+        started = time.perf_counter()
+        subjects = extract(driver)
+        timings.append(time.perf_counter() - started)
+    return timings, subjects
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark subject extraction modes.")
+    parser.add_argument("--subjects", type=int, default=12)
+    parser.add_argument("--max-delay-ms", type=int, default=1500)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    configure_logging(logging.WARNING)
+    update_selectors(**BENCH_SELECTORS)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture = os.path.join(tmp, "subject_list.html")
+        write_fixture(fixture, args.subjects, args.max_delay_ms)
+        url = f"file://{fixture}"
+
+        driver, wait = browser.setup_driver()
+        try:
+            results = {}
+            for name, extract in (("per_card", browser.extract_subjects_per_card),
+                                  ("single_pass", browser.extract_subjects_single_pass)):
+                timings, subjects = time_mode(driver, extract, url, args.runs)
+                results[name] = subjects
+                print(f"{name:12s} subjects={len(subjects):3d} "
+                      f"median={statistics.median(timings):.3f}s min={min(timings):.3f}s max={max(timings):.3f}s")
+            if results["per_card"] != results["single_pass"]:
+                print("WARNING: extraction modes returned different results.")
+        finally:
+            browser.teardown_driver(driver)
+            browser.get_driver_pool().close()
+
+
+if __name__ == "__main__":
+    main()
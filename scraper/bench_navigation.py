@@ -0,0 +1,112 @@
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from . import browser
+from .conf import configure_logging, update_config, update_selectors
+
+# Compares time-to-first-subject of the two navigation paths of navigate_to_attendance_page
+# on a generated stand-in for the portal's app: a dashboard whose modules menu, attendance
+# route, group list and subject modal each render after a delay, like the real Angular app.
+BENCH_SELECTORS = {
+    "dashboard_loaded_indicator": "#dashboard",
+    "modules_dropdown_icon": "#modules-icon",
+    "attendance_link": "#attendance-link",
+    "group_view_button": ".group-card button.btn",
+    "subject_attendance_info": "[id^='viewSession_']",
+}
+
+APP_TEMPLATE = """<!DOCTYPE html>
+<html><body>
+<div id="dashboard">
+    <span id="modules-icon" style="cursor: pointer">Modules</span>
+    <div id="modules-menu"></div>
+</div>
+<div id="view"></div>
+<script>
+const groups = {groups}, subjects = {subjects}, delay = {delay_ms};
+const later = (fn) => setTimeout(fn, delay);
+document.getElementById('modules-icon').onclick = () => later(() => {{
+    document.getElementById('modules-menu').innerHTML = '<a id="attendance-link" href="#/attendance">Academic Planning</a>';
+}});
+function openGroup(g) {{
+    later(() => {{
+        let cards = '';
+        for (let i = 0; i < subjects; i++) {{
+            cards += '<div class="subject-card"><h4>Group ' + g + ' Subject ' + i + '</h4>' +
+                     '<div id="viewSession_' + i + '">Present session 10 out of 12 | Percentage 83.33%</div></div>';
+        }}
+        document.getElementById('view').innerHTML +=
+            '<div id="group-subjects-modal"><div id="group-subject-list">' + cards + '</div></div>';
+    }});
+}}
+function route() {{
+    if (location.hash !== '#/attendance') return;
+    later(() => {{
+        let html = '';
+        for (let g = 0; g < groups; g++) {{
+            html += '<div class="group-card">Group ' + g + ' <button class="btn" onclick="openGroup(' + g + ')">View Subjects</button></div>';
+        }}
+        document.getElementById('view').innerHTML = html;
+    }});
+}}
+window.addEventListener('hashchange', route);
+route();
+</script>
+</body></html>"""
+
+
+def write_fixture(path, groups, subjects, delay_ms):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(APP_TEMPLATE.format(groups=groups, subjects=subjects, delay_ms=delay_ms))
+
+
+def time_path(driver, app_url, mode, groups, runs):
+    # Returns (time-to-first-subject of the first group, time to reach every group) per run
+    update_config(navigation_mode=mode, attendance_url=f"{app_url}#/attendance" if mode == "deep_link" else None)
+    first, total = [], []
+    for _ in range(runs):
+        driver.get(app_url) # Where a fresh login leaves the browser
+        started = time.perf_counter()
+        browser.navigate_to_attendance_page(driver, 0)
+        first.append(time.perf_counter() - started)
+        for group in range(1, groups):
+            if mode == "menu":
+                driver.get(app_url)
+            browser.navigate_to_attendance_page(driver, group)
+        total.append(time.perf_counter() - started)
+    return first, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark deep-link vs menu navigation to the subject list.")
+    parser.add_argument("--groups", type=int, default=2)
+    parser.add_argument("--subjects", type=int, default=8)
+    parser.add_argument("--delay-ms", type=int, default=300, help="Render delay of each step of the stand-in app.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    configure_logging(logging.WARNING)
+    update_selectors(**BENCH_SELECTORS)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture = os.path.join(tmp, "app.html")
+        write_fixture(fixture, args.groups, args.subjects, args.delay_ms)
+        app_url = f"file://{fixture}"
+
+        driver, wait = browser.setup_driver()
+        try:
+            for mode in ("menu", "deep_link"):
+                first, total = time_path(driver, app_url, mode, args.groups, args.runs)
+                print(f"{mode:10s} first subject median={statistics.median(first):.3f}s min={min(first):.3f}s  "
+                      f"all {args.groups} group(s) median={statistics.median(total):.3f}s")
+        finally:
+            browser.teardown_driver(driver)
+            browser.get_driver_pool().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+import argparse
+import json
+import logging
+import math
+import os
+import resource
+import sys
+import tempfile
+import tracemalloc
+
+from .conf import read_json_file, setup_django, update_config, update_selectors
+from .fake_portal import SITE_FIXTURE_DIR, start_fake_portal
+from .storage import STORAGE_BACKENDS, get_storage
+from .tracing import current_span, span, trace_run
+
+# Runs the whole scrape pipeline (login -> navigate_to_attendance_page -> scrape_attendance)
+# against the replay server and fixtures/portal_site, so its speed can be tracked without
+# the real portal or any network access. Reports p50/p95 wall time per stage, WebDriver
+# commands (DOM round-trips) per stage, HTTP requests per run, and memory.
+#
+#   python -m scraper.bench_pipeline --runs 20 --chromedriver /usr/bin/chromedriver
+#   python -m scraper.bench_pipeline --backend api --json bench.json --max-p95 2
+#
+# --storage also saves the records: null measures the save path without writing, orm writes
+# to the database (which must be migrated first) and jsonl appends to a scratch file.
+BENCH_USERNAME = "bench-user"
+BENCH_PASSWORD = "bench-password"
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(values):
+    return {"p50": percentile(values, 50), "p95": percentile(values, 95), "max": max(values)}
+
+
+class CommandCounter:
+    # Counts the WebDriver commands a driver sends, by the name of the span they were sent in.
+    # Every find_element, click, wait poll and execute_script is one round-trip to the browser.
+    def __init__(self, driver):
+        self.driver = driver
+        self.counts = {}
+        execute = driver.execute
+
+        def counted(*args, **kwargs):
+            current = current_span()
+            name = current.name if current else ""
+            self.counts[name] = self.counts.get(name, 0) + 1
+            return execute(*args, **kwargs)
+
+        driver.execute = counted
+
+    def detach(self):
+        del self.driver.execute # Back to WebDriver.execute before the driver goes back to the pool
+
+
+def process_tree_rss_kib(pid):
+    # Resident memory of a process and all its descendants (chromedriver -> Chrome's processes), Linux only
+    children = {}
+    try:
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    with open(f'/proc/{entry}/stat', 'r') as f:
+                        ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                except (OSError, ValueError, IndexError):
+                    continue
+                children.setdefault(ppid, []).append(int(entry))
+    except OSError:
+        return None
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status', 'r') as f:
+                total += next((int(line.split()[1]) for line in f if line.startswith('VmRSS:')), 0)
+        except OSError:
+            pass
+        pending.extend(children.get(current, []))
+    return total
+
+
+def configure(args, url):
+    update_config(
+        username=BENCH_USERNAME,
+        password=BENCH_PASSWORD,
+        backend=args.backend,
+        portal_url=url,
+        login_url=f"{url}/public/auth/#/login/Cvr-Telangana",
+        navigation_mode=args.navigation,
+        attendance_url=f"{url}/dashboard/#/attendance" if args.navigation == "deep_link" else None,
+        attendance_groups="first",
+        session_store=False, # Every run logs in, as a first scrape of the day does
+        incremental=False,
+        tracing=False,
+        storage_path=os.path.join(tempfile.gettempdir(), "bench_pipeline.jsonl"),
+        headless=True,
+        driver_pool_size=1,
+        api={"base_url": url, "login_path": "/api/auth/login"},
+        **({"chromedriver_path": args.chromedriver} if args.chromedriver else {}),
+    )
+    update_selectors(**read_json_file(os.path.join(SITE_FIXTURE_DIR, 'selectors.json')))
+
+
+def run_selenium(args):
+    from . import browser
+    from .core import scrape_attendance
+
+    sample = {"commands": {}, "js_heap_bytes": None, "browser_rss_kib": None}
+    with span("setup_driver"):
+        driver, wait = browser.setup_driver()
+    if driver is None:
+        raise Exception("WebDriver was not set up correctly.")
+    counter = CommandCounter(driver)
+    try:
+        with span("login"):
+            browser.login(driver, BENCH_USERNAME, BENCH_PASSWORD)
+        with span("navigate"):
+            browser.navigate_to_attendance_page(driver)
+        if args.storage:
+            with span("scrape_attendance"):
+                saved = scrape_attendance(driver, BENCH_USERNAME, get_storage(args.storage))
+            if saved is None:
+                raise Exception("scrape_attendance() saved nothing.")
+        else:
+            with span("extract"):
+                records = browser.extract_attendance(driver)
+            if not records:
+                raise Exception("No subject records were extracted.")
+    finally:
+        counter.detach()
+        sample["commands"] = counter.counts
+        try:
+            sample["js_heap_bytes"] = driver.execute_script(
+                "return performance.memory ? performance.memory.usedJSHeapSize : null;")
+        except Exception:
+            pass
+        service = getattr(driver, "service", None)
+        if service is not None and getattr(service, "process", None) is not None:
+            sample["browser_rss_kib"] = process_tree_rss_kib(service.process.pid)
+        browser.teardown_driver(driver)
+    return sample
+
+
+def run_api(args):
+    from .core import api_clients, fetch_attendance_via_api
+
+    client = api_clients.pop(BENCH_USERNAME, None) # Log in on every run
+    if client is not None:
+        client.close()
+    records = fetch_attendance_via_api(BENCH_USERNAME, BENCH_PASSWORD)
+    if not records:
+        raise Exception("No subject records were fetched.")
+    if args.storage:
+        with span("save"):
+            get_storage(args.storage).save(BENCH_USERNAME, records)
+    return {"commands": {}, "js_heap_bytes": None, "browser_rss_kib": None}
+
+
+def run_once(args, server):
+    hits = server.RequestHandlerClass.hits
+    hits.clear()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    with trace_run(BENCH_USERNAME, args.backend) as trace:
+        sample = run_selenium(args) if args.backend == "selenium" else run_api(args)
+    stages = {}
+    for finished in trace.spans:
+        if not finished.parent:
+            stages[finished.name] = stages.get(finished.name, 0.0) + finished.duration
+    sample.update(
+        total=trace.duration,
+        stages=stages,
+        http_requests=sum(hits.values()),
+        python_peak_bytes=tracemalloc.get_traced_memory()[1] - baseline,
+    )
+    return sample
+
+
+def report(args, samples):
+    stage_names = list(dict.fromkeys(name for sample in samples for name in sample["stages"]))
+    result = {
+        "backend": args.backend,
+        "navigation": args.navigation,
+        "runs": len(samples),
+        "latency_ms": args.latency_ms,
+        "preloader_delay_ms": args.preloader_delay_ms,
+        "total_seconds": summarize([sample["total"] for sample in samples]),
+        "stages_seconds": {name: summarize([sample["stages"].get(name, 0.0) for sample in samples]) for name in stage_names},
+        "webdriver_commands": {name: percentile([sample["commands"].get(name, 0) for sample in samples], 50)
+                               for name in stage_names if any(name in sample["commands"] for sample in samples)},
+        "http_requests": percentile([sample["http_requests"] for sample in samples], 50),
+        "python_peak_bytes": max(sample["python_peak_bytes"] for sample in samples),
+        "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, # KiB on Linux
+    }
+    heaps = [sample["js_heap_bytes"] for sample in samples if sample["js_heap_bytes"]]
+    browser_rss = [sample["browser_rss_kib"] for sample in samples if sample["browser_rss_kib"]]
+    if heaps:
+        result["js_heap_bytes"] = max(heaps)
+    if browser_rss:
+        result["browser_rss_kib"] = max(browser_rss)
+
+    print(f"{args.backend} backend, {len(samples)} run(s), latency {args.latency_ms}ms, "
+          f"preloader delay {args.preloader_delay_ms}ms")
+    print(f"{'stage':18s} {'p50':>8s} {'p95':>8s} {'max':>8s} {'commands':>9s}")
+    for name, times in [*result["stages_seconds"].items(), ("total", result["total_seconds"])]:
+        commands = result["webdriver_commands"].get(name)
+        if name == "total" and result["webdriver_commands"]:
+            commands = sum(result["webdriver_commands"].values())
+        print(f"{name:18s} {times['p50']:7.3f}s {times['p95']:7.3f}s {times['max']:7.3f}s "
+              f"{'' if commands is None else commands:>9}")
+    print(f"HTTP requests per run: {result['http_requests']}")
+    print(f"Python peak allocations per run {result['python_peak_bytes'] / 1024:.0f} KiB, max RSS {result['max_rss_kib'] / 1024:.1f} MiB"
+          + (f", JS heap {result['js_heap_bytes'] / 1048576:.1f} MiB" if heaps else "")
+          + (f", browser RSS {result['browser_rss_kib'] / 1024:.1f} MiB" if browser_rss else ""))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrape pipeline against the replayed portal.")
+    parser.add_argument("--backend", default="selenium", help="selenium or api (the api backend needs no Chrome).")
+    parser.add_argument("--navigation", default="deep_link", help="deep_link or menu.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs first (browser launch, imports).")
+    parser.add_argument("--latency-ms", type=int, default=20, help="Delay added to every replayed response.")
+    parser.add_argument("--preloader-delay-ms", type=int, default=300, help="Extra delay of the per-subject XHRs.")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--chromedriver", help="Local chromedriver binary, so no driver is downloaded.")
+    parser.add_argument("--storage", choices=STORAGE_BACKENDS, help="Also save each run's records to this storage.")
+    parser.add_argument("--json", help="Also write the results to this file.")
+    parser.add_argument("--max-p95", type=float, help="Exit with status 1 if the total p95 exceeds this many seconds.")
+    args = parser.parse_args()
+    if args.backend not in ("selenium", "api"):
+        parser.error("--backend must be selenium or api")
+    if args.navigation not in ("deep_link", "menu"):
+        parser.error("--navigation must be deep_link or menu")
+
+    setup_django() # The pipeline imports the models; set up first so the level below sticks
+    logging.getLogger().setLevel(logging.WARNING)
+    server, url = start_fake_portal(SITE_FIXTURE_DIR, latency_ms=args.latency_ms,
+                                    preloader_delay_ms=args.preloader_delay_ms, jitter=args.jitter)
+    configure(args, url)
+    tracemalloc.start()
+    try:
+        for _ in range(args.warmup):
+            run_once(args, server)
+        samples = [run_once(args, server) for _ in range(args.runs)]
+    finally:
+        tracemalloc.stop()
+        server.shutdown()
+        if args.backend == "selenium":
+            from .browser import get_driver_pool
+
+            get_driver_pool().close()
+
+    result = report(args, samples)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=4)
+    if args.max_p95 is not None and result["total_seconds"]["p95"] > args.max_p95:
+        print(f"Total p95 {result['total_seconds']['p95']:.3f}s is above --max-p95 {args.max_p95:.3f}s.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from .conf import DASHBOARD_DIR, SCRIPT_DIR
+
+# Measures cold start-up cost with `python -X importtime`: each target runs in a fresh
+# interpreter, and the report gives the median total import time, wall time and the
+# slowest imports. Targets that should never pull in Selenium are flagged if they do.
+
+SETUP_DJANGO = (
+    f"import os, sys; sys.path.insert(0, {DASHBOARD_DIR!r}); "
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'VmedulifeDashboard.settings'); "
+    "import django; django.setup(); "
+)
+
+# name -> (command, working directory, may load Selenium)
+TARGETS = {
+    "package": ([sys.executable, "-X", "importtime", "-c", "import scraper"], SCRIPT_DIR, False),
+    "cli": ([sys.executable, "-X", "importtime", "-c", "import scraper.core"], SCRIPT_DIR, False),
+    "cli_selenium": ([sys.executable, "-X", "importtime", "-c", "import scraper.browser"], SCRIPT_DIR, True),
+    "web": ([sys.executable, "-X", "importtime", "-c", SETUP_DJANGO + "import VmedulifeDashboard.urls"], SCRIPT_DIR, False),
+    "manage_check": ([sys.executable, "-X", "importtime", "manage.py", "check"], DASHBOARD_DIR, False),
+}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr):
+    # Returns (total self time in microseconds, [(cumulative us, module) for top-level imports],
+    # every imported module name)
+    total = 0
+    top_level = []
+    modules = set()
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        total += int(self_us)
+        modules.add(module)
+        if len(indent) == 1: # Imported directly by the target rather than by another module
+            top_level.append((int(cumulative_us), module))
+    return total, sorted(top_level, reverse=True), modules
+
+
+def run_target(command, cwd):
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=cwd, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command[3:])} exited with {result.returncode}:\n{result.stderr[-2000:]}")
+    return (wall, *parse_importtime(result.stderr))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold import time of the scraper CLI and the web app.")
+    parser.add_argument("targets", nargs="*", help=f"Any of {', '.join(TARGETS)} (default: all).")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="Number of slowest imports to list per target.")
+    args = parser.parse_args()
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(sorted(unknown))}")
+
+    unexpected_selenium = []
+    for name in args.targets or TARGETS:
+        command, cwd, may_load_selenium = TARGETS[name]
+        walls, totals = [], []
+        for _ in range(args.runs):
+            wall, total, top_level, modules = run_target(command, cwd)
+            walls.append(wall)
+            totals.append(total)
+        print(f"{name:14s} imports median={statistics.median(totals) / 1000:7.1f}ms "
+              f"min={min(totals) / 1000:7.1f}ms  wall median={statistics.median(walls) * 1000:7.1f}ms  "
+              f"modules={len(modules)}")
+        for cumulative_us, module in top_level[:args.top]:
+            print(f"{'':16s}{cumulative_us / 1000:7.1f}ms  {module}")
+        if not may_load_selenium and any(module.split(".")[0] == "selenium" for module in modules):
+            unexpected_selenium.append(name)
+
+    if unexpected_selenium:
+        print(f"\nWARNING: Selenium was imported by: {', '.join(unexpected_selenium)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
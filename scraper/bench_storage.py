@@ -0,0 +1,103 @@
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from .batch import SAVE_EVERY
+from .parser import make_record
+from .storage import JsonlStorage, NullStorage, attendance_entry
+
+# Compares the storage backends on the writes of one large batch run: --accounts results
+# arriving one at a time and saved every SAVE_EVERY accounts, as scraper.batch does. The
+# "rewrite" row is the old approach of keeping every result and dumping the whole file with
+# json.dump(..., indent=4) on each save. Reports time, peak Python memory and file size.
+#
+#   python -m scraper.bench_storage --accounts 5000
+#
+# The orm backend writes to a scratch database; nothing touches the dashboard's own.
+SUBJECTS = ("MATHEMATICS", "PHYSICS", "CHEMISTRY", "ENGLISH", "DATA STRUCTURES", "NETWORKS LAB", "CT LAB")
+
+
+def account_records(rng):
+    records = []
+    for name in SUBJECTS:
+        total = rng.randint(40, 60)
+        attended = rng.randint(total // 2, total)
+        records.append(make_record(name, attended, total, attended / total * 100, f"{name}-{attended}-{total}"))
+    return records
+
+
+class RewriteStorage:
+    # Everything saved so far, rewritten as one JSON document on every save
+    name = "rewrite"
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = []
+
+    def save_many(self, records_by_username):
+        self.entries.extend(attendance_entry(username, records) for username, records in records_by_username.items())
+        with open(self.path, "w") as f:
+            json.dump(self.entries, f, indent=4)
+        return len(records_by_username)
+
+    def close(self):
+        pass
+
+
+def run(storage, accounts, save_every):
+    rng = random.Random(0)
+    tracemalloc.start()
+    started = time.perf_counter()
+    pending = {}
+    for index in range(accounts):
+        pending[f"storage-bench-{index}"] = account_records(rng)
+        if len(pending) >= save_every:
+            storage.save_many(pending)
+            pending = {}
+    if pending:
+        storage.save_many(pending)
+    storage.close()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare storage backends on one batch run's writes.")
+    parser.add_argument("--accounts", type=int, default=5000)
+    parser.add_argument("--save-every", type=int, default=SAVE_EVERY)
+    parser.add_argument("--skip-orm", action="store_true")
+    args = parser.parse_args(argv)
+
+    scratch = tempfile.mkdtemp(prefix="bench_storage-")
+    try:
+        storages = [NullStorage(), JsonlStorage(os.path.join(scratch, "attendance.jsonl")),
+                    RewriteStorage(os.path.join(scratch, "attendance.json"))]
+        if not args.skip_orm:
+            from .bench_db_writers import use_scratch_database
+            use_scratch_database(os.path.join(scratch, "db.sqlite3"), os.path.join(scratch, "cache"), "tuned")
+            from django.core.management import call_command
+            from .storage import OrmStorage
+            call_command("migrate", verbosity=0)
+            storages.append(OrmStorage())
+        logging.getLogger().setLevel(logging.WARNING)
+
+        print(f"{args.accounts} accounts, saved every {args.save_every}:")
+        for storage in storages:
+            elapsed, peak = run(storage, args.accounts, args.save_every)
+            path = getattr(storage, "path", None)
+            size = f"{os.path.getsize(path) / 1024:9.0f} KiB" if path else f"{'-':>13s}"
+            print(f"  {storage.name:8s} {elapsed:8.2f}s  peak {peak / 1024:8.0f} KiB  file {size}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
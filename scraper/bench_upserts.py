@@ -0,0 +1,105 @@
+import argparse
+import multiprocessing
+import random
+import shutil
+import tempfile
+from collections import Counter
+
+from .bench_db_writers import MODES, make_records, use_scratch_database
+
+# Concurrency test for the save path. Several processes call save_attendance_record() for
+# the same account at the same instant, first for an account that doesn't exist yet (racing
+# on the User, UserProfile and AttendanceData inserts), then for the same account with new
+# numbers, and report every exception they hit. It also counts the queries of one scrape's
+# save for a new account, changed numbers and unchanged numbers.
+#
+#   python -m scraper.bench_upserts --processes 8 --rounds 20
+#
+# Runs against a scratch database; nothing touches the dashboard's own.
+
+
+def count_queries(db_path, cache_dir, mode):
+    use_scratch_database(db_path, cache_dir, mode)
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from .persistence import save_attendance_record
+
+    call_command("migrate", verbosity=0)
+    rng = random.Random(0)
+    first, second = make_records(rng), make_records(rng)
+    counts = {}
+    for label, records in (("new account", first), ("changed numbers", second), ("unchanged numbers", second)):
+        with CaptureQueriesContext(connection) as queries:
+            save_attendance_record("query-count", records)
+        counts[label] = len(queries)
+    connection.close()
+    return counts
+
+
+def race(index, db_path, cache_dir, mode, rounds, barrier, results):
+    use_scratch_database(db_path, cache_dir, mode)
+    from django.db import close_old_connections
+    from .persistence import save_attendance_record
+
+    rng = random.Random(index)
+    errors = Counter()
+    calls = 0
+    for round_number in range(rounds):
+        for username in (f"race-{round_number}", f"race-{round_number}"): # Created, then updated
+            records = make_records(rng)
+            barrier.wait()
+            calls += 1
+            try:
+                save_attendance_record(username, records)
+            except Exception as e:
+                errors[f"{type(e).__name__}: {e}"] += 1
+    close_old_connections()
+    results.put((calls, errors))
+
+
+def run_mode(mode, args):
+    scratch = tempfile.mkdtemp(prefix="bench_upserts-")
+    db_path, cache_dir = f"{scratch}/db.sqlite3", f"{scratch}/cache"
+    context = multiprocessing.get_context("spawn")
+    try:
+        with context.Pool(1) as pool:
+            counts = pool.apply(count_queries, (db_path, cache_dir, mode))
+        barrier = context.Barrier(args.processes)
+        results = context.Queue()
+        processes = [context.Process(target=race, args=(index, db_path, cache_dir, mode, args.rounds, barrier, results))
+                     for index in range(args.processes)]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    calls = sum(calls for calls, _ in outcomes)
+    errors = Counter()
+    for _, process_errors in outcomes:
+        errors.update(process_errors)
+    print(f"\n{mode} SQLite settings:")
+    print("  queries per save: " + ", ".join(f"{label} {count}" for label, count in counts.items()))
+    print(f"  {calls} racing saves by {args.processes} processes, {sum(errors.values())} failed")
+    for message, count in errors.most_common():
+        print(f"    {count:6d} x {message}")
+    return sum(errors.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Race concurrent saves of the same account and count their queries.")
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--mode", choices=MODES + ("both",), default="both")
+    args = parser.parse_args(argv)
+
+    modes = MODES if args.mode == "both" else (args.mode,)
+    errors = {mode: run_mode(mode, args) for mode in modes}
+    return 1 if errors.get("tuned") else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,384 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from .conf import (DEBUG_HTML_FILE, ROUTES_FILE, dump_html_for_debug, get_config, get_resource_filters, get_selectors,
+                   login_url, portal_url)
+from .driver_pool import DriverPool, chrome_driver_factory
+from .parser import extract_subject_cards, parse_attendance_html, parse_attendance_text
+from .sessions import get_session_store, record_full_login, record_restored
+from .tracing import record_timeout, span
+
+SESSION_BOOTSTRAP_PATH = "/favicon.ico" # Cheap page on the portal's origin for setting cookies
+COOKIE_FIELDS = ("name", "value", "path", "domain", "secure", "httpOnly", "expiry", "sameSite")
+DEFAULT_GROUP_BUTTON_SELECTOR = ".group-card button.btn"
+
+driver_pool = None # Created on first use by get_driver_pool()
+_routes_lock = threading.Lock()
+_navigation_stats_lock = threading.Lock()
+navigation_stats = {} # "deep_link"/"menu" -> {"count", "time_to_first_subject_seconds"}
+
+
+# Selenium Functions
+def get_driver_pool():
+    global driver_pool
+    if driver_pool is None:
+        pool_config = get_config() or {}
+        driver_pool = DriverPool(
+            chrome_driver_factory(headless=pool_config.get("headless", True), config=pool_config,
+                                  resource_filters=get_resource_filters()),
+            max_size=pool_config.get("driver_pool_size", 2),
+            idle_timeout=pool_config.get("driver_idle_timeout", 300),
+            reset_origins=(portal_url(),), # Where each account's login state lives
+        )
+        atexit.register(driver_pool.close)
+    return driver_pool
+
+def setup_driver():
+    logging.info("Setting up WebDriver...")
+    started = time.perf_counter()
+    try:
+        driver = get_driver_pool().acquire() # Borrow a warm browser from the pool when one is available
+        wait = WebDriverWait(driver, 10)  # Default wait of 10 seconds
+        logging.info(f"WebDriver setup complete in {time.perf_counter() - started:.3f}s.")
+        return driver, wait # Return driver and wait
+    except Exception as e:
+        logging.error(f"Error setting up WebDriver: {e}")
+        return None, None # Return None on error
+
+def teardown_driver(driver):
+    if driver:
+        logging.info("Returning WebDriver to the pool...")
+        get_driver_pool().release(driver)
+
+def login(driver, username, password):
+    selectors = get_selectors()
+    if selectors is None:
+        raise Exception("Selectors could not be loaded. Check selectors.json.")
+
+    logging.info("Navigating to login page...")
+    driver.get(login_url())
+    wait = WebDriverWait(driver, 10)
+
+    try:
+        logging.info("Filling in username and password...")
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selectors['username_input']))).send_keys(username)
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selectors['password_input']))).send_keys(password)
+
+        logging.info("Clicking login button...")
+        wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selectors['login_button']))).click()
+
+        logging.info("Waiting for dashboard to load...")
+        wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, selectors['dashboard_loaded_indicator'])))
+        logging.info("Successfully logged in and dashboard loaded.")
+    except TimeoutException:
+        logging.error("Timeout during login. Dashboard indicator not found.")
+        dump_html_for_debug(driver.page_source)
+        raise # Re-raise the exception to be caught in main or calling function
+    except Exception as e:
+        logging.error(f"An error occurred during login: {e}")
+        dump_html_for_debug(driver.page_source)
+        raise # Re-raise the exception
+
+def save_browser_session(driver, username, password, login_seconds):
+    store = get_session_store()
+    if store is None:
+        return
+    try:
+        local_storage = driver.execute_script("return Object.assign({}, window.localStorage);")
+        store.save(username, store.credentials_digest(username, password), cookies=driver.get_cookies(), local_storage=local_storage,
+                   url=driver.current_url, login_seconds=login_seconds)
+    except Exception as e:
+        logging.warning(f"Could not save the session for {username}: {e}")
+
+def restore_browser_session(driver, session):
+    # Sets the saved cookies and localStorage on the portal's origin, then opens the page the
+    # last login ended on. Seeing the dashboard there is the validation: it has to load anyway.
+    driver.get(f"{portal_url()}{SESSION_BOOTSTRAP_PATH}")
+    for cookie in session["cookies"]:
+        try:
+            driver.add_cookie({key: value for key, value in cookie.items() if key in COOKIE_FIELDS})
+        except WebDriverException as e:
+            logging.debug(f"Could not restore cookie {cookie.get('name')}: {e}")
+    driver.execute_script(
+        "for (const [key, value] of Object.entries(arguments[0])) window.localStorage.setItem(key, value);",
+        session["local_storage"],
+    )
+    driver.get(session.get("url") or login_url())
+    try:
+        WebDriverWait(driver, (get_config() or {}).get("session_validate_timeout", 5)).until(
+            EC.visibility_of_element_located((By.CSS_SELECTOR, get_selectors()['dashboard_loaded_indicator']))
+        )
+        return True
+    except TimeoutException:
+        record_timeout()
+        return False
+
+def ensure_logged_in(driver, username, password, fresh_login=False):
+    # Restores the user's saved session when it is still valid, otherwise logs in and saves the
+    # new session. Returns True if the login was skipped. fresh_login always logs in, so the
+    # portal itself checks the password.
+    store = get_session_store()
+    session = store.load(username, store.credentials_digest(username, password)) if store and not fresh_login else None
+    started = time.perf_counter()
+    if session is not None:
+        with span("restore_session"):
+            restored = restore_browser_session(driver, session)
+        if restored:
+            record_restored(username, time.perf_counter() - started, session.get("login_seconds"))
+            return True
+        logging.info(f"Saved session for {username} is no longer valid. Logging in again...")
+        store.discard(username)
+        driver.delete_all_cookies()
+        driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+
+    login_started = time.perf_counter()
+    with span("full_login"):
+        login(driver, username, password)
+    login_seconds = time.perf_counter() - login_started
+    record_full_login(username, time.perf_counter() - started, expired=session is not None)
+    save_browser_session(driver, username, password, login_seconds)
+    return False
+
+def attendance_route():
+    # The URL of the page listing the attendance groups: config["attendance_url"] if set,
+    # otherwise the one the last menu navigation ended on
+    configured = (get_config() or {}).get("attendance_url")
+    if configured:
+        return configured
+    with _routes_lock:
+        try:
+            with open(ROUTES_FILE, 'r') as f:
+                return json.load(f).get("attendance")
+        except (OSError, ValueError):
+            return None
+
+def remember_attendance_route(url):
+    with _routes_lock:
+        try:
+            with open(ROUTES_FILE, 'w') as f:
+                json.dump({"attendance": url}, f, indent=4)
+        except OSError as e:
+            logging.warning(f"Could not save the attendance route: {e}")
+
+def forget_attendance_route():
+    with _routes_lock:
+        try:
+            os.remove(ROUTES_FILE)
+        except FileNotFoundError:
+            pass
+
+def group_buttons(driver, timeout=10):
+    selector = get_selectors().get("group_view_button", DEFAULT_GROUP_BUTTON_SELECTOR)
+    return WebDriverWait(driver, timeout).until(lambda d: d.find_elements(By.CSS_SELECTOR, selector) or False)
+
+def open_attendance_via_menu(driver):
+    selectors = get_selectors()
+    wait = WebDriverWait(driver, 10)
+
+    logging.info("Clicking on modules dropdown icon...")
+    wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selectors["modules_dropdown_icon"]))).click()
+
+    logging.info("Navigating to attendance page via Academic Planning link...")
+    wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selectors["attendance_link"]))).click()
+    logging.info("Clicked on Academic Planning link.")
+    return group_buttons(driver)
+
+def open_attendance_via_url(driver, url):
+    logging.info(f"Opening attendance page directly at {url}...")
+    if driver.current_url == url:
+        driver.refresh() # get() of the current URL with a #fragment wouldn't reload the page
+    else:
+        driver.get(url)
+    return group_buttons(driver)
+
+def open_group(driver, buttons, group):
+    if group >= len(buttons):
+        raise Exception(f"Attendance group {group} does not exist; the page lists {len(buttons)} group(s).")
+    logging.info(f"Clicking 'View Subjects' button for group {group + 1} of {len(buttons)}...")
+    WebDriverWait(driver, 10).until(EC.element_to_be_clickable(buttons[group])).click()
+    logging.info("Clicked 'View Subjects' button.")
+
+    wait = WebDriverWait(driver, 10)
+    # Wait for the subject list modal/sidebar to appear (assuming it has an ID 'group-subjects-modal')
+    wait.until(EC.visibility_of_element_located((By.ID, 'group-subjects-modal')))
+    logging.info("Subject list modal/sidebar appeared.")
+
+    # Wait for the content within the subject list modal to load
+    wait.until(EC.visibility_of_element_located((By.ID, 'group-subject-list')))
+    logging.info("Subject list content loaded.")
+
+def record_time_to_first_subject(driver, path, started):
+    try:
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, get_selectors()['subject_attendance_info']))
+        )
+    except TimeoutException:
+        record_timeout()
+        logging.warning(f"No subject card appeared after navigating via {path}.")
+        return None
+    elapsed = time.perf_counter() - started
+    with _navigation_stats_lock:
+        stats = navigation_stats.setdefault(path, {"count": 0, "time_to_first_subject_seconds": 0.0})
+        stats["count"] += 1
+        stats["time_to_first_subject_seconds"] += elapsed
+    logging.info(f"Time to first subject via {path}: {elapsed:.2f}s.")
+    return elapsed
+
+def selected_groups(group_count):
+    # Indexes of the attendance groups to scrape, from config["attendance_groups"]:
+    # "first" (the default), "all", or a list of 0-based indexes
+    groups = (get_config() or {}).get("attendance_groups", "first")
+    if groups == "all":
+        return list(range(group_count))
+    if groups == "first":
+        return [0]
+    return [group for group in groups if group < group_count]
+
+def navigate_to_attendance_page(driver, group=0):
+    # Opens the subject list of one attendance group and returns how many groups there are.
+    # With "navigation_mode": "deep_link" (the default) the attendance page is opened by URL
+    # when the route is known, falling back to clicking through the menus if that fails.
+    selectors = get_selectors()
+    if selectors is None: # Handle case where selectors file read fails
+        raise Exception("Selectors could not be loaded.")
+
+    config = get_config() or {}
+    deep_link = config.get("navigation_mode", "deep_link") == "deep_link"
+    started = time.perf_counter()
+    try:
+        route = attendance_route() if deep_link else None
+        buttons = None
+        if route:
+            try:
+                buttons = open_attendance_via_url(driver, route)
+                path = "deep_link"
+            except TimeoutException:
+                record_timeout()
+                logging.warning(f"Attendance route {route} did not show any groups. Falling back to the menus.")
+                forget_attendance_route()
+                driver.get(route.split('#')[0]) # Back to the app shell, where the menus are
+        if buttons is None:
+            menu_url = driver.current_url
+            buttons = open_attendance_via_menu(driver)
+            path = "menu"
+            if deep_link and driver.current_url != menu_url and not config.get("attendance_url"):
+                remember_attendance_route(driver.current_url) # The page has its own route; deep-link it next time
+
+        open_group(driver, buttons, group)
+        record_time_to_first_subject(driver, path, started)
+        return len(buttons)
+
+    except TimeoutException:
+        logging.error("Navigation to attendance page failed: Element not found. Saving HTML dump for debugging...")
+        with open(DEBUG_HTML_FILE, "w", encoding="utf-8") as f:
+            f.write(driver.page_source)
+        raise # Re-raise the exception
+    except Exception as e:
+        logging.error(f"An error occurred during navigation: {e}")
+        with open(DEBUG_HTML_FILE, "w", encoding="utf-8") as f:
+            f.write(driver.page_source)
+        raise # Re-raise the exception
+
+def read_subject_card(card_element):
+    # (name, text) of one subject card, read from its markup the way parse_attendance_html reads the
+    # page snapshot, so a card fingerprints the same whichever extraction path saw it
+    cards = extract_subject_cards(card_element.get_attribute('outerHTML'))
+    if cards:
+        return cards[0]
+    return card_element.find_element(By.TAG_NAME, "h4").text, card_element.text
+
+def extract_subjects_per_card(driver):
+    # Original extraction path: waits on and reads each subject card in turn
+    selectors = get_selectors()
+    wait = WebDriverWait(driver, 10)
+    records = []
+    subject_attendance_elements = WebDriverWait(driver, 20).until(
+        EC.visibility_of_all_elements_located((By.CSS_SELECTOR, selectors['subject_attendance_info']))
+    )
+
+    for element in subject_attendance_elements:
+        # Get the parent element to find the subject name
+        parent_element = element.find_element(By.XPATH, ".//ancestor::div[contains(@class, 'subject-card')]")
+        subject_name_element = parent_element.find_element(By.TAG_NAME, "h4")
+        subject_name = subject_name_element.text
+
+        with span("subject_card", subject=subject_name):
+            # Wait for the preloader image to disappear from within this specific subject element
+            preloader_selector = f"#{element.get_attribute('id')} img[src*='Ring-Preloader']"
+            logging.debug(f"Waiting for preloader to disappear in {element.get_attribute('id')} using selector: {preloader_selector}")
+            try:
+                WebDriverWait(driver, 10).until(EC.invisibility_of_element_located((By.CSS_SELECTOR, preloader_selector)))
+                logging.debug(f"Preloader disappeared for {element.get_attribute('id')}")
+            except TimeoutException:
+                record_timeout()
+                logging.warning(f"Timeout waiting for preloader to disappear for {element.get_attribute('id')}. Proceeding anyway.")
+
+            # Now that preloader is likely gone, wait for the actual text pattern to appear
+            wait.until(EC.text_to_be_present_in_element((By.ID, element.get_attribute('id')), "Present session "))
+
+            name, text = read_subject_card(parent_element)
+        logging.debug(f"Processing element text: {text}") # Debugging line
+        # Example text: "Present session 10 out of 15 | Percentage 66.67%"
+        record = parse_attendance_text(name, text)
+        if record:
+            records.append(record)
+        else:
+            logging.warning(f"Attendance pattern not found in: {text}")
+    return records
+
+# Resolves to the number of subject cards once every card has loaded, false otherwise.
+# Evaluated in the browser so all cards are checked in a single round-trip per poll.
+ALL_CARDS_LOADED_SCRIPT = """
+const cards = document.querySelectorAll(arguments[0]);
+if (!cards.length) return false;
+for (const card of cards) {
+    const preloader = card.querySelector("img[src*='Ring-Preloader']");
+    if (preloader && preloader.offsetParent !== null) return false;
+    if (!card.textContent.includes('Present session ')) return false;
+}
+return cards.length;
+"""
+
+def wait_for_all_subject_cards(driver, timeout=20):
+    return WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+        lambda d: d.execute_script(ALL_CARDS_LOADED_SCRIPT, get_selectors()['subject_attendance_info'])
+    )
+
+def extract_subjects_single_pass(driver, known=None):
+    # Waits for every card at once, then parses one page_source snapshot offline
+    with span("wait_for_cards"):
+        card_count = wait_for_all_subject_cards(driver)
+    with span("parse"):
+        records = parse_attendance_html(driver.page_source, known)
+    if len(records) != card_count:
+        logging.warning(f"Parsed {len(records)} of {card_count} subject cards from the page snapshot.")
+    return records
+
+def extract_attendance(driver, known=None):
+    if get_selectors() is None:
+        raise Exception("Selectors could not be loaded. Check selectors.json.")
+
+    logging.info("Extracting attendance data...")
+
+    records = []
+    if (get_config() or {}).get("extraction_mode", "single_pass") == "single_pass":
+        try:
+            records = extract_subjects_single_pass(driver, known)
+        except TimeoutException:
+            record_timeout()
+            logging.warning("Timeout waiting for all subject cards at once. Falling back to per-card extraction.")
+    if not records:
+        records = extract_subjects_per_card(driver)
+
+    for record in records:
+        logging.debug(f"Parsed: {record}")
+    return records
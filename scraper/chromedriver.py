@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+from .conf import SCRIPT_DIR
+
+# Resolves the chromedriver binary once per process instead of on every browser launch.
+#
+#   1. config["chromedriver_path"]: a local binary, used as-is with no network access.
+#   2. The pinned path in CHROMEDRIVER_CACHE_FILE, if it still exists and its major version
+#      matches the installed Chrome.
+#   3. webdriver_manager (may hit the network); the result is pinned for the next process.
+#   4. If that fails (e.g. offline), a stale pinned binary or chromedriver on PATH.
+CHROMEDRIVER_CACHE_FILE = os.path.join(SCRIPT_DIR, '.chromedriver.json')
+CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+VERSION_PATTERN = re.compile(r"(\d+)\.[\d.]+")
+
+
+class ChromeDriverNotFound(Exception):
+    pass
+
+
+_lock = threading.Lock()
+_resolved = None # (path, source) once resolved in this process
+resolution_seconds = 0.0
+
+
+def binary_version(path):
+    # "Google Chrome 120.0.6099.109" / "ChromeDriver 120.0.6099.109 (...)" -> "120.0.6099.109"
+    try:
+        output = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        logging.debug(f"Could not read the version of {path}: {e}")
+        return None
+    match = VERSION_PATTERN.search(output)
+    return match.group(0) if match else None
+
+
+def major_version(version):
+    return version.split(".")[0] if version else None
+
+
+def installed_chrome_version(chrome_binary=None):
+    candidates = [chrome_binary] if chrome_binary else [shutil.which(name) for name in CHROME_BINARIES]
+    for candidate in candidates:
+        if candidate:
+            version = binary_version(candidate)
+            if version:
+                return version
+    return None
+
+
+def read_pin():
+    try:
+        with open(CHROMEDRIVER_CACHE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_pin(path, driver_version, chrome_version):
+    pin = {"path": path, "driver_version": driver_version, "chrome_version": chrome_version, "resolved_at": time.time()}
+    try:
+        with open(CHROMEDRIVER_CACHE_FILE, 'w') as f:
+            json.dump(pin, f, indent=4)
+    except OSError as e:
+        logging.warning(f"Could not pin chromedriver in {CHROMEDRIVER_CACHE_FILE}: {e}")
+
+
+def _is_executable(path):
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def _resolve(config):
+    local_path = config.get("chromedriver_path")
+    if local_path:
+        if not _is_executable(local_path):
+            raise ChromeDriverNotFound(f"chromedriver_path {local_path} is not an executable file.")
+        return local_path, "configured"
+
+    chrome_version = installed_chrome_version(config.get("chrome_binary"))
+    pin = read_pin()
+    if pin and _is_executable(pin.get("path")):
+        if chrome_version is None or major_version(pin.get("driver_version")) == major_version(chrome_version):
+            return pin["path"], "pinned"
+        logging.info(f"Pinned chromedriver {pin.get('driver_version')} does not match Chrome {chrome_version}. Resolving again...")
+
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        path = ChromeDriverManager().install()
+    except Exception as e:
+        logging.warning(f"webdriver_manager could not resolve chromedriver: {e}")
+        if pin and _is_executable(pin.get("path")):
+            logging.warning(f"Falling back to pinned chromedriver {pin.get('driver_version')}, which may not match Chrome {chrome_version}.")
+            return pin["path"], "stale pin"
+        path = shutil.which("chromedriver")
+        if path:
+            return path, "PATH"
+        raise ChromeDriverNotFound("No chromedriver available. Set chromedriver_path in config.json to a local binary.") from e
+
+    write_pin(path, binary_version(path), chrome_version)
+    return path, "webdriver_manager"
+
+
+def resolve_chromedriver(config=None):
+    # Returns the chromedriver path, resolving (and validating against Chrome) only on the first call
+    global _resolved, resolution_seconds
+    with _lock:
+        if _resolved is None:
+            started = time.perf_counter()
+            _resolved = _resolve(config or {})
+            resolution_seconds = time.perf_counter() - started
+            logging.info(f"Resolved chromedriver {_resolved[0]} ({_resolved[1]}) in {resolution_seconds:.3f}s.")
+        return _resolved[0]
@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+import sys
+import threading
+
+# Repository root, where config.json, selectors.json and dashboard_project/ live
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DASHBOARD_DIR = os.path.join(SCRIPT_DIR, 'dashboard_project')
+
+# Global Constants
+CONFIG_FILE = os.path.join(SCRIPT_DIR, 'config.json')
+SELECTORS_FILE = os.path.join(SCRIPT_DIR, 'selectors.json')
+RESOURCE_FILTERS_FILE = os.path.join(SCRIPT_DIR, 'resource_filters.json') # Optional, see scraper/network.py
+HISTORY_FILE = os.path.join(SCRIPT_DIR, 'attendance.jsonl') # Append-only scrape history, see scraper/storage.py
+DEBUG_HTML_FILE = os.path.join(SCRIPT_DIR, 'debug.html')
+ROUTES_FILE = os.path.join(SCRIPT_DIR, '.portal_routes.json') # Portal routes learned by browser navigation
+PORTAL_URL = "https://portal.vmedulife.com"
+LOGIN_PATH = "/public/auth/#/login/Cvr-Telangana"
+LOGIN_URL = f"{PORTAL_URL}{LOGIN_PATH}"
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_lock = threading.Lock()
+_loaded = {} # filepath -> parsed JSON (or None), read on first use rather than at import
+
+
+def read_json_file(filepath):
+    try:
+        with open(filepath, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logging.error(f"Error: {filepath} not found. Please create it.")
+        return None
+    except json.JSONDecodeError:
+        logging.error(f"Error: Could not decode JSON from {filepath}. Please check file format.")
+        return None
+
+
+def _load(filepath):
+    with _lock:
+        if filepath not in _loaded:
+            _loaded[filepath] = read_json_file(filepath)
+        return _loaded[filepath]
+
+
+def _override(filepath, overrides):
+    current = _load(filepath)
+    with _lock:
+        _loaded[filepath] = {**(current or {}), **overrides}
+        return _loaded[filepath]
+
+
+def get_config():
+    return _load(CONFIG_FILE)
+
+
+def get_selectors():
+    return _load(SELECTORS_FILE)
+
+
+def get_resource_filters():
+    # Browser resource filters: built-in defaults, then resource_filters.json, then config["resource_filters"]
+    from .network import DEFAULT_RESOURCE_FILTERS
+
+    from_file = _load(RESOURCE_FILTERS_FILE) if os.path.exists(RESOURCE_FILTERS_FILE) else None
+    return {**DEFAULT_RESOURCE_FILTERS, **(from_file or {}), **(get_config() or {}).get("resource_filters", {})}
+
+
+def portal_url():
+    # config["portal_url"] and config["login_url"] point the browser at another portal, e.g. the replay server
+    return (get_config() or {}).get("portal_url") or PORTAL_URL
+
+
+def login_url():
+    return (get_config() or {}).get("login_url") or f"{portal_url()}{LOGIN_PATH}"
+
+
+def update_config(**overrides):
+    # Overrides config.json values for this process only, e.g. update_config(driver_pool_size=1)
+    return _override(CONFIG_FILE, overrides)
+
+
+def update_selectors(**overrides):
+    return _override(SELECTORS_FILE, overrides)
+
+
+def setup_django():
+    # Sets Django up the first time the ORM is needed. Inside the dashboard's own processes
+    # (runserver, the scrape worker, the refresh scheduler) it is already set up and this is a no-op.
+    from django.apps import apps
+    if apps.ready:
+        return
+    if DASHBOARD_DIR not in sys.path:
+        sys.path.append(DASHBOARD_DIR) # Parent directory of VmedulifeDashboard
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'VmedulifeDashboard.settings')
+    import django
+    django.setup()
+
+
+def configure_logging(level=logging.INFO):
+    # Called by the command line entry points; importing the package leaves logging alone
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+
+
+def dump_html_for_debug(html_content):
+    try:
+        with open(DEBUG_HTML_FILE, "w", encoding="utf-8") as f:
+            f.write(html_content)
+        logging.info(f"Current page HTML dumped to {DEBUG_HTML_FILE} for debugging.")
+    except Exception as e:
+        logging.error(f"Error dumping HTML for debug: {e}")
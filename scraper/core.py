@@ -0,0 +1,207 @@
+import logging
+import time
+
+from .conf import dump_html_for_debug, get_config, get_selectors
+from .parser import fingerprint_card, make_record
+from .sessions import get_session_store, record_full_login, record_restored, session_stats
+from .storage import get_storage
+from .tracing import record_retry, span, trace_run
+
+# Selenium and requests are imported inside the functions that use them, so the "api"
+# backend never loads Selenium and the "selenium" backend never loads requests.
+
+api_clients = {} # username -> PortalApiClient for the "api" backend
+
+
+def scrape_attendance(driver, username=None, storage=None):
+    from .browser import extract_attendance
+
+    username = username or get_config()["username"]
+    storage = storage or get_storage()
+    try:
+        records = extract_attendance(driver, storage.load_known(username))
+        if not records:
+            logging.warning("No subject attendance elements found. Returning None.")
+            return None
+
+        return storage.save(username, records)
+
+    except Exception as e:
+        logging.error(f"Failed to extract attendance data: {e}")
+        dump_html_for_debug(driver.page_source)
+        return None
+
+def get_api_client(username, password, expired=False, fresh_login=False):
+    from .api_client import DEFAULT_API_CONFIG, PortalApiClient
+
+    # Clients are kept per user so later refreshes reuse the captured session token;
+    # fresh_login skips them and the saved session and logs in with `password`
+    client = None if fresh_login else api_clients.get(username)
+    if client is not None:
+        return client
+
+    api_config = {**DEFAULT_API_CONFIG, **(get_config() or {}).get("api", {})}
+    store = get_session_store()
+    started = time.perf_counter()
+    session = store.load(username, store.credentials_digest(username, password)) if store and not fresh_login else None
+    token = session and (session.get("token") or session["local_storage"].get(api_config["token_storage_key"]))
+    if token:
+        # A token saved by an earlier run; its first request validates it (see fetch_attendance_via_api)
+        client = PortalApiClient(api_config, token=token.strip('"'), cookies=session["cookies"])
+        client.restored_from = {**session, "restore_seconds": time.perf_counter() - started}
+    elif api_config["login_path"]:
+        client = PortalApiClient(api_config)
+        client.login(username, password)
+        login_seconds = time.perf_counter() - started
+        record_full_login(username, login_seconds, expired=expired)
+        if store:
+            cookies = [{"name": cookie.name, "value": cookie.value, "domain": cookie.domain, "path": cookie.path}
+                       for cookie in client.session.cookies]
+            store.save(username, store.credentials_digest(username, password), cookies=cookies, token=client.token,
+                       login_seconds=login_seconds)
+    else:
+        from .browser import ensure_logged_in, setup_driver, teardown_driver
+
+        # Log in once through the browser (or restore its saved session) and lift its session token
+        driver, wait = setup_driver()
+        if driver is None:
+            raise Exception("WebDriver was not set up correctly.")
+        try:
+            ensure_logged_in(driver, username, password, fresh_login)
+            client = PortalApiClient.from_driver(driver, api_config)
+        finally:
+            teardown_driver(driver)
+    api_clients[username] = client
+    return client
+
+def fetch_attendance_via_api(username, password, fresh_login=False):
+    from .api_client import PortalSessionExpired
+
+    logging.info("Fetching attendance data from the portal API...")
+    with span("login"):
+        client = get_api_client(username, password, fresh_login=fresh_login)
+    try:
+        with span("fetch_api"):
+            subjects = client.fetch_attendance()
+    except PortalSessionExpired:
+        logging.info("Portal API session expired. Logging in again...")
+        api_clients.pop(username).close()
+        store = get_session_store()
+        if store:
+            store.discard(username)
+        with span("login"):
+            record_retry()
+            client = get_api_client(username, password, expired=True)
+        with span("fetch_api"):
+            subjects = client.fetch_attendance()
+    else:
+        if client.restored_from is not None:
+            restored = client.restored_from
+            record_restored(username, restored["restore_seconds"], restored.get("login_seconds"))
+            client.restored_from = None
+
+    records = [
+        make_record(**subject, fingerprint=fingerprint_card(subject["name"], f"{subject['attended']}/{subject['total']}/{subject['percentage']}"))
+        for subject in subjects
+    ]
+    for record in records:
+        logging.debug(f"Parsed: {record}")
+    return records
+
+def fetch_attendance_records(username, password, storage=None, fresh_login=False):
+    # Fetches one account's subject records with the backend selected by config["backend"]
+    # ("selenium" or "api") without saving them; `storage` (config["storage"] by default) only
+    # supplies the last run's fingerprints. Safe to call from several threads at once: each
+    # call borrows its own browser from the pool. fresh_login logs in even when a saved
+    # session or cached API client could be reused, so the password is checked by the portal.
+    config = get_config() or {}
+    backend = config.get("backend", "selenium")
+    if backend == "api":
+        return fetch_attendance_via_api(username, password, fresh_login)
+
+    from .browser import (ensure_logged_in, extract_attendance, navigate_to_attendance_page, selected_groups,
+                          setup_driver, teardown_driver)
+    from .network import NetworkMeter
+
+    with span("setup_driver"):
+        driver, wait = setup_driver()
+    if driver is None:
+        raise Exception("WebDriver was not set up correctly.")
+    meter = NetworkMeter(driver).start()
+    try:
+        with span("login"):
+            ensure_logged_in(driver, username, password, fresh_login)
+        known = (storage or get_storage()).load_known(username) if config.get("incremental", True) else None
+        with span("navigate"):
+            group_count = navigate_to_attendance_page(driver)
+        try:
+            records = {}
+            for index, group in enumerate(selected_groups(group_count)):
+                if index or group:
+                    with span("navigate"):
+                        navigate_to_attendance_page(driver, group)
+                with span("extract"):
+                    extracted = extract_attendance(driver, known)
+                for record in extracted:
+                    if record.name in records:
+                        logging.warning(f"Subject {record.name} appears in more than one group. Keeping the first.")
+                        continue
+                    records[record.name] = record
+            return list(records.values())
+        except Exception as e:
+            logging.error(f"Failed to extract attendance data: {e}")
+            dump_html_for_debug(driver.page_source)
+            raise
+    finally:
+        meter.stop(username)
+        teardown_driver(driver)
+
+def traced(username):
+    # Traces one account's scrape; the run and its spans are saved to the database unless
+    # config["tracing"] is false
+    config = get_config() or {}
+    on_finish = None
+    if config.get("tracing", True):
+        from .persistence import save_trace # Loads Django, which the jsonl and null storages otherwise never do
+        on_finish = save_trace
+    return trace_run(username, config.get("backend", "selenium"), on_finish=on_finish)
+
+def run_scrape(username, password, storage=None, fresh_login=False):
+    # Scrapes one account and saves it to `storage`, config["storage"] by default
+    storage = storage or get_storage()
+    with traced(username) as trace:
+        records = fetch_attendance_records(username, password, storage, fresh_login)
+        if not records:
+            logging.warning("No subject attendance found. Returning None.")
+            trace.status = "empty"
+            return None
+        with span("save"):
+            return storage.save(username, records)
+
+# Main execution
+def main():
+    config = get_config()
+    if config is None:
+        logging.error("Config file could not be loaded. Exiting.")
+        return
+    if get_selectors() is None and config.get("backend", "selenium") == "selenium":
+        logging.error("Selectors file could not be loaded. Exiting.")
+        return
+
+    try:
+        run_scrape(config["username"], config["password"])
+    except Exception as e:
+        logging.error(f"An unexpected error occurred in main: {e}")
+    finally:
+        logging.info("Scraping finished.")
+        logging.info(f"Session stats: {session_stats()}")
+        if config.get("backend", "selenium") == "selenium":
+            from .browser import get_driver_pool, navigation_stats
+            from .network import network_stats
+            from . import chromedriver
+
+            logging.info(f"WebDriver pool stats: {get_driver_pool().stats()}, "
+                         f"chromedriver resolution {chromedriver.resolution_seconds:.3f}s")
+            logging.info(f"Navigation stats: {navigation_stats}")
+            logging.info(f"Network stats: {network_stats}")
+            get_driver_pool().close()
@@ -0,0 +1,226 @@
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class DriverPoolError(Exception):
+    pass
+
+
+def origin_of(url):
+    # "https://host:port" for a web page, None for about:blank, data: URLs and the like
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}" if parts.scheme in ("http", "https") and parts.netloc else None
+
+
+def chrome_driver_factory(headless=True, config=None, resource_filters=None):
+    # Returns a zero-argument callable that launches a new Chrome session. Selenium is
+    # imported on the first launch, so a pool with a fake factory never loads it. The
+    # chromedriver binary is resolved once per process (see scraper/chromedriver.py) and
+    # resource_filters (see scraper/network.py) are applied to every session.
+    config = config or {}
+
+    def factory():
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from .chromedriver import resolve_chromedriver
+        from .network import apply_resource_blocking, configure_chrome_options
+
+        started = time.perf_counter()
+        driver_path = resolve_chromedriver(config)
+        resolved = time.perf_counter()
+
+        options = webdriver.ChromeOptions()
+        if headless:
+            options.add_argument("--headless=new")
+        if config.get("chrome_binary"):
+            options.binary_location = config["chrome_binary"]
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--window-size=1366,900")
+        if resource_filters:
+            configure_chrome_options(options, resource_filters)
+        driver = webdriver.Chrome(service=Service(driver_path), options=options)
+        if resource_filters:
+            apply_resource_blocking(driver, resource_filters)
+        logging.info(f"Driver setup: chromedriver resolution {resolved - started:.3f}s, "
+                     f"Chrome launch {time.perf_counter() - resolved:.3f}s.")
+        return driver
+    return factory
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class DriverPool:
+    # A bounded pool of WebDriver sessions. Drivers are created lazily by `factory`
+    # (any callable returning a driver-like object, so a fake driver can be used locally),
+    # health-checked on checkout, reset on return and evicted after sitting idle.
+    # `reset_origins` are origins whose storage is cleared on every return, on top of the
+    # origin the driver was on.
+    def __init__(self, factory, max_size=2, idle_timeout=300, checkout_timeout=60, reset_origins=()):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.reset_origins = {origin_of(url) for url in reset_origins} - {None}
+        self._cond = threading.Condition()
+        self._idle = []      # Idle entries, most recently used last
+        self._in_use = {}    # id(driver) -> _PooledDriver
+        self._size = 0       # Idle + in use + currently being created
+        self._closed = False
+        self._stats = {
+            "cold_starts": 0,
+            "cold_start_seconds": 0.0,
+            "warm_checkouts": 0,
+            "warm_checkout_seconds": 0.0,
+            "evicted_idle": 0,
+            "discarded_unhealthy": 0,
+        }
+
+    def acquire(self):
+        started = time.perf_counter()
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise DriverPoolError("Driver pool is closed.")
+                self._evict_idle_locked()
+                entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break # Fall through to a cold start outside the lock
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise DriverPoolError(f"Timed out after {self.checkout_timeout}s waiting for a free WebDriver.")
+                    self._cond.wait(remaining)
+                    continue
+
+            if self._is_healthy(entry.driver):
+                elapsed = time.perf_counter() - started
+                with self._cond:
+                    self._in_use[id(entry.driver)] = entry
+                    self._stats["warm_checkouts"] += 1
+                    self._stats["warm_checkout_seconds"] += elapsed
+                logging.info(f"Checked out pooled WebDriver in {elapsed:.3f}s.")
+                return entry.driver
+
+            logging.warning("Pooled WebDriver failed its health check. Discarding it.")
+            self._quit(entry.driver)
+            with self._cond:
+                self._size -= 1
+                self._stats["discarded_unhealthy"] += 1
+                self._cond.notify()
+
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        elapsed = time.perf_counter() - started
+        with self._cond:
+            self._in_use[id(driver)] = _PooledDriver(driver)
+            self._stats["cold_starts"] += 1
+            self._stats["cold_start_seconds"] += elapsed
+        logging.info(f"Started new WebDriver in {elapsed:.3f}s.")
+        return driver
+
+    def release(self, driver, discard=False):
+        with self._cond:
+            entry = self._in_use.pop(id(driver), None)
+        if entry is None:
+            logging.warning("Released a WebDriver that does not belong to this pool. Quitting it.")
+            self._quit(driver)
+            return
+
+        if not discard:
+            discard = not self._reset(driver)
+
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            self._evict_idle_locked()
+            self._cond.notify()
+        if discard or self._closed:
+            self._quit(driver)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._quit(entry.driver)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = len(self._in_use)
+        stats["avg_cold_start_seconds"] = stats["cold_start_seconds"] / stats["cold_starts"] if stats["cold_starts"] else 0.0
+        stats["avg_warm_checkout_seconds"] = stats["warm_checkout_seconds"] / stats["warm_checkouts"] if stats["warm_checkouts"] else 0.0
+        return stats
+
+    def _evict_idle_locked(self):
+        # Must be called with self._cond held. Quitting happens on a helper thread so
+        # the lock is never held across a WebDriver round-trip.
+        now = time.monotonic()
+        expired = [entry for entry in self._idle if now - entry.last_used > self.idle_timeout]
+        if not expired:
+            return
+        self._idle = [entry for entry in self._idle if entry not in expired]
+        self._size -= len(expired)
+        self._stats["evicted_idle"] += len(expired)
+        logging.info(f"Evicting {len(expired)} idle WebDriver(s).")
+        threading.Thread(target=lambda: [self._quit(entry.driver) for entry in expired], daemon=True).start()
+
+    def _is_healthy(self, driver):
+        try:
+            driver.current_url # Cheap round-trip that fails if the session or browser is gone
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        # Clear per-user state so the next checkout starts from a clean browser. The WebDriver
+        # calls only reach the origin currently loaded, so cookies of every origin and the
+        # storage of the pool's origins are cleared over CDP as well.
+        from selenium.common.exceptions import WebDriverException
+
+        try:
+            origins = (self.reset_origins | {origin_of(driver.current_url)}) - {None}
+            try:
+                driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except WebDriverException:
+                pass # No storage on the current origin (e.g. about:blank)
+            driver.delete_all_cookies()
+            if hasattr(driver, "execute_cdp_cmd"): # Chromium only
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+                for origin in sorted(origins):
+                    driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            logging.warning(f"Could not reset pooled WebDriver: {e}")
+            return False
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.debug(f"Error quitting WebDriver: {e}")
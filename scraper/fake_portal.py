@@ -0,0 +1,124 @@
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .conf import SCRIPT_DIR, configure_logging
+
+# Stand-in for the portal that replays recorded responses from a fixture directory.
+# manifest.json maps "METHOD /path" to {"file": ..., "status": ..., "requires_token": ...,
+# "latency_ms": ..., "preloader": ...}. fixtures/portal_api holds the JSON API alone;
+# fixtures/portal_site adds the login page and the attendance app for the browser.
+#
+# Every response waits latency_ms (server-wide plus the route's own); routes marked
+# "preloader" also wait preloader_delay_ms, like the per-subject XHRs that keep the
+# Ring-Preloader spinning on the real portal. jitter spreads both by +/- that fraction.
+DEFAULT_FIXTURE_DIR = os.path.join(SCRIPT_DIR, 'fixtures', 'portal_api')
+SITE_FIXTURE_DIR = os.path.join(SCRIPT_DIR, 'fixtures', 'portal_site')
+FIXTURE_TOKEN = "fixture-session-token"
+CONTENT_TYPES = {
+    '.json': 'application/json',
+    '.html': 'text/html; charset=utf-8',
+    '.js': 'application/javascript',
+    '.css': 'text/css',
+    '.gif': 'image/gif',
+    '.png': 'image/png',
+}
+
+
+def load_fixtures(fixture_dir):
+    with open(os.path.join(fixture_dir, 'manifest.json'), 'r') as f:
+        manifest = json.load(f)
+    routes = {}
+    for route, spec in manifest.items():
+        with open(os.path.join(fixture_dir, spec['file']), 'rb') as f:
+            body = f.read()
+        routes[route] = {
+            'status': spec.get('status', 200),
+            'requires_token': spec.get('requires_token', False),
+            'content_type': CONTENT_TYPES.get(os.path.splitext(spec['file'])[1], 'application/octet-stream'),
+            'latency_ms': spec.get('latency_ms', 0),
+            'preloader': spec.get('preloader', False),
+            'body': body,
+        }
+    return routes
+
+
+def make_handler(routes, token, latency_ms=0, preloader_delay_ms=0, jitter=0.0):
+    def delay(route):
+        ms = latency_ms + route['latency_ms'] + (preloader_delay_ms if route['preloader'] else 0)
+        if ms and jitter:
+            ms *= random.uniform(1 - jitter, 1 + jitter)
+        if ms > 0:
+            time.sleep(ms / 1000)
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        hits = Counter() # "METHOD /path" -> requests served, recorded or not
+        hits_lock = threading.Lock()
+
+        def do_GET(self):
+            self._replay()
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            self._replay()
+
+        def _replay(self):
+            key = f"{self.command} {self.path.split('?')[0]}"
+            with self.hits_lock:
+                self.hits[key] += 1
+            route = routes.get(key)
+            if route is None:
+                self._respond(404, b'{"error": "not recorded"}')
+                return
+            delay(route)
+            if route['requires_token'] and self.headers.get('Authorization') != f"Bearer {token}":
+                self._respond(401, b'{"error": "unauthorized"}')
+                return
+            self._respond(route['status'], route['body'], route['content_type'])
+
+        def _respond(self, status, body, content_type='application/json'):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logging.debug(f"fake portal: {format % args}")
+
+    return FixtureHandler
+
+
+def start_fake_portal(fixture_dir=DEFAULT_FIXTURE_DIR, host='127.0.0.1', port=0, token=FIXTURE_TOKEN,
+                      latency_ms=0, preloader_delay_ms=0, jitter=0.0):
+    # Serves on a background thread; port=0 picks a free port. Call server.shutdown() when done.
+    # server.RequestHandlerClass.hits counts the requests served per route.
+    handler = make_handler(load_fixtures(fixture_dir), token, latency_ms, preloader_delay_ms, jitter)
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded portal responses.")
+    parser.add_argument('fixture_dir', nargs='?', default=DEFAULT_FIXTURE_DIR)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=int, default=0, help="Delay added to every response.")
+    parser.add_argument('--preloader-delay-ms', type=int, default=0, help="Extra delay for routes marked \"preloader\".")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Spread delays by +/- this fraction.")
+    args = parser.parse_args()
+
+    configure_logging()
+    handler = make_handler(load_fixtures(args.fixture_dir), FIXTURE_TOKEN, args.latency_ms, args.preloader_delay_ms, args.jitter)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), handler)
+    logging.info(f"Fake portal serving {args.fixture_dir} on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,131 @@
+import fnmatch
+import json
+import logging
+import threading
+
+# Resource filtering and network accounting for the Chrome sessions. The portal pulls in
+# images, web fonts, analytics and Ring-Preloader GIFs that the scraper never reads; blocking
+# them leaves only the documents, scripts and XHRs the subject list needs.
+#
+# Settings come from DEFAULT_RESOURCE_FILTERS, overridden by resource_filters.json (same
+# shape, next to selectors.json) and then by config["resource_filters"]:
+#   enabled             false disables everything below except measure_network
+#   page_load_strategy  "eager" returns from driver.get() at DOMContentLoaded
+#   block_images        turns image loading off for the whole browser
+#   block_patterns      URL patterns for CDP Network.setBlockedURLs ("*" is a wildcard)
+#   allow_patterns      URLs that must keep loading; a block pattern matching any of them is dropped.
+#                       Web fonts are blocked by default: if the modules menu icon is a font glyph
+#                       and the menu fallback can no longer click it, allow that font here.
+#   measure_network     record bytes transferred and page-load timings from Chrome's performance log
+DEFAULT_RESOURCE_FILTERS = {
+    "enabled": True,
+    "page_load_strategy": "eager",
+    "block_images": True,
+    "block_patterns": [
+        "*Ring-Preloader*",
+        "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+        "*.mp4", "*.webm",
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+        "*facebook.net*", "*hotjar.com*", "*clarity.ms*",
+    ],
+    "allow_patterns": [],
+    "measure_network": True,
+}
+
+_stats_lock = threading.Lock()
+network_stats = {"runs": 0, "bytes": 0, "requests": 0, "blocked": 0, "page_loads": 0,
+                 "dom_content_loaded_seconds": 0.0, "load_seconds": 0.0}
+
+
+def blocked_patterns(filters):
+    allowed = filters.get("allow_patterns", [])
+    return [pattern for pattern in filters.get("block_patterns", [])
+            if not any(fnmatch.fnmatchcase(allow, pattern) for allow in allowed)]
+
+
+def configure_chrome_options(options, filters):
+    # Applied before launch; CDP blocking needs a live session (see apply_resource_blocking)
+    if filters.get("measure_network"):
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": True})
+    if not filters.get("enabled"):
+        return
+    if filters.get("page_load_strategy"):
+        options.page_load_strategy = filters["page_load_strategy"]
+    if filters.get("block_images"):
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+
+
+def apply_resource_blocking(driver, filters):
+    # The block list lives in the browser session, so it survives the pool's reset between users
+    if not filters.get("enabled"):
+        return
+    patterns = blocked_patterns(filters)
+    if not patterns:
+        return
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    logging.debug(f"Blocking {len(patterns)} URL pattern(s): {patterns}")
+
+
+def drain_performance_log(driver):
+    try:
+        return [json.loads(entry["message"])["message"] for entry in driver.get_log("performance")]
+    except Exception: # Not Chrome, or performance logging is off
+        return None
+
+
+def summarize_network(events):
+    # Bytes, request counts and document load timings from DevTools events
+    summary = {"bytes": 0, "requests": 0, "blocked": 0, "page_loads": []}
+    document_started = None
+    page = None
+    for event in events:
+        method, params = event.get("method"), event.get("params", {})
+        if method == "Network.requestWillBeSent":
+            summary["requests"] += 1
+            if params.get("type") == "Document":
+                document_started = params.get("timestamp")
+                page = {"url": params.get("documentURL") or params.get("request", {}).get("url")}
+                summary["page_loads"].append(page)
+        elif method == "Network.loadingFinished":
+            summary["bytes"] += int(params.get("encodedDataLength", 0))
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            summary["blocked"] += 1
+        elif method in ("Page.domContentEventFired", "Page.loadEventFired") and page is not None and document_started:
+            key = "dom_content_loaded_seconds" if method == "Page.domContentEventFired" else "load_seconds"
+            page.setdefault(key, params.get("timestamp", document_started) - document_started)
+    return summary
+
+
+class NetworkMeter:
+    # Brackets one scrape: start() discards events left over from the driver's previous
+    # user, stop() summarizes everything since and logs it
+    def __init__(self, driver):
+        self.driver = driver
+
+    def start(self):
+        drain_performance_log(self.driver)
+        return self
+
+    def stop(self, label=""):
+        events = drain_performance_log(self.driver)
+        if events is None:
+            return None
+        summary = summarize_network(events)
+        loads = summary["page_loads"]
+        dom_content_loaded = sum(page.get("dom_content_loaded_seconds", 0.0) for page in loads)
+        load = sum(page.get("load_seconds", 0.0) for page in loads)
+        with _stats_lock:
+            network_stats["runs"] += 1
+            network_stats["bytes"] += summary["bytes"]
+            network_stats["requests"] += summary["requests"]
+            network_stats["blocked"] += summary["blocked"]
+            network_stats["page_loads"] += len(loads)
+            network_stats["dom_content_loaded_seconds"] += dom_content_loaded
+            network_stats["load_seconds"] += load
+        logging.info(f"Network{f' for {label}' if label else ''}: {summary['bytes'] / 1024:.1f} KiB in "
+                     f"{summary['requests']} request(s), {summary['blocked']} blocked; {len(loads)} page load(s), "
+                     f"DOMContentLoaded {dom_content_loaded:.2f}s, load {load:.2f}s in total.")
+        return summary
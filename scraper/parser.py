@@ -0,0 +1,153 @@
+import argparse
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+
+# Parses the portal's subject list from a full page HTML snapshot, without a browser.
+# Works on driver.page_source as well as debug.html dumps.
+
+ATTENDANCE_TEXT_PATTERN = re.compile(
+    r"Present session\s*(\d+)\s*out of\s*(\d+)\s*\|\s*Percentage\s*([\d.]+)\s*%"
+)
+SUBJECT_CARD_CLASS = "subject-card"
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+@dataclass(frozen=True)
+class SubjectRecord:
+    name: str
+    attended: int
+    total: int
+    percentage: float
+    multiplier: int
+    fingerprint: str = "" # Hash of the raw card snippet the record was parsed from
+
+
+def subject_multiplier(subject_name):
+    # Lab sessions count for more than one class each
+    subject_name = subject_name.lower()
+    if "ct lab" in subject_name:
+        return 2
+    elif "lab" in subject_name:
+        return 3
+    return 1
+
+
+def make_record(name, attended, total, percentage, fingerprint=""):
+    name = " ".join(name.split())
+    return SubjectRecord(name, int(attended), int(total), float(percentage), subject_multiplier(name), fingerprint)
+
+
+def fingerprint_card(name, text):
+    normalized = " ".join(name.split()) + "\0" + " ".join(text.split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def parse_attendance_text(name, text):
+    # Returns a record for a card's visible text, or None if its summary hasn't loaded
+    match = ATTENDANCE_TEXT_PATTERN.search(" ".join(text.split()))
+    if not match:
+        return None
+    return make_record(name, match.group(1), match.group(2), match.group(3), fingerprint_card(name, text))
+
+
+class _SubjectCardParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.cards = []           # (name, text) per subject card, in page order
+        self._depth = 0
+        self._card_depth = None   # Depth of the open subject-card element
+        self._heading_depth = None
+        self._name = []
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            return
+        self._depth += 1
+        if self._card_depth is None:
+            classes = (dict(attrs).get("class") or "").split()
+            if SUBJECT_CARD_CLASS in classes:
+                self._card_depth = self._depth
+                self._name, self._text = [], []
+        elif tag == "h4" and self._heading_depth is None and not self._name:
+            self._heading_depth = self._depth
+
+    def handle_startendtag(self, tag, attrs):
+        pass # Self-closing tags never open a card or heading
+
+    def handle_endtag(self, tag):
+        if tag in VOID_ELEMENTS:
+            return
+        if self._heading_depth == self._depth:
+            self._heading_depth = None
+        if self._card_depth == self._depth:
+            self.cards.append(("".join(self._name), "".join(self._text)))
+            self._card_depth = None
+        self._depth = max(self._depth - 1, 0)
+
+    def handle_data(self, data):
+        if self._card_depth is None:
+            return
+        if self._heading_depth is not None:
+            self._name.append(data)
+        else:
+            self._text.append(data)
+
+
+def extract_subject_cards(html):
+    # Returns (subject name, card text) pairs for every subject card in the page
+    parser = _SubjectCardParser()
+    parser.feed(html)
+    parser.close()
+    return parser.cards
+
+
+def parse_attendance_html(html, known=None):
+    # `known` maps subject name -> SubjectRecord from an earlier run. Cards whose fingerprint
+    # matches are reused as-is instead of being parsed again.
+    records = []
+    hits = 0
+    for name, text in extract_subject_cards(html):
+        cached = known.get(" ".join(name.split())) if known else None
+        if cached is not None and cached.fingerprint == fingerprint_card(name, text):
+            records.append(cached)
+            hits += 1
+            continue
+        record = parse_attendance_text(name, text)
+        if record is not None:
+            records.append(record)
+    if known is not None:
+        logging.info(f"Subject card fingerprints: {hits} hit(s), {len(records) - hits} miss(es).")
+    return records
+
+
+def aggregate_attendance(records):
+    # Weighted totals as stored on AttendanceData: (classes_attended, total_classes_conducted)
+    classes_attended = sum(record.attended * record.multiplier for record in records)
+    total_classes_conducted = sum(record.total * record.multiplier for record in records)
+    return classes_attended, total_classes_conducted
+
+
+def attendance_percentage_of(classes_attended, total_classes_conducted):
+    if total_classes_conducted > 0:
+        return round((classes_attended / total_classes_conducted * 100), 2)
+    return 0.00 # Set to 0 if no classes conducted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse subject attendance from a saved portal page (e.g. debug.html).")
+    parser.add_argument("html_file")
+    args = parser.parse_args()
+
+    with open(args.html_file, "r", encoding="utf-8") as f:
+        records = parse_attendance_html(f.read())
+    for record in records:
+        print(f"{record.name}: {record.attended}/{record.total} ({record.percentage}%) x{record.multiplier}")
+    classes_attended, total_classes_conducted = aggregate_attendance(records)
+    if total_classes_conducted:
+        print(f"Total: {classes_attended}/{total_classes_conducted} ({classes_attended / total_classes_conducted * 100:.2f}%)")
+    else:
+        print("No subject attendance found.")
@@ -0,0 +1,252 @@
+import logging
+from datetime import date, datetime, timezone
+
+from .conf import get_config, setup_django
+
+setup_django() # The models below need a configured Django
+
+from attendance_dashboard.models import (AttendanceData, ScrapeRun, ScrapeSpan, SubjectAttendance, SubjectFingerprint,
+                                         UserProfile)
+from attendance_dashboard.cache import invalidate_attendance_cache
+from attendance_dashboard.history import upsert_rollups
+from attendance_dashboard.metrics import add_trace_totals, prune_traces
+from attendance_dashboard.projections import refresh_projections
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+
+from .parser import aggregate_attendance, attendance_percentage_of, make_record
+
+
+def build_subject_rows(user_profile, records, day):
+    return [
+        SubjectAttendance(
+            user=user_profile,
+            subject=record.name,
+            date=day,
+            attended=record.attended,
+            total=record.total,
+            attendance_percentage=round(record.percentage, 2),
+            multiplier=record.multiplier,
+        )
+        for record in records
+    ]
+
+def upsert_subject_rows(rows):
+    SubjectAttendance.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['user', 'subject', 'date'],
+        update_fields=['attended', 'total', 'attendance_percentage', 'multiplier'],
+    )
+
+def upsert_fingerprint_rows(user_profile, records, day):
+    SubjectFingerprint.objects.bulk_create(
+        [
+            SubjectFingerprint(
+                user=user_profile,
+                subject=record.name,
+                digest=record.fingerprint,
+                date=day,
+                attended=record.attended,
+                total=record.total,
+                attendance_percentage=round(record.percentage, 2),
+                multiplier=record.multiplier,
+            )
+            for record in records
+        ],
+        update_conflicts=True,
+        unique_fields=['user', 'subject'],
+        update_fields=['digest', 'date', 'attended', 'total', 'attendance_percentage', 'multiplier'],
+    )
+
+def delete_fingerprint_rows(removed_by_profile):
+    # [(user_profile, [subject, ...]), ...] in one DELETE
+    condition = Q()
+    for user_profile, subjects in removed_by_profile:
+        condition |= Q(user=user_profile, subject__in=subjects)
+    SubjectFingerprint.objects.filter(condition).delete()
+
+def load_known_records(username):
+    # Subject records seen on the previous run, keyed by subject name, for parse_attendance_html()
+    fingerprints = SubjectFingerprint.objects.filter(user__user__username=username)
+    return {
+        fingerprint.subject: make_record(fingerprint.subject, fingerprint.attended, fingerprint.total,
+                                         fingerprint.attendance_percentage, fingerprint.digest)
+        for fingerprint in fingerprints
+    }
+
+def changed_records(records, fingerprints, day):
+    # Records whose card changed since the last run, or that have no row for `day` yet
+    changed = []
+    for record in records:
+        fingerprint = fingerprints.get(record.name)
+        if fingerprint is None or fingerprint.digest != record.fingerprint or fingerprint.date != day:
+            changed.append(record)
+    return changed
+
+def removed_subjects(records, fingerprints):
+    # Subjects fingerprinted by an earlier run that the portal no longer lists; dropping their
+    # fingerprints keeps them out of the projections
+    names = {record.name for record in records}
+    return [subject for subject in fingerprints if subject not in names]
+
+def profiles_for(usernames):
+    # {username: UserProfile with its user}, creating missing users and profiles. Inserts that
+    # lose a race with a concurrent scrape are ignored and the winner's rows are read back, so
+    # this never raises IntegrityError; an existing account costs a single query.
+    profiles = {profile.user.username: profile
+                for profile in UserProfile.objects.filter(user__username__in=usernames).select_related('user')}
+    missing = [username for username in usernames if username not in profiles]
+    if missing:
+        User.objects.bulk_create([User(username=username) for username in missing], ignore_conflicts=True)
+        users = User.objects.filter(username__in=missing)
+        UserProfile.objects.bulk_create([UserProfile(user=user) for user in users], ignore_conflicts=True)
+        profiles.update({profile.user.username: profile
+                         for profile in UserProfile.objects.filter(user__in=users).select_related('user')})
+    return profiles
+
+def upsert_attendance_rows(rows):
+    # INSERT ... ON CONFLICT (user, date) DO UPDATE: concurrent saves of the same day both
+    # succeed and the last one wins. Sets each row's pk. The timestamp moves with the numbers,
+    # so it is the time they were last saved.
+    AttendanceData.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['user', 'date'],
+        update_fields=['total_classes_conducted', 'classes_attended', 'attendance_percentage', 'timestamp'],
+    )
+    upsert_rollups(rows) # bulk_create doesn't send the post_save that maintains them
+
+def save_attendance_record(username, records):
+    if username is None:
+        username = get_config()["username"] # Fall back to the username from config.json
+    user_profile = profiles_for([username])[username]
+
+    today = date.today()
+    classes_attended, total_classes_conducted = aggregate_attendance(records)
+    fingerprints = {fingerprint.subject: fingerprint for fingerprint in SubjectFingerprint.objects.filter(user=user_profile)}
+    changed = changed_records(records, fingerprints, today)
+    removed = removed_subjects(records, fingerprints)
+
+    attendance_record = AttendanceData.objects.filter(user=user_profile, date=today).first()
+    numbers_changed = (attendance_record is None
+                       or attendance_record.total_classes_conducted != total_classes_conducted
+                       or attendance_record.classes_attended != classes_attended)
+    if numbers_changed:
+        attendance_record = AttendanceData(
+            user=user_profile,
+            date=today,
+            total_classes_conducted=total_classes_conducted,
+            classes_attended=classes_attended,
+            attendance_percentage=attendance_percentage_of(classes_attended, total_classes_conducted),
+        )
+    else:
+        attendance_record.user = user_profile
+        logging.info(f"Attendance for {username} is unchanged. Skipping database write.")
+
+    if numbers_changed or changed or removed: # An unchanged scrape takes no write lock at all
+        with transaction.atomic():
+            if numbers_changed:
+                upsert_attendance_rows([attendance_record])
+                logging.info(f"Attendance data saved to Django database: {attendance_record}")
+            # Only subjects whose card changed get new rows, written in one statement
+            if changed:
+                upsert_subject_rows(build_subject_rows(user_profile, changed, today))
+                upsert_fingerprint_rows(user_profile, changed, today)
+            if removed:
+                delete_fingerprint_rows([(user_profile, removed)])
+    if changed or removed:
+        refresh_projections([user_profile.pk]) # Only a scrape with new numbers changes the projections
+    if numbers_changed:
+        invalidate_attendance_cache([user_profile.user_id])
+
+    logging.info(f"Subject fingerprints for {username}: {len(records) - len(changed)} hit(s), {len(changed)} miss(es).")
+    return attendance_record # Return the Django model instance
+
+def bulk_save_attendance(records_by_username):
+    # Writes many accounts' daily and per-subject rows at once: {username: [SubjectRecord, ...]}.
+    # Accounts and subjects that haven't changed since their last write today are skipped.
+    profiles = profiles_for(list(records_by_username))
+
+    today = date.today()
+    existing = {row.user_id: row for row in AttendanceData.objects.filter(user__in=profiles.values(), date=today)}
+    fingerprints = {}
+    for fingerprint in SubjectFingerprint.objects.filter(user__in=profiles.values()):
+        fingerprints.setdefault(fingerprint.user_id, {})[fingerprint.subject] = fingerprint
+
+    rows = []
+    subject_rows = []
+    changed_by_profile = []
+    removed_by_profile = []
+    hits = misses = 0
+    for username, records in records_by_username.items():
+        profile = profiles[username]
+        classes_attended, total_classes_conducted = aggregate_attendance(records)
+        current = existing.get(profile.pk)
+        if (current is None
+                or current.total_classes_conducted != total_classes_conducted
+                or current.classes_attended != classes_attended):
+            rows.append(AttendanceData(
+                user=profile,
+                date=today,
+                total_classes_conducted=total_classes_conducted,
+                classes_attended=classes_attended,
+                attendance_percentage=attendance_percentage_of(classes_attended, total_classes_conducted),
+            ))
+        changed = changed_records(records, fingerprints.get(profile.pk, {}), today)
+        hits += len(records) - len(changed)
+        misses += len(changed)
+        if changed:
+            subject_rows.extend(build_subject_rows(profile, changed, today))
+            changed_by_profile.append((profile, changed))
+        removed = removed_subjects(records, fingerprints.get(profile.pk, {}))
+        if removed:
+            removed_by_profile.append((profile, removed))
+
+    with transaction.atomic():
+        if rows:
+            upsert_attendance_rows(rows)
+        if subject_rows:
+            upsert_subject_rows(subject_rows)
+        for profile, changed in changed_by_profile:
+            upsert_fingerprint_rows(profile, changed, today)
+        if removed_by_profile:
+            delete_fingerprint_rows(removed_by_profile)
+    refreshed = {profile.pk for profile, _ in changed_by_profile + removed_by_profile}
+    if refreshed:
+        refresh_projections(list(refreshed)) # All of them in one query
+    if rows:
+        invalidate_attendance_cache([row.user.user_id for row in rows]) # bulk_create doesn't send post_save
+    logging.info(f"Bulk saved attendance for {len(rows)} of {len(records_by_username)} account(s). "
+                 f"Subject fingerprints: {hits} hit(s), {misses} miss(es).")
+    return len(rows)
+
+def save_trace(trace):
+    # Persists a finished scraper.tracing.Trace as a ScrapeRun with one ScrapeSpan per span
+    with transaction.atomic():
+        run = ScrapeRun.objects.create(
+            username=trace.username,
+            backend=trace.backend,
+            status=trace.status,
+            error=trace.error,
+            started_at=datetime.fromtimestamp(trace.started_at, tz=timezone.utc),
+            duration_seconds=trace.duration,
+        )
+        spans = ScrapeSpan.objects.bulk_create([
+            ScrapeSpan(
+                run=run,
+                name=span.name,
+                parent=span.parent,
+                subject=span.subject[:200],
+                offset_seconds=span.offset,
+                duration_seconds=span.duration,
+                status=span.status,
+                timeouts=span.timeouts,
+                retries=span.retries,
+            )
+            for span in trace.spans
+        ])
+        add_trace_totals(run.status, run.duration_seconds, spans)
+    prune_traces()
+    return run
@@ -0,0 +1,148 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+
+from .conf import SCRIPT_DIR, get_config
+
+# Encrypted per-user store of portal sessions (cookies, localStorage and the API token), so
+# a run can restore the previous login instead of typing credentials again. Each user gets
+# one Fernet-encrypted file in session_dir, named by a hash of the username. A session is
+# only restored for the credentials it was saved under (see credentials_digest), so a wrong
+# password never rides on someone else's login.
+#
+# config.json keys: "session_store" (default true), "session_dir", "session_max_age"
+# (seconds, default 12 hours) and "session_key" (a Fernet key; the SCRAPER_SESSION_KEY
+# environment variable also works). The key is never written to disk by the scraper: without
+# one the store is disabled and every run logs in. Generate one with
+#   python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
+DEFAULT_SESSION_DIR = os.path.join(SCRIPT_DIR, '.sessions')
+DEFAULT_SESSION_MAX_AGE = 12 * 60 * 60
+SESSION_KEY_ENV = 'SCRAPER_SESSION_KEY'
+
+
+class SessionStore:
+    def __init__(self, key, directory=DEFAULT_SESSION_DIR, max_age=DEFAULT_SESSION_MAX_AGE):
+        from cryptography.fernet import Fernet
+
+        self.directory = directory
+        self.max_age = max_age
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self._key = key.encode() if isinstance(key, str) else key
+        self._fernet = Fernet(self._key)
+
+    def credentials_digest(self, username, password):
+        # Keyed with the store's secret, so the digest inside a session file proves nothing without it
+        return hmac.new(self._key, f"{username}\0{password}".encode(), hashlib.sha256).hexdigest()
+
+    def load(self, username, digest):
+        # Returns the saved session dict, or None if there is none, it is too old to try or it was
+        # saved under credentials other than the ones `digest` was made from
+        from cryptography.fernet import InvalidToken
+
+        try:
+            with open(self._path(username), 'rb') as f:
+                session = json.loads(self._fernet.decrypt(f.read()))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, InvalidToken) as e:
+            logging.warning(f"Discarding unreadable saved session for {username}: {e}")
+            self.discard(username)
+            return None
+        if time.time() - session.get("saved_at", 0) > self.max_age:
+            logging.info(f"Saved session for {username} is older than {self.max_age}s. Discarding it.")
+            self.discard(username)
+            return None
+        if not hmac.compare_digest(session.get("digest") or "", digest):
+            # Left in place: the wrong password must not log the right one out
+            logging.info(f"Saved session for {username} was saved under different credentials. Not restoring it.")
+            return None
+        return session
+
+    def save(self, username, digest, cookies=None, local_storage=None, token=None, url=None, login_seconds=None):
+        session = {
+            "digest": digest,
+            "cookies": cookies or [],
+            "local_storage": local_storage or {},
+            "token": token,
+            "url": url,
+            "login_seconds": login_seconds, # Cost of the full login this session saves on restore
+            "saved_at": time.time(),
+        }
+        path = self._path(username)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+            f.write(self._fernet.encrypt(json.dumps(session).encode()))
+        os.replace(tmp_path, path) # Readers never see a half-written file
+
+    def discard(self, username):
+        try:
+            os.remove(self._path(username))
+        except FileNotFoundError:
+            pass
+
+    def _path(self, username):
+        return os.path.join(self.directory, hashlib.sha256(username.encode()).hexdigest() + '.session')
+
+
+_store_lock = threading.Lock()
+_store = None
+_store_disabled = False # Set once a missing or unusable key has been reported
+_stats_lock = threading.Lock()
+_stats = {"restored": 0, "full_logins": 0, "expired": 0, "restore_seconds": 0.0, "login_seconds": 0.0, "seconds_saved": 0.0}
+
+
+def get_session_store():
+    # The process-wide store, or None when disabled with "session_store": false or without a
+    # usable key. A bad key only turns saved sessions off; the scrape itself goes ahead.
+    global _store, _store_disabled
+    config = get_config() or {}
+    if not config.get("session_store", True):
+        return None
+    with _store_lock:
+        if _store is None and not _store_disabled:
+            key = config.get("session_key") or os.environ.get(SESSION_KEY_ENV)
+            if not key:
+                logging.warning(f"No session_key in config.json and no {SESSION_KEY_ENV} set. "
+                                "Saved sessions are disabled; every run logs in.")
+                _store_disabled = True
+                return None
+            try:
+                _store = SessionStore(
+                    key,
+                    directory=config.get("session_dir", DEFAULT_SESSION_DIR),
+                    max_age=config.get("session_max_age", DEFAULT_SESSION_MAX_AGE),
+                )
+            except (ValueError, TypeError, OSError) as e:
+                logging.warning(f"Could not open the session store ({e}). Saved sessions are disabled; every run logs in.")
+                _store_disabled = True
+        return _store
+
+
+def record_restored(username, seconds, login_seconds):
+    saved = max((login_seconds or 0.0) - seconds, 0.0)
+    with _stats_lock:
+        _stats["restored"] += 1
+        _stats["restore_seconds"] += seconds
+        _stats["seconds_saved"] += saved
+    logging.info(f"Restored saved session for {username} in {seconds:.2f}s; login skipped (~{saved:.1f}s saved).")
+
+
+def record_full_login(username, seconds, expired=False):
+    with _stats_lock:
+        _stats["full_logins"] += 1
+        _stats["login_seconds"] += seconds
+        if expired:
+            _stats["expired"] += 1
+    logging.info(f"Full login for {username} took {seconds:.2f}s{' (saved session had expired)' if expired else ''}.")
+
+
+def session_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    attempts = stats["restored"] + stats["full_logins"]
+    stats["login_skip_rate"] = stats["restored"] / attempts if attempts else 0.0
+    return stats
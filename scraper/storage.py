@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime, timezone
+
+from .conf import HISTORY_FILE, get_config
+from .parser import aggregate_attendance, attendance_percentage_of
+
+# Where scrape results go, selected by config.json "storage":
+#   "orm"   - the dashboard's database through scraper.persistence (default)
+#   "jsonl" - one JSON line per account per save appended to "storage_path" (attendance.jsonl),
+#             written as it arrives; nothing is re-read or rewritten, so the file can grow for
+#             years and the Django models are never loaded
+#   "null"  - builds the entry and drops it, for benchmarking everything but the write
+# Every backend has save(username, records) for one account, returning something truthy,
+# save_many({username: records}) for a batch, returning the number of accounts written, and
+# load_known(username), the fingerprinted records of the last run or None.
+STORAGE_BACKENDS = ("orm", "jsonl", "null")
+
+
+def attendance_entry(username, records):
+    classes_attended, total_classes_conducted = aggregate_attendance(records)
+    return {
+        "username": username,
+        "date": date.today().isoformat(),
+        "saved_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "total_classes_conducted": total_classes_conducted,
+        "classes_attended": classes_attended,
+        "attendance_percentage": attendance_percentage_of(classes_attended, total_classes_conducted),
+        "subjects": [
+            {"subject": record.name, "attended": record.attended, "total": record.total,
+             "attendance_percentage": round(record.percentage, 2), "multiplier": record.multiplier}
+            for record in records
+        ],
+    }
+
+
+class OrmStorage:
+    name = "orm"
+
+    def load_known(self, username):
+        from .persistence import load_known_records
+        return load_known_records(username)
+
+    def save(self, username, records):
+        from .persistence import save_attendance_record
+        return save_attendance_record(username, records) # The AttendanceData row
+
+    def save_many(self, records_by_username):
+        from .persistence import bulk_save_attendance
+        return bulk_save_attendance(records_by_username)
+
+    def close(self):
+        pass
+
+
+class JsonlStorage:
+    name = "jsonl"
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd = None
+
+    def load_known(self, username):
+        return None # Every card is parsed; finding the last entry would mean reading the file
+
+    def save(self, username, records):
+        entry = attendance_entry(username, records)
+        self._append(entry)
+        return entry
+
+    def save_many(self, records_by_username):
+        for username, records in records_by_username.items():
+            self._append(attendance_entry(username, records))
+        logging.info(f"Appended attendance for {len(records_by_username)} account(s) to {self.path}.")
+        return len(records_by_username)
+
+    def _append(self, entry):
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, line) # One O_APPEND write per line, so concurrent writers never interleave
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+class NullStorage:
+    name = "null"
+
+    def __init__(self):
+        self.saved = 0
+
+    def load_known(self, username):
+        return None
+
+    def save(self, username, records):
+        self.saved += 1
+        return attendance_entry(username, records)
+
+    def save_many(self, records_by_username):
+        self.saved += len(records_by_username)
+        return len(records_by_username)
+
+    def close(self):
+        pass
+
+
+_storages_lock = threading.Lock()
+_storages = {} # name -> the process-wide backend
+
+
+def get_storage(name=None):
+    # The process-wide backend named by `name`, or by config "storage" when None
+    config = get_config() or {}
+    name = name or config.get("storage", "orm")
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage '{name}'. Use one of: {', '.join(STORAGE_BACKENDS)}.")
+    with _storages_lock:
+        if name not in _storages:
+            if name == "jsonl":
+                _storages[name] = JsonlStorage(config.get("storage_path", HISTORY_FILE))
+            elif name == "null":
+                _storages[name] = NullStorage()
+            else:
+                _storages[name] = OrmStorage()
+        return _storages[name]
+
+
+def close_storages():
+    with _storages_lock:
+        for storage in _storages.values():
+            storage.close()
+        _storages.clear()
@@ -0,0 +1,110 @@
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+# Lightweight tracing for scrape runs. trace_run() opens a run, span() times a stage (or one
+# subject card) inside it, and record_timeout()/record_retry() count waits that timed out and
+# retried requests against the innermost open span. Outside a run every call is a no-op, so
+# instrumented functions work the same when called on their own.
+
+_current_trace = contextvars.ContextVar("scraper_trace", default=None)
+_current_span = contextvars.ContextVar("scraper_span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    offset: float # Seconds from the start of the run
+    parent: str = ""
+    subject: str = ""
+    duration: float = 0.0
+    status: str = "ok" # "ok" or "error"
+    timeouts: int = 0
+    retries: int = 0
+
+
+@dataclass
+class Trace:
+    username: str
+    backend: str
+    started_at: float = field(default_factory=time.time)
+    started: float = field(default_factory=time.perf_counter)
+    status: str = "succeeded" # "succeeded", "empty" or "failed"
+    error: str = ""
+    duration: float = 0.0
+    spans: list = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, span):
+        with self.lock:
+            self.spans.append(span)
+
+
+@contextmanager
+def trace_run(username, backend, on_finish=None):
+    # Yields the Trace; on_finish(trace) is called once the run is over, e.g. to persist it
+    trace = Trace(username, backend)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.status = "failed"
+        trace.error = str(e)
+        raise
+    finally:
+        _current_trace.reset(token)
+        trace.duration = time.perf_counter() - trace.started
+        if on_finish is not None:
+            try:
+                on_finish(trace)
+            except Exception as e:
+                logging.warning(f"Could not record the trace for {username}: {e}")
+
+
+@contextmanager
+def span(name, subject=""):
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    current = Span(name, time.perf_counter() - trace.started, parent=parent.name if parent else "", subject=subject)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException:
+        current.status = "error"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.duration = time.perf_counter() - trace.started - current.offset
+        trace.add(current)
+
+
+def record_timeout(count=1):
+    current = _current_span.get()
+    if current is not None:
+        current.timeouts += count
+
+
+def record_retry(count=1):
+    current = _current_span.get()
+    if current is not None:
+        current.retries += count
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def current_span():
+    return _current_span.get()
+
+
+def in_current_context(fn):
+    # Wraps fn so it runs inside the caller's trace and span when handed to another thread
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)